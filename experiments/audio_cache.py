@@ -0,0 +1,174 @@
+"""Content-addressed on-disk cache for synthesized PCM audio.
+
+Entries are keyed by a hash of (model id, voice name, system instruction,
+normalized text) and stored as `<key>.pcm` (raw PCM) plus `<key>.json`
+(the `PcmFormat` and some descriptive metadata). The modification time of the
+`.pcm` file doubles as the LRU timestamp: it is refreshed on every hit, and the
+oldest entries are evicted once the total size exceeds the byte budget.
+
+Configuration via environment:
+- SPEAK_CACHE_DIR: cache directory (default: ~/.cache/speak-to-me/tts)
+- SPEAK_CACHE_MAX_MB: byte budget in MiB (default: 256)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import BinaryIO
+
+from experiments.pcm_audio import PcmFormat
+
+DEFAULT_CACHE_DIR = os.environ.get("SPEAK_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "speak-to-me", "tts"
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_STATS_FILENAME = "stats.json"
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different inputs share a cache entry."""
+    return " ".join(text.split())
+
+
+def cache_key(*, model_id: str, voice_name: str, system_instruction: str, text: str) -> str:
+    payload = json.dumps([model_id, voice_name, system_instruction, normalize_text(text)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _max_bytes_from_env() -> int:
+    """The byte budget from SPEAK_CACHE_MAX_MB (DEFAULT_MAX_BYTES if unset); ValueError if it is not a whole number of MiB."""
+    value = os.environ.get("SPEAK_CACHE_MAX_MB", "").strip()
+    if not value:
+        return DEFAULT_MAX_BYTES
+    try:
+        megabytes = int(value)
+    except ValueError:
+        raise ValueError(f"SPEAK_CACHE_MAX_MB must be a whole number of MiB, got {value!r}") from None
+    if megabytes < 0:
+        raise ValueError(f"SPEAK_CACHE_MAX_MB must not be negative, got {value!r}")
+    return megabytes * 1024 * 1024
+
+
+class AudioCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int | None = None) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = _max_bytes_from_env() if max_bytes is None else max_bytes
+        # Counters for this process; cumulative numbers are kept in stats.json.
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.pcm", self.directory / f"{key}.json"
+
+    def get(self, key: str) -> tuple[bytes, PcmFormat] | None:
+        pcm_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            pcm = pcm_path.read_bytes()
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        with contextlib.suppress(FileNotFoundError):  # Evicted by another process since the read
+            os.utime(pcm_path)  # Mark as recently used
+        self.hits += 1
+        self.bytes_served += len(pcm)
+        return pcm, PcmFormat(**meta["format"])
+
+    def writer(self, key: str, fmt: PcmFormat, **metadata: str) -> CacheEntryWriter:
+        """Open an entry for incremental writing; it becomes visible only on commit()."""
+        return CacheEntryWriter(self, key, fmt, metadata)
+
+    def put(self, key: str, pcm: bytes, fmt: PcmFormat, **metadata: str) -> None:
+        entry = self.writer(key, fmt, **metadata)
+        entry.write(pcm)
+        entry.commit()
+
+    def evict(self) -> None:
+        """Remove least-recently-used entries until the cache fits into max_bytes."""
+        entries: list[tuple[float, int, Path]] = []
+        total = 0
+        for pcm_path in self.directory.glob("*.pcm"):
+            try:
+                st = pcm_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, pcm_path))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, pcm_path in entries:
+            if total <= self.max_bytes:
+                break
+            pcm_path.unlink(missing_ok=True)
+            pcm_path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+
+    def save_stats(self) -> dict[str, int]:
+        """Add this process' counters to the cumulative stats file and return the totals."""
+        stats_path = self.directory / _STATS_FILENAME
+        try:
+            totals: dict[str, int] = json.loads(stats_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            totals = {}
+        for name, value in (("hits", self.hits), ("misses", self.misses), ("bytes_served", self.bytes_served)):
+            totals[name] = totals.get(name, 0) + value
+        stats_path.write_text(json.dumps(totals), encoding="utf-8")
+        self.hits = self.misses = self.bytes_served = 0
+        return totals
+
+    def report(self) -> None:
+        hits, misses = self.hits, self.misses
+        totals = self.save_stats()
+        print(
+            f"Cache: {hits} hit(s), {misses} miss(es) this run; "
+            f"cumulative {totals['hits']} hit(s) / {totals['misses']} miss(es), "
+            f"{totals['bytes_served'] / (1024 * 1024):.1f} MB served from cache."
+        )
+
+
+class CacheEntryWriter:
+    def __init__(self, cache: AudioCache, key: str, fmt: PcmFormat, metadata: dict[str, str]) -> None:
+        self._cache = cache
+        self._fmt = fmt
+        self._metadata = metadata
+        self._pcm_path, self._meta_path = cache._paths(key)
+        # Write to temp files and rename, so concurrent readers never see partial entries.
+        self._tmp_suffix = f".{os.getpid()}.{id(self)}.tmp"
+        self._pcm_tmp = self._pcm_path.with_name(self._pcm_path.name + self._tmp_suffix)
+        self._file: BinaryIO | None = open(self._pcm_tmp, "wb")  # noqa: SIM115 - closed by commit() or discard()
+
+    def write(self, pcm: bytes) -> None:
+        if self._file is None:
+            raise ValueError(f"cache entry {self._pcm_path.name} is closed")
+        self._file.write(pcm)
+
+    def commit(self) -> None:
+        if self._file is None:
+            raise ValueError(f"cache entry {self._pcm_path.name} is closed")
+        self._file.close()
+        self._file = None
+        os.replace(self._pcm_tmp, self._pcm_path)
+
+        # The metadata goes last: an entry only counts as present once both files exist.
+        meta = {"format": asdict(self._fmt), "created": time.time(), **self._metadata}
+        meta_tmp = self._meta_path.with_name(self._meta_path.name + self._tmp_suffix)
+        meta_tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(meta_tmp, self._meta_path)
+
+        self._cache.evict()
+
+    def discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._pcm_tmp.unlink(missing_ok=True)
@@ -0,0 +1,322 @@
+"""Pluggable output codecs for synthesized speech.
+
+PCM16 WAV at 24 kHz mono costs ~2.9 MB per minute. The codecs here trade that
+against fidelity and dependencies:
+
+- wav: PCM16 WAV via `StreamingWavWriter` (crash-safe header, no dependencies).
+- flac: lossless, typically 40-60% of the WAV size for speech (needs soundfile).
+- ogg: Ogg Vorbis, lossy, around a tenth of the WAV size (needs soundfile).
+- mulaw: G.711 mu-law WAV, lossy 8-bit at half the WAV size (numpy only).
+
+Every writer takes PCM16 chunks through `write()` and reports, on `close()`, an
+`EncodeStats` with the file size and the time spent encoding. The writers are
+blocking: async callers run them through `OffloopWriter`, so encoding happens
+on the writer thread and never stalls the receive loop or playback.
+
+Usage:
+  uv run python -m experiments.audio_codecs compare speech.wav
+  uv run python -m experiments.audio_codecs convert speech.wav -f flac
+"""
+
+from __future__ import annotations
+
+import abc
+import argparse
+import os
+import struct
+import time
+import wave
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Self
+
+from experiments.pcm_audio import PcmFormat
+from experiments.wav_stream import StreamingWavWriter
+
+DEFAULT_FORMAT = "wav"
+
+
+@dataclass
+class EncodeStats:
+    codec: str
+    path: str
+    fmt: PcmFormat
+    pcm_bytes: int
+    file_bytes: int
+    encode_seconds: float
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.pcm_bytes / self.fmt.bytes_per_second
+
+    @property
+    def ratio(self) -> float:
+        """File size relative to the raw PCM."""
+        return self.file_bytes / self.pcm_bytes if self.pcm_bytes else 0.0
+
+    @property
+    def encode_mb_per_second(self) -> float:
+        return self.pcm_bytes / self.encode_seconds / 1e6 if self.encode_seconds else 0.0
+
+    def summary_line(self) -> str:
+        speed = f"{self.audio_seconds / self.encode_seconds:.0f}x real time" if self.encode_seconds else "n/a"
+        return (
+            f"{self.codec}: {self.file_bytes / 1e6:.2f} MB for {self.audio_seconds:.1f}s of audio "
+            f"({self.ratio:.0%} of PCM), encoded at {self.encode_mb_per_second:.1f} MB/s ({speed})"
+        )
+
+
+class AudioWriter(abc.ABC):
+    """Base class: times the codec's `_encode`/`_finish` and counts PCM bytes; not thread-safe."""
+
+    codec = ""
+
+    def __init__(self, path: str, fmt: PcmFormat) -> None:
+        if fmt.sample_width_bytes != 2:
+            raise ValueError(f"{self.codec} writer needs 16-bit PCM, got {fmt.sample_width_bytes * 8}-bit")
+        self.path = path
+        self.fmt = fmt
+        self.pcm_bytes = 0
+        self.encode_seconds = 0.0
+        self._frame = fmt.channels * fmt.sample_width_bytes
+        self._partial = b""  # Bytes of a frame split across two chunks
+        self._closed = False
+
+    def write(self, pcm: bytes) -> None:
+        if self._closed:
+            raise ValueError(f"{self.codec} writer for {self.path} is closed")
+        started = time.perf_counter()
+        self.pcm_bytes += len(pcm)
+        if self._partial:
+            pcm = self._partial + pcm
+        whole = len(pcm) - len(pcm) % self._frame
+        self._partial = pcm[whole:]
+        if whole:
+            self._encode(pcm[:whole])
+        self.encode_seconds += time.perf_counter() - started
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        started = time.perf_counter()
+        self._finish()  # A torn frame at the end is dropped
+        self.encode_seconds += time.perf_counter() - started
+
+    def stats(self) -> EncodeStats:
+        file_bytes = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return EncodeStats(self.codec, self.path, self.fmt, self.pcm_bytes, file_bytes, self.encode_seconds)
+
+    @abc.abstractmethod
+    def _encode(self, pcm: bytes) -> None: ...
+
+    @abc.abstractmethod
+    def _finish(self) -> None: ...
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class WavWriter(AudioWriter):
+    codec = "wav"
+
+    def __init__(self, path: str, fmt: PcmFormat) -> None:
+        super().__init__(path, fmt)
+        self._wav = StreamingWavWriter(path, fmt)
+
+    def _encode(self, pcm: bytes) -> None:
+        self._wav.write(pcm)
+
+    def _finish(self) -> None:
+        self._wav.close()
+
+
+def mulaw_encode(pcm: bytes) -> bytes:
+    """G.711 mu-law encoding of little-endian PCM16 (one byte per sample)."""
+    import numpy as np
+
+    samples = np.frombuffer(pcm, dtype="<i2").astype(np.int32)
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), 32635) + 0x84
+    exponent = np.clip(np.floor(np.log2(magnitude)).astype(np.int32) - 7, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    encoded: bytes = (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+    return encoded
+
+
+def _mulaw_header(fmt: PcmFormat, frames: int) -> bytes:
+    data_bytes = frames * fmt.channels
+    return struct.pack(
+        "<4sI4s4sIHHIIHHH4sII4sI",
+        b"RIFF",
+        50 + data_bytes,
+        b"WAVE",
+        b"fmt ",
+        18,
+        7,  # WAVE_FORMAT_MULAW
+        fmt.channels,
+        fmt.sample_rate_hz,
+        fmt.sample_rate_hz * fmt.channels,
+        fmt.channels,
+        8,
+        0,  # cbSize
+        b"fact",
+        4,
+        frames,
+        b"data",
+        data_bytes,
+    )
+
+
+class MulawWriter(AudioWriter):
+    codec = "mulaw"
+
+    def __init__(self, path: str, fmt: PcmFormat) -> None:
+        super().__init__(path, fmt)
+        self._file: BinaryIO = open(path, "wb")  # noqa: SIM115 - closed by close()
+        self._file.write(_mulaw_header(fmt, 0))
+        self._frames = 0
+
+    def _encode(self, pcm: bytes) -> None:
+        self._file.write(mulaw_encode(pcm))
+        self._frames += len(pcm) // self._frame
+
+    def _finish(self) -> None:
+        self._file.seek(0)
+        self._file.write(_mulaw_header(self.fmt, self._frames))
+        self._file.close()
+
+
+class SoundFileWriter(AudioWriter):
+    """FLAC or Ogg Vorbis through libsndfile; the encoder releases the GIL while it works."""
+
+    def __init__(self, path: str, fmt: PcmFormat, *, codec: str, container: str, subtype: str) -> None:
+        import soundfile  # type: ignore
+
+        self.codec = codec
+        super().__init__(path, fmt)
+        self._file: Any = soundfile.SoundFile(path, "w", samplerate=fmt.sample_rate_hz, channels=fmt.channels, format=container, subtype=subtype)
+
+    def _encode(self, pcm: bytes) -> None:
+        import numpy as np
+
+        self._file.write(np.frombuffer(pcm, dtype="<i2").reshape(-1, self.fmt.channels))
+
+    def _finish(self) -> None:
+        self._file.close()
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    extension: str
+    lossless: bool
+    description: str
+    open: Callable[[str, PcmFormat], AudioWriter]
+    requires: str | None = None  # Optional module the codec needs
+    extra: str | None = None  # Project extra that installs it
+
+    def missing_dependency(self) -> str | None:
+        if self.requires is None:
+            return None
+        try:
+            __import__(self.requires)
+        except (ImportError, OSError):
+            return self.requires
+        return None
+
+
+CODECS: dict[str, Codec] = {
+    codec.name: codec
+    for codec in (
+        Codec("wav", ".wav", True, "PCM16 WAV, uncompressed", WavWriter),
+        Codec("flac", ".flac", True, "FLAC, lossless", lambda path, fmt: SoundFileWriter(path, fmt, codec="flac", container="FLAC", subtype="PCM_16"), requires="soundfile", extra="codecs"),
+        Codec("ogg", ".ogg", False, "Ogg Vorbis, lossy and compact", lambda path, fmt: SoundFileWriter(path, fmt, codec="ogg", container="OGG", subtype="VORBIS"), requires="soundfile", extra="codecs"),
+        Codec("mulaw", ".wav", False, "G.711 mu-law WAV, lossy 8-bit", MulawWriter),
+    )
+}
+
+
+def get_codec(name: str) -> Codec:
+    """The codec called `name`; ValueError if it is unknown or its dependency is not installed."""
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"unknown audio format {name!r} (choose from {', '.join(CODECS)})")
+    missing = codec.missing_dependency()
+    if missing:
+        install = f"uv sync --extra {codec.extra}" if codec.extra else f"uv add {missing}"
+        raise ValueError(f"{name} output needs the optional '{missing}' package ({install})")
+    return codec
+
+
+def output_path_for(path: str, name: str) -> str:
+    """`path` with the codec's extension in place of a known audio extension."""
+    root, extension = os.path.splitext(path)
+    if extension.lower() in {codec.extension for codec in CODECS.values()}:
+        return root + CODECS[name].extension
+    return path + CODECS[name].extension if not extension else path
+
+
+def open_audio_writer(path: str, fmt: PcmFormat, name: str = DEFAULT_FORMAT) -> AudioWriter:
+    return get_codec(name).open(path, fmt)
+
+
+def write_audio(path: str, pcm: bytes, fmt: PcmFormat, name: str = DEFAULT_FORMAT) -> EncodeStats:
+    """Encodes a whole clip in one go (blocking; use `asyncio.to_thread` from async code)."""
+    with open_audio_writer(path, fmt, name) as writer:
+        writer.write(pcm)
+    return writer.stats()
+
+
+def _read_wav(path: str) -> tuple[bytes, PcmFormat]:
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM WAV, got {wav.getsampwidth() * 8}-bit")
+        return wav.readframes(wav.getnframes()), PcmFormat(wav.getframerate(), wav.getnchannels())
+
+
+def main() -> None:
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Compare or convert speech output codecs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compare = sub.add_parser("compare", help="Encode a PCM16 WAV with every available codec and report sizes and speed")
+    compare.add_argument("path", help="PCM16 WAV file")
+    compare.add_argument("--chunk-ms", type=int, default=40, help="Feed the encoders in chunks of this length, like a live stream (default: %(default)s)")
+    convert = sub.add_parser("convert", help="Re-encode a PCM16 WAV file")
+    convert.add_argument("path", help="PCM16 WAV file")
+    convert.add_argument("-f", "--format", choices=list(CODECS), required=True, help="Output codec")
+    convert.add_argument("-o", "--output", help="Output file (default: input name with the codec's extension)")
+    args = parser.parse_args()
+
+    try:
+        pcm, fmt = _read_wav(args.path)
+        if args.command == "convert":
+            output = args.output or output_path_for(args.path, args.format)
+            if os.path.abspath(output) == os.path.abspath(args.path):
+                output = os.path.splitext(output)[0] + f".{args.format}" + CODECS[args.format].extension
+            print(write_audio(output, pcm, fmt, args.format).summary_line())
+            print(f"Wrote {output}")
+            return
+
+        chunk = max(1, fmt.bytes_per_second * args.chunk_ms // 1000)
+        print(f"{args.path}: {len(pcm) / fmt.bytes_per_second:.1f}s, {fmt.sample_rate_hz} Hz, {fmt.channels}ch, {len(pcm) / 1e6:.2f} MB of PCM")
+        with tempfile.TemporaryDirectory() as workdir:
+            for codec in CODECS.values():
+                missing = codec.missing_dependency()
+                if missing:
+                    print(f"{codec.name}: skipped ({missing} not installed)")
+                    continue
+                with codec.open(os.path.join(workdir, codec.name + codec.extension), fmt) as writer:
+                    for start in range(0, len(pcm), chunk):
+                        writer.write(pcm[start : start + chunk])
+                print(f"{writer.stats().summary_line()}{'' if codec.lossless else ' [lossy]'}")
+    except (OSError, ValueError, wave.Error) as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
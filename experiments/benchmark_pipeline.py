@@ -0,0 +1,299 @@
+"""Offline benchmarks for the audio pipeline, driven by a fake Live server.
+
+No network or API key needed: `FakeLiveClient` replays audio chunks either as
+fast as possible, with synthetic pacing (--interval-ms / --jitter-ms), or with
+the chunk timings recorded from a real session (`speak --trace trace.json`).
+
+Each stage is timed on its own (wall and CPU time, throughput, time per chunk)
+and then run again under tracemalloc for peak memory:
+
+  live_session        full `live_audio_session` (stream, WAV + metrics, no cache)
+  receive_turn        Live message filtering in `_receive_turn`
+  parallel_segments   long-form ordering queues (4 segments, concurrency 3)
+  wav_write           StreamingWavWriter on the event loop thread
+  offloop_wav_write   StreamingWavWriter through OffloopWriter
+  jitter_player       JitterBufferPlayer.write with a fake, instantly draining device
+  numpy_convert       int16 -> float32 conversion (the old per-chunk playback path)
+  response_parts      GenerateContent part walking / audio extraction
+
+Usage:
+  python -m experiments.benchmark_pipeline
+  python -m experiments.benchmark_pipeline --chunks 500 --json baseline.json
+  python -m experiments.benchmark_pipeline --compare baseline.json --tolerance 0.2
+  python -m experiments.benchmark_pipeline --trace trace.json --only live_session
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, cast
+
+from experiments.fake_live import (
+    ChunkTiming,
+    FakeLiveClient,
+    FakeLiveSession,
+    fake_generate_content_response,
+    load_trace,
+)
+from experiments.pcm_audio import GEMINI_PCM_FORMAT, PcmFormat
+from experiments.playback import JitterBufferPlayer, StreamCallback
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai.live import AsyncSession
+
+Benchmark = Callable[[], Awaitable[int]]  # returns the number of audio bytes processed
+
+
+@dataclass
+class BenchResult:
+    name: str
+    chunks: int
+    total_bytes: int
+    wall_seconds: float
+    cpu_seconds: float
+    peak_kib: float
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.total_bytes / self.wall_seconds / 1e6 if self.wall_seconds else 0.0
+
+    @property
+    def us_per_chunk(self) -> float:
+        return self.wall_seconds / self.chunks * 1e6 if self.chunks else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "mb_per_second": round(self.mb_per_second, 3), "us_per_chunk": round(self.us_per_chunk, 3)}
+
+
+class _InstantStream:
+    """Fake output device: a thread that pulls 20 ms buffers as fast as the player fills them."""
+
+    def __init__(self, fmt: PcmFormat, callback: StreamCallback) -> None:
+        self._callback = callback
+        self._frames = fmt.sample_rate_hz // 50
+        self._buf = bytearray(self._frames * fmt.channels * fmt.sample_width_bytes)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._callback(self._buf, self._frames, None, None)
+            time.sleep(0)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def close(self) -> None:
+        pass
+
+
+def build_benchmarks(arrivals: list[tuple[float, int]], workdir: str) -> dict[str, tuple[int, Benchmark]]:
+    """Returns {name: (chunks per run, benchmark)}."""
+    from experiments import gemini_live_audio as live
+    from experiments.genai_response import extract_audio_bytes, iter_parts
+    from experiments.wav_stream import OffloopWriter, StreamingWavWriter
+
+    chunks = [bytes(n) for _, n in arrivals]
+    n_chunks = len(chunks)
+    fmt = GEMINI_PCM_FORMAT
+
+    def fake_client() -> genai.Client:
+        return cast("genai.Client", FakeLiveClient(arrivals))
+
+    async def live_session() -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            metrics = await live.live_audio_session(
+                play_audio=False,
+                save_audio=True,
+                text_to_speak_as_is="Benchmark.",
+                use_cache=False,
+                output_path=os.path.join(workdir, "live_session.wav"),
+                client=fake_client(),
+            )
+        return metrics.total_bytes if metrics else 0
+
+    async def receive_turn() -> int:
+        session = cast("AsyncSession", FakeLiveSession(arrivals))
+        total = 0
+        async for chunk in live._receive_turn(session, "Benchmark.", verbose=False):
+            total += len(chunk)
+        return total
+
+    async def parallel_segments() -> int:
+        config = live._live_config("Puck")
+        total = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            async for chunk in live._stream_segments_parallel(fake_client(), live.MODEL_ID, config, ["Segment."] * 4, 3):
+                total += len(chunk)
+        return total
+
+    async def wav_write() -> int:
+        with StreamingWavWriter(os.path.join(workdir, "wav_write.wav"), fmt) as wav:
+            for chunk in chunks:
+                wav.write(chunk)
+            return wav.data_bytes
+
+    async def offloop_wav_write() -> int:
+        writer = OffloopWriter()
+        wav = StreamingWavWriter(os.path.join(workdir, "offloop_wav_write.wav"), fmt)
+        try:
+            for chunk in chunks:
+                await writer.submit(wav.write, chunk)
+            await writer.drain()
+        finally:
+            await writer.close()
+            wav.close()
+        return wav.data_bytes
+
+    async def jitter_player() -> int:
+        player = JitterBufferPlayer(fmt, capacity_seconds=2.0, prebuffer_seconds=0.2, stream_factory=_InstantStream)
+        player.start()
+        try:
+            for chunk in chunks:
+                await player.write(chunk)
+        finally:
+            await player.finish()
+        return sum(len(c) for c in chunks)
+
+    async def numpy_convert() -> int:
+        import numpy as np
+
+        total = 0
+        for chunk in chunks:
+            samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+            total += samples.size * 2
+        return total
+
+    response = fake_generate_content_response(n_chunks, len(chunks[0]) if chunks else 0)
+
+    async def response_parts() -> int:
+        data, _ = extract_audio_bytes(response)
+        total = len(data or b"")
+        for part in iter_parts(response):
+            if part.inline_data and part.inline_data.data:
+                total += len(part.inline_data.data)
+        return total
+
+    return {
+        "live_session": (n_chunks, live_session),
+        "receive_turn": (n_chunks, receive_turn),
+        "parallel_segments": (4 * n_chunks, parallel_segments),
+        "wav_write": (n_chunks, wav_write),
+        "offloop_wav_write": (n_chunks, offloop_wav_write),
+        "jitter_player": (n_chunks, jitter_player),
+        "numpy_convert": (n_chunks, numpy_convert),
+        "response_parts": (n_chunks, response_parts),
+    }
+
+
+async def run_benchmark(name: str, chunks: int, bench: Benchmark, repeat: int) -> BenchResult:
+    await bench()  # Warm-up (imports, first-touch allocations)
+    best: tuple[float, float, int] | None = None
+    for _ in range(repeat):
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        total = await bench()
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+        if best is None or wall < best[0]:
+            best = (wall, cpu, total)
+    assert best is not None
+
+    # Separate pass: tracemalloc slows allocation-heavy code down a lot.
+    tracemalloc.start()
+    try:
+        await bench()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    wall, cpu, total = best
+    return BenchResult(name=name, chunks=chunks, total_bytes=total, wall_seconds=wall, cpu_seconds=cpu, peak_kib=peak / 1024)
+
+
+def compare(results: list[BenchResult], baseline_path: str, tolerance: float) -> list[str]:
+    """Returns a description of every benchmark slower (per chunk) or hungrier than the baseline allows."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+        for metric, current in (("us_per_chunk", result.us_per_chunk), ("peak_kib", result.peak_kib)):
+            limit = base[metric] * (1 + tolerance)
+            if base[metric] and current > limit:
+                regressions.append(f"{result.name}: {metric} {current:.1f} > {base[metric]:.1f} (+{current / base[metric] - 1:.0%})")
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> list[BenchResult]:
+    if args.trace:
+        arrivals = load_trace(args.trace)
+    else:
+        timing = ChunkTiming(chunks=args.chunks, chunk_bytes=args.chunk_bytes, interval_s=args.interval_ms / 1000, jitter_s=args.jitter_ms / 1000)
+        arrivals = timing.arrivals()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="speak-bench-") as workdir:
+        for name, (chunks, bench) in build_benchmarks(arrivals, workdir).items():
+            if args.only and name not in args.only:
+                continue
+            results.append(await run_benchmark(name, chunks, bench, args.repeat))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the audio pipeline (fake Live server, no network).")
+    parser.add_argument("--chunks", type=int, default=200, help="Audio chunks per run (default: %(default)s)")
+    parser.add_argument("--chunk-bytes", type=int, default=9600, help="Bytes per chunk (default: %(default)s, 200 ms of 24kHz PCM16)")
+    parser.add_argument("--interval-ms", type=float, default=0.0, help="Pace chunks this far apart (default: unpaced)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random +/- jitter on the chunk interval")
+    parser.add_argument("--trace", type=str, metavar="FILE.json", help="Replay chunk timings recorded with `speak --trace` (overrides the options above)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark; the fastest is reported (default: %(default)s)")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Run only these benchmarks")
+    parser.add_argument("--json", type=str, metavar="FILE.json", help="Write the results as JSON (usable as a --compare baseline)")
+    parser.add_argument("--compare", type=str, metavar="BASELINE.json", help="Exit with status 1 if a benchmark regressed against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown / memory growth vs the baseline (default: %(default)s = 25%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"{'benchmark':<20} {'chunks':>7} {'MB/s':>9} {'us/chunk':>10} {'wall ms':>9} {'cpu ms':>9} {'peak KiB':>10}")
+    for r in results:
+        print(f"{r.name:<20} {r.chunks:>7} {r.mb_per_second:>9.1f} {r.us_per_chunk:>10.1f} {r.wall_seconds * 1000:>9.1f} {r.cpu_seconds * 1000:>9.1f} {r.peak_kib:>10.1f}")
+
+    if args.json:
+        config = {k: getattr(args, k) for k in ("chunks", "chunk_bytes", "interval_ms", "jitter_ms", "trace", "repeat")}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "results": {r.name: r.to_dict() for r in results}}, f, indent=2)
+        print(f"\nSaved results to {args.json}.")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\nRegressions vs {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions vs {args.compare} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Directory-scale batch transcription with Chirp (Speech-to-Text V2).
+
+Per-file overhead is kept to the recognize call itself:
+
+- One `SpeechClient` (and so one gRPC channel) is shared by all worker threads.
+- The recognizer is resolved once per run, and its canonical name is cached on
+  disk with a TTL (`resolve_recognizer`), so repeated runs skip listing and
+  creating it.
+- Files are recognized concurrently on a thread pool. Only a bounded window of
+  them is in flight (and in memory) at a time.
+
+Each file produces one JSON line in the index, written as soon as the file is
+done. `--resume` skips files that already have a successful line, so an
+interrupted run can be continued.
+
+Input is a directory (searched recursively for audio files) or a manifest: a
+text file with one path per line, or JSONL with a "path" field.
+
+Usage:
+  uv run python -m experiments.chirp_batch recordings/ -o transcripts.jsonl --workers 8
+  uv run python -m experiments.chirp_batch manifest.txt -o transcripts.jsonl --resume
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from experiments.chirp_speech_recognition import (
+    DEFAULT_LOCATION,
+    RECOGNIZER_CACHE_TTL_SECONDS,
+    create_speech_client,
+    resolve_recognizer,
+)
+from experiments.rate_limit import QUOTA
+
+if TYPE_CHECKING:
+    from google.cloud import speech_v2
+
+AUDIO_EXTENSIONS = {".wav", ".flac", ".mp3", ".ogg", ".opus", ".m4a", ".webm"}
+DEFAULT_WORKERS = 8
+
+
+def iter_audio_paths(source: str) -> Iterator[str]:
+    """Audio files below a directory (sorted), or the paths listed in a manifest file."""
+    if os.path.isdir(source):
+        for found in sorted(Path(source).rglob("*")):
+            if found.suffix.lower() in AUDIO_EXTENSIONS and found.is_file():
+                yield str(found)
+        return
+
+    base = os.path.dirname(source)
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = str(json.loads(line)["path"]) if line.startswith("{") else line
+            yield path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def load_done(index_path: str) -> set[str]:
+    """Paths that already have a successful entry in the index."""
+    done: set[str] = set()
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A line cut off by an interrupted run
+                if entry.get("status") == "ok":
+                    done.add(entry["path"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def transcribe_file(client: speech_v2.SpeechClient, recognizer: str, path: str, *, words: bool = False) -> dict[str, Any]:
+    """Recognizes one file; returns its index entry (errors are recorded, not raised)."""
+    from google.cloud import speech_v2
+
+    started = time.perf_counter()
+    entry: dict[str, Any] = {"path": path, "status": "ok"}
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+        response = QUOTA.call_blocking("chirp", lambda: client.recognize(request=speech_v2.RecognizeRequest(recognizer=recognizer, content=content)))
+        alternatives = [r.alternatives[0] for r in response.results if r.alternatives]
+        entry["transcript"] = " ".join(a.transcript.strip() for a in alternatives if a.transcript.strip())
+        entry["confidence"] = round(min((a.confidence for a in alternatives), default=0.0), 4)
+        if words:
+            entry["words"] = [
+                [w.word, round(w.start_offset.total_seconds(), 3), round(w.end_offset.total_seconds(), 3)]
+                for a in alternatives
+                for w in a.words
+            ]
+    except Exception as e:  # noqa: BLE001 - one bad file must not stop the batch; it is reported in its entry
+        entry["status"] = "error"
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["seconds"] = round(time.perf_counter() - started, 3)
+    return entry
+
+
+def run_batch(paths: Iterator[str], index_path: str, *, project_id: str, location: str = DEFAULT_LOCATION, workers: int = DEFAULT_WORKERS, resume: bool = False, words: bool = False, ttl_seconds: float = RECOGNIZER_CACHE_TTL_SECONDS, refresh_recognizer: bool = False) -> tuple[int, int]:
+    """Transcribes every path into the JSONL index and returns (succeeded, failed)."""
+    client = create_speech_client(location)
+    setup_started = time.perf_counter()
+    recognizer = resolve_recognizer(client, project_id, location, ttl_seconds=ttl_seconds, refresh=refresh_recognizer)
+    print(f"Recognizer: {recognizer} (resolved in {(time.perf_counter() - setup_started) * 1000:.0f} ms)")
+
+    done = load_done(index_path) if resume else set()
+    if done:
+        print(f"Resuming: {len(done)} file(s) already transcribed.")
+
+    counts = {"ok": 0, "error": 0}
+    skipped = 0
+    started = time.perf_counter()
+    max_in_flight = max(1, workers) * 2
+
+    with open(index_path, "a" if resume else "w", encoding="utf-8") as index, ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        in_flight: set[Future[dict[str, Any]]] = set()
+
+        def collect(finished: set[Future[dict[str, Any]]]) -> None:
+            for future in finished:
+                entry = future.result()
+                index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                counts[entry["status"]] += 1
+                detail = f"{entry['seconds']:.2f}s" if entry["status"] == "ok" else entry["error"]
+                print(f"[{counts['ok'] + counts['error']}] {entry['path']}: {entry['status']} ({detail})")
+            index.flush()
+
+        for path in paths:
+            if path in done:
+                skipped += 1
+                continue
+            if len(in_flight) >= max_in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(finished)
+            in_flight.add(pool.submit(transcribe_file, client, recognizer, path, words=words))
+        collect(wait(in_flight).done)
+
+    elapsed = time.perf_counter() - started
+    total = counts["ok"] + counts["error"]
+    rate = f", {total / elapsed:.1f} files/s" if elapsed and total else ""
+    print(f"\nDone: {counts['ok']} ok, {counts['error']} failed, {skipped} skipped in {elapsed:.1f}s{rate}.")
+    print(f"Index: {index_path}")
+    return counts["ok"], counts["error"]
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Batch-transcribe a directory or manifest of audio files with Chirp into a JSONL index.")
+    parser.add_argument("source", help="Directory of audio files, or a manifest (one path per line, or JSONL with 'path')")
+    parser.add_argument("-o", "--output", default="transcripts.jsonl", help="JSONL index to write (default: transcripts.jsonl)")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help=f"Concurrent recognize calls (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--location", default=DEFAULT_LOCATION, help=f"Speech API region (default: {DEFAULT_LOCATION})")
+    parser.add_argument("--resume", action="store_true", help="Append to the index and skip files already transcribed successfully")
+    parser.add_argument("--words", action="store_true", help="Include word time offsets in the index")
+    parser.add_argument("--recognizer-ttl-hours", type=float, default=RECOGNIZER_CACHE_TTL_SECONDS / 3600, help="Reuse the cached recognizer name for this long (default: %(default)s)")
+    parser.add_argument("--refresh-recognizer", action="store_true", help="Ignore the cached recognizer name and resolve it again")
+    args = parser.parse_args()
+
+    project_id = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("VERTEXAI_PROJECT")
+    if not project_id:
+        raise SystemExit("Error: GOOGLE_CLOUD_PROJECT or VERTEXAI_PROJECT not set.")
+
+    try:
+        _, failed = run_batch(
+            iter_audio_paths(args.source),
+            args.output,
+            project_id=project_id,
+            location=args.location,
+            workers=args.workers,
+            resume=args.resume,
+            words=args.words,
+            ttl_seconds=args.recognizer_ttl_hours * 3600,
+            refresh_recognizer=args.refresh_recognizer,
+        )
+    except (OSError, ValueError, KeyError) as e:
+        raise SystemExit(f"Error: {e}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,59 @@
+import json
 import os
+import time
 import traceback
-from google.cloud import speech_v2
-from google.api_core.client_options import ClientOptions
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Any
 
-load_dotenv()
+from experiments.rate_limit import QUOTA
+
+if TYPE_CHECKING:
+    from google.cloud import speech_v2
+
+DEFAULT_LOCATION = "europe-west1"
+RECOGNIZER_ID = "chirp-recognizer-test"
+CHIRP_MODEL = "chirp_3"  # Or "chirp_2"
+
+# Canonical recognizer names, so that listing/creating the recognizer is not repeated on every run.
+RECOGNIZER_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "speak-to-me", "recognizers.json")
+RECOGNIZER_CACHE_TTL_SECONDS = 24 * 3600
+
+
+def create_speech_client(location: str = DEFAULT_LOCATION) -> "speech_v2.SpeechClient":
+    """speech_v2.SpeechClient on the regional endpoint (V2 generally requires it)."""
+    # Imported here so that importing this module stays cheap.
+    from google.api_core.client_options import ClientOptions
+    from google.cloud import speech_v2
 
-def transcribe_audio_chirp(audio_file_path: str, project_id: str, location: str = "europe-west1") -> None:
-    """
-    Transcribes audio using the Google Cloud Speech-to-Text V2 'Chirp' model.
-    """
-    # Initialize the client with the specific regional endpoint if necessary
-    # For V2, utilizing the regional endpoint is often required.
     client_options = ClientOptions(api_endpoint=f"{location}-speech.googleapis.com")
-    client = speech_v2.SpeechClient(client_options=client_options)
+    return speech_v2.SpeechClient(client_options=client_options)
 
-    # The content of the audio file to transcribe
-    try:
-        with open(audio_file_path, "rb") as f:
-            audio_content = f.read()
-    except FileNotFoundError:
-        print(f"Error: Audio file not found at {audio_file_path}")
-        return
+
+def recognition_config() -> "speech_v2.RecognitionConfig":
+    from google.cloud import speech_v2
 
     # Build the recognition config for Chirp
-    config = speech_v2.RecognitionConfig(
+    return speech_v2.RecognitionConfig(
         auto_decoding_config=speech_v2.AutoDetectDecodingConfig(),
         language_codes=["en-US"],
-        model="chirp_3", # Or "chirp_2"
+        model=CHIRP_MODEL,
         features=speech_v2.RecognitionFeatures(
             enable_word_time_offsets=True,
         ),
     )
 
+
+def ensure_recognizer(client: "speech_v2.SpeechClient", project_id: str, location: str = DEFAULT_LOCATION, recognizer_id: str = RECOGNIZER_ID) -> tuple[str, bool]:
+    """
+    Finds or creates the recognizer (several API round trips). Returns its name and
+    whether it is known to exist (False if both listing and creating failed).
+    """
+    from google.cloud import speech_v2
+
     parent = f"projects/{project_id}/locations/{location}"
-    recognizer_id = "chirp-recognizer-test"
     recognizer_name = f"{parent}/recognizers/{recognizer_id}"
-    
+
     print(f"Using parent: {parent}")
-    
+
     # List recognizers to verify existence/path
     try:
         print("Listing recognizers...")
@@ -48,6 +63,7 @@ def transcribe_audio_chirp(audio_file_path: str, project_id: str, location: str
             if r.name.endswith(f"/recognizers/{recognizer_id}"):
                 recognizer_name = r.name # Use the canonical name (with project number)
                 print(f"Found existing recognizer: {recognizer_name}")
+                return recognizer_name, True
     except Exception as e:
         print(f"Error listing recognizers: {e}")
 
@@ -59,7 +75,7 @@ def transcribe_audio_chirp(audio_file_path: str, project_id: str, location: str
             parent=parent,
             recognizer_id=recognizer_id,
             recognizer=speech_v2.Recognizer(
-                default_recognition_config=config,
+                default_recognition_config=recognition_config(),
                 model="chirp",
             ),
         )
@@ -73,6 +89,58 @@ def transcribe_audio_chirp(audio_file_path: str, project_id: str, location: str
         else:
              print(f"Error creating recognizer: {e}")
              # Fallback to wildcard if creation failed (though likely won't work if previous attempt failed)
+             return recognizer_name, False
+    return recognizer_name, True
+
+
+def resolve_recognizer(client: "speech_v2.SpeechClient", project_id: str, location: str = DEFAULT_LOCATION, *, ttl_seconds: float = RECOGNIZER_CACHE_TTL_SECONDS, refresh: bool = False) -> str:
+    """
+    Canonical recognizer name, from the local cache if it was resolved less than
+    `ttl_seconds` ago; otherwise via ensure_recognizer() (and cached for next time).
+    """
+    cache_key = f"{project_id}/{location}/{RECOGNIZER_ID}"
+    try:
+        with open(RECOGNIZER_CACHE_PATH, "r", encoding="utf-8") as f:
+            cached: dict[str, dict[str, Any]] = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+
+    entry = cached.get(cache_key)
+    if entry and not refresh and time.time() - entry["resolved_at"] < ttl_seconds:
+        return str(entry["name"])
+
+    name, exists = ensure_recognizer(client, project_id, location)
+    if not exists:
+        return name  # Do not cache a guess
+    cached[cache_key] = {"name": name, "resolved_at": time.time()}
+    try:
+        os.makedirs(os.path.dirname(RECOGNIZER_CACHE_PATH), exist_ok=True)
+        tmp = f"{RECOGNIZER_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cached, f)
+        os.replace(tmp, RECOGNIZER_CACHE_PATH)
+    except OSError as e:
+        print(f"Warning: could not cache recognizer name: {e}")
+    return name
+
+
+def transcribe_audio_chirp(audio_file_path: str, project_id: str, location: str = DEFAULT_LOCATION, client: "speech_v2.SpeechClient | None" = None) -> None:
+    """
+    Transcribes audio using the Google Cloud Speech-to-Text V2 'Chirp' model.
+    """
+    from google.cloud import speech_v2
+
+    client = client or create_speech_client(location)
+
+    # The content of the audio file to transcribe
+    try:
+        with open(audio_file_path, "rb") as f:
+            audio_content = f.read()
+    except FileNotFoundError:
+        print(f"Error: Audio file not found at {audio_file_path}")
+        return
+
+    recognizer_name = resolve_recognizer(client, project_id, location)
 
     request = speech_v2.RecognizeRequest(
         recognizer=recognizer_name, 
@@ -81,26 +149,50 @@ def transcribe_audio_chirp(audio_file_path: str, project_id: str, location: str
     )
 
     print("Sending request to Speech-to-Text V2 API (Chirp)...")
-    response = client.recognize(request=request)
+    response = QUOTA.call_blocking("chirp", lambda: client.recognize(request=request))
     
     for result in response.results:
         print("-" * 20)
         print(f"Transcript: {result.alternatives[0].transcript}")
         print(f"Confidence: {result.alternatives[0].confidence}")
 
-if __name__ == "__main__":
+
+def main() -> None:
+    import argparse
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Transcribe audio with Google Cloud Speech-to-Text V2 (Chirp).")
+    parser.add_argument("audio", nargs="?", default="standard_tts_output.wav", help="Audio file (default: standard_tts_output.wav)")
+    parser.add_argument("--location", default=DEFAULT_LOCATION, help=f"Speech API region (default: {DEFAULT_LOCATION})")
+    parser.add_argument("--stream", action="store_true", help="Streaming recognition: feed a 16-bit PCM WAV in chunks and print captions as they arrive")
+    parser.add_argument("--live", metavar="TEXT", help="Streaming recognition of Gemini Live API speech for TEXT, captioned while it is generated")
+    parser.add_argument("--realtime", action="store_true", help="Streaming mode: send the file at playback speed (captions in sync with playback)")
+    parser.add_argument("--chunk-bytes", type=int, default=16 * 1024, help="Streaming mode: audio bytes per request (default: 16384, max 25600)")
+    parser.add_argument("--words", action="store_true", help="Streaming mode: print word time offsets of final results")
+    parser.add_argument("--no-interim", action="store_true", help="Streaming mode: only print final results")
+    args = parser.parse_args()
+
+    project_id = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("VERTEXAI_PROJECT")
+    if not project_id:
+        print("Error: GOOGLE_CLOUD_PROJECT or VERTEXAI_PROJECT not set.")
+        return
+
     try:
-        project_id = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("VERTEXAI_PROJECT")
-        
-        if not project_id:
-            print("Error: GOOGLE_CLOUD_PROJECT or VERTEXAI_PROJECT not set.")
+        if args.stream or args.live:
+            from experiments.chirp_streaming import run_streaming_cli
+
+            run_streaming_cli(args, project_id)
+        elif not os.path.exists(args.audio):
+            # Default input: the valid audio file generated by the TTS experiment
+            print(f"Warning: {args.audio} not found. Run experiments/standard_tts.py first.")
         else:
-            # Use the valid audio file generated by the TTS experiment
-            audio_path = "standard_tts_output.wav" 
-            # Create a dummy file if it doesn't exist just to test the client init
-            if not os.path.exists(audio_path):
-                print(f"Warning: {audio_path} not found. Run experiments/standard_tts.py first.")
-            else:
-                transcribe_audio_chirp(audio_path, project_id)
+            transcribe_audio_chirp(args.audio, project_id, args.location)
     except Exception:
         traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
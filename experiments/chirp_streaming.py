@@ -0,0 +1,256 @@
+"""Streaming recognition with Google Cloud Speech-to-Text V2 (Chirp).
+
+`streaming_transcribe` feeds 16-bit PCM audio from any iterable of byte chunks
+(a WAV file read piece by piece, or live audio such as Gemini Live API output)
+to `streaming_recognize` in fixed-size requests. It yields interim and final
+results, with word offsets, as they arrive. Memory stays constant whatever the
+length of the input.
+
+A single streaming call is limited to a few minutes of audio, so long inputs
+are split into consecutive streams of `max_stream_seconds`. Offsets are shifted
+so that they are always relative to the start of the whole input.
+
+The requests use the implicit `_` recognizer with an inline config, so no
+recognizer has to be listed or created first.
+
+The command line converts its input to 16 kHz mono (`CHIRP_PCM_FORMAT`, the
+rate speech recognition is tuned for) with a streaming resampler, so 24 kHz
+Gemini output or stereo recordings are sent without an offline conversion.
+
+Usage:
+  uv run experiments/chirp_speech_recognition.py --stream recording.wav
+  uv run experiments/chirp_speech_recognition.py --stream --realtime --words recording.wav
+  uv run experiments/chirp_speech_recognition.py --live "Captions while the Live API speaks."
+"""
+
+from __future__ import annotations
+
+import argparse
+import queue
+import threading
+import time
+import wave
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from experiments.chirp_speech_recognition import (
+    CHIRP_MODEL,
+    DEFAULT_LOCATION,
+    create_speech_client,
+)
+from experiments.pcm_audio import PcmFormat
+
+if TYPE_CHECKING:
+    from google.cloud import speech_v2
+
+DEFAULT_CHUNK_BYTES = 16 * 1024
+MAX_CHUNK_BYTES = 25_600  # Per-request audio limit of the streaming API
+DEFAULT_MAX_STREAM_SECONDS = 240.0  # Well below the per-stream duration limit
+CHIRP_PCM_FORMAT = PcmFormat(sample_rate_hz=16000)
+
+
+@dataclass
+class WordTiming:
+    word: str
+    start_seconds: float
+    end_seconds: float
+
+
+@dataclass
+class StreamingTranscript:
+    text: str
+    is_final: bool
+    stability: float
+    end_seconds: float  # Audio time (from the start of the input) this result covers
+    words: list[WordTiming] = field(default_factory=list)
+
+
+def rechunk(chunks: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """Regroups arbitrary byte chunks into pieces of exactly `size` bytes (the last one may be shorter)."""
+    pending = bytearray()
+    for chunk in chunks:
+        pending += chunk
+        while len(pending) >= size:
+            yield bytes(pending[:size])
+            del pending[:size]
+    if pending:
+        yield bytes(pending)
+
+
+def iter_wav_chunks(path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> tuple[PcmFormat, Iterator[bytes]]:
+    """Opens a 16-bit PCM WAV file and returns its format and a lazy iterator over its audio."""
+    wav = wave.open(path, "rb")  # noqa: SIM115 - closed by the returned iterator
+    if wav.getsampwidth() != 2:
+        wav.close()
+        raise ValueError(f"{path}: streaming mode needs 16-bit PCM WAV, got {wav.getsampwidth() * 8}-bit")
+    fmt = PcmFormat(wav.getframerate(), wav.getnchannels())
+    frames = max(1, chunk_bytes // (fmt.channels * fmt.sample_width_bytes))
+
+    def chunks() -> Iterator[bytes]:
+        with wav:
+            while data := wav.readframes(frames):
+                yield data
+
+    return fmt, chunks()
+
+
+def paced(chunks: Iterable[bytes], fmt: PcmFormat) -> Iterator[bytes]:
+    """Releases chunks no faster than real time (for captions in sync with playback)."""
+    started = time.monotonic()
+    sent = 0
+    for chunk in chunks:
+        delay = started + sent / fmt.bytes_per_second - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        yield chunk
+        sent += len(chunk)
+
+
+def _streaming_config(fmt: PcmFormat, interim_results: bool) -> Any:
+    from google.cloud import speech_v2
+
+    return speech_v2.StreamingRecognitionConfig(
+        config=speech_v2.RecognitionConfig(
+            explicit_decoding_config=speech_v2.ExplicitDecodingConfig(
+                encoding=speech_v2.ExplicitDecodingConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=fmt.sample_rate_hz,
+                audio_channel_count=fmt.channels,
+            ),
+            language_codes=["en-US"],
+            model=CHIRP_MODEL,
+            features=speech_v2.RecognitionFeatures(enable_word_time_offsets=True),
+        ),
+        streaming_features=speech_v2.StreamingRecognitionFeatures(interim_results=interim_results),
+    )
+
+
+def _to_transcript(result: Any, offset: float) -> StreamingTranscript | None:
+    if not result.alternatives:
+        return None
+    best = result.alternatives[0]
+    words = [WordTiming(w.word, offset + w.start_offset.total_seconds(), offset + w.end_offset.total_seconds()) for w in best.words]
+    return StreamingTranscript(
+        text=best.transcript,
+        is_final=result.is_final,
+        stability=result.stability,
+        end_seconds=offset + result.result_end_offset.total_seconds(),
+        words=words,
+    )
+
+
+def streaming_transcribe(
+    client: speech_v2.SpeechClient,
+    project_id: str,
+    chunks: Iterable[bytes],
+    fmt: PcmFormat,
+    *,
+    location: str = DEFAULT_LOCATION,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    interim_results: bool = True,
+    max_stream_seconds: float = DEFAULT_MAX_STREAM_SECONDS,
+) -> Iterator[StreamingTranscript]:
+    """Streams `chunks` (raw PCM in `fmt`) through Chirp and yields results as they arrive."""
+    from google.cloud import speech_v2
+
+    recognizer = f"projects/{project_id}/locations/{location}/recognizers/_"
+    config_request = speech_v2.StreamingRecognizeRequest(recognizer=recognizer, streaming_config=_streaming_config(fmt, interim_results))
+    frame = fmt.channels * fmt.sample_width_bytes
+    size = max(frame, min(chunk_bytes, MAX_CHUNK_BYTES) // frame * frame)
+    stream_budget = int(max_stream_seconds * fmt.bytes_per_second)
+
+    source = rechunk(chunks, size)
+    offset = 0.0
+    while (first := next(source, None)) is not None:
+        sent = 0
+
+        def requests(first: bytes = first) -> Iterator[Any]:
+            nonlocal sent
+            yield config_request
+            chunk: bytes | None = first
+            while chunk is not None:
+                yield speech_v2.StreamingRecognizeRequest(audio=chunk)
+                sent += len(chunk)
+                if sent >= stream_budget:
+                    return  # Close this stream; the next one continues where it stopped
+                chunk = next(source, None)
+
+        for response in client.streaming_recognize(requests=requests()):
+            for result in response.results:
+                transcript = _to_transcript(result, offset)
+                if transcript:
+                    yield transcript
+        offset += sent / fmt.bytes_per_second
+
+
+def _clock(seconds: float) -> str:
+    return f"{int(seconds // 60):02d}:{seconds % 60:04.1f}"
+
+
+def print_captions(transcripts: Iterable[StreamingTranscript], *, words: bool = False) -> None:
+    """Prints interim results on a single, rewritten line and final results with their timestamps."""
+    width = 0
+    for t in transcripts:
+        if not t.is_final:
+            line = f"  … {t.text}"
+            print(f"\r{line:<{width}}", end="", flush=True)
+            width = len(line)
+            continue
+        print(f"\r{' ' * width}\r[{_clock(t.words[0].start_seconds if t.words else t.end_seconds)}] {t.text.strip()}")
+        width = 0
+        if words:
+            print("    " + " ".join(f"{w.word}@{w.start_seconds:.2f}-{w.end_seconds:.2f}" for w in t.words))
+    if width:
+        print()
+
+
+def _live_pcm(text: str) -> Iterator[bytes]:
+    """Synthesizes `text` with the Gemini Live API on a background thread and yields its PCM as it arrives."""
+    import asyncio
+
+    from experiments.gemini_live_audio import create_client, stream_live_audio
+
+    chunks: queue.Queue[bytes | Exception | None] = queue.Queue()
+
+    async def produce() -> None:
+        async for chunk in stream_live_audio(create_client(), text, verbose=False):
+            chunks.put(chunk)
+
+    def run() -> None:
+        try:
+            asyncio.run(produce())
+        except Exception as e:  # noqa: BLE001 - re-raised by the consuming thread
+            chunks.put(e)
+        finally:
+            chunks.put(None)
+
+    threading.Thread(target=run, daemon=True).start()
+    while (item := chunks.get()) is not None:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def run_streaming_cli(args: argparse.Namespace, project_id: str) -> None:
+    from experiments.pcm_audio import GEMINI_PCM_FORMAT
+
+    if args.live:
+        fmt, chunks = GEMINI_PCM_FORMAT, _live_pcm(args.live)
+        print("Captioning Gemini Live API speech...")
+    else:
+        fmt, chunks = iter_wav_chunks(args.audio, args.chunk_bytes)
+        if args.realtime:
+            chunks = paced(chunks, fmt)
+        print(f"Streaming {args.audio} ({fmt.sample_rate_hz} Hz, {fmt.channels}ch) to Chirp...")
+
+    # Higher rates only add upload volume; lower ones are sent as they are.
+    target = PcmFormat(min(fmt.sample_rate_hz, CHIRP_PCM_FORMAT.sample_rate_hz), CHIRP_PCM_FORMAT.channels)
+    if target != fmt:
+        from experiments.resample import resample_chunks
+
+        print(f"Converting {fmt.sample_rate_hz} Hz/{fmt.channels}ch to {target.sample_rate_hz} Hz/{target.channels}ch on the fly.")
+        fmt, chunks = target, resample_chunks(chunks, fmt, target)
+
+    client = create_speech_client(args.location)
+    transcripts = streaming_transcribe(client, project_id, chunks, fmt, location=args.location, chunk_bytes=args.chunk_bytes, interim_results=not args.no_interim)
+    print_captions(transcripts, words=args.words)
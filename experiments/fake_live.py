@@ -0,0 +1,130 @@
+"""Local stand-ins for the Gemini APIs, for offline benchmarks and tests.
+
+`FakeLiveClient` mimics `client.aio.live.connect(...)`: each session answers
+`send_realtime_input` with real `types.LiveServerMessage` objects carrying audio
+chunks, paced either synthetically (`ChunkTiming`) or by a trace recorded from
+a real session (`speak --trace trace.json`, see `load_trace`).
+
+`fake_generate_content_response` builds a GenerateContent response with any
+number of inline audio parts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any
+
+from google.genai import types
+
+AUDIO_MIME = "audio/pcm;rate=24000"
+
+
+@dataclass(frozen=True)
+class ChunkTiming:
+    chunks: int = 200
+    chunk_bytes: int = 9600  # 200 ms at 24kHz mono PCM16
+    interval_s: float = 0.0
+    jitter_s: float = 0.0
+    first_chunk_delay_s: float = 0.0
+    connect_delay_s: float = 0.0
+    seed: int = 0
+
+    def arrivals(self) -> list[tuple[float, int]]:
+        """(seconds after send, chunk bytes) for every chunk."""
+        rng = random.Random(self.seed)
+        t = self.first_chunk_delay_s
+        result = []
+        for i in range(self.chunks):
+            if i:
+                t += max(0.0, self.interval_s + rng.uniform(-self.jitter_s, self.jitter_s))
+            result.append((t, self.chunk_bytes))
+        return result
+
+
+def load_trace(path: str) -> list[tuple[float, int]]:
+    """Reads a trace written by `MetricsRecorder.write_trace` ({"arrivals": [[seconds, bytes], ...]})."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [(float(t), int(n)) for t, n in data["arrivals"]]
+
+
+def audio_message(payload: bytes) -> types.LiveServerMessage:
+    return types.LiveServerMessage(
+        server_content=types.LiveServerContent(
+            model_turn=types.Content(parts=[types.Part(inline_data=types.Blob(mime_type=AUDIO_MIME, data=payload))])
+        )
+    )
+
+
+TURN_COMPLETE = types.LiveServerMessage(server_content=types.LiveServerContent(turn_complete=True))
+
+
+class FakeLiveSession:
+    def __init__(self, arrivals: list[tuple[float, int]]) -> None:
+        self._arrivals = arrivals
+        # Messages are built up front so benchmarks measure our pipeline, not pydantic.
+        payloads: dict[int, types.LiveServerMessage] = {}
+        self._messages = [payloads.setdefault(n, audio_message(bytes(n))) for _, n in arrivals]
+        self.sent: list[str] = []
+
+    async def send_realtime_input(self, *, text: str | None = None, **kwargs: Any) -> None:
+        self.sent.append(text or "")
+
+    async def receive(self) -> AsyncIterator[types.LiveServerMessage]:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for i, ((offset, _), message) in enumerate(zip(self._arrivals, self._messages)):
+            delay = start + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif i % 32 == 0:
+                await asyncio.sleep(0)  # A real socket read yields to the loop now and then
+            yield message
+        yield TURN_COMPLETE
+
+
+class FakeLiveClient:
+    """Duck-types `genai.Client` for `client.aio.live.connect(model=..., config=...)`."""
+
+    def __init__(self, arrivals: list[tuple[float, int]] | None = None, connect_delay_s: float = 0.0) -> None:
+        self.arrivals = arrivals if arrivals is not None else ChunkTiming().arrivals()
+        self.connect_delay_s = connect_delay_s
+        self.sessions: list[FakeLiveSession] = []
+        self.aio = SimpleNamespace(live=SimpleNamespace(connect=self.connect))
+
+    @classmethod
+    def from_timing(cls, timing: ChunkTiming) -> FakeLiveClient:
+        return cls(timing.arrivals(), timing.connect_delay_s)
+
+    @asynccontextmanager
+    async def connect(self, *, model: str, config: Any = None) -> AsyncIterator[FakeLiveSession]:
+        if self.connect_delay_s:
+            await asyncio.sleep(self.connect_delay_s)
+        session = FakeLiveSession(self.arrivals)
+        self.sessions.append(session)
+        yield session
+
+
+def fake_generate_content_response(parts: int, part_bytes: int) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.Content(
+                    role="model",
+                    parts=[types.Part(inline_data=types.Blob(mime_type="audio/L16;codec=pcm;rate=24000", data=bytes(part_bytes))) for _ in range(parts)],
+                )
+            )
+        ]
+    )
+
+
+def iter_chunks(timing: ChunkTiming) -> Iterator[bytes]:
+    payload = bytes(timing.chunk_bytes)
+    for _ in range(timing.chunks):
+        yield payload
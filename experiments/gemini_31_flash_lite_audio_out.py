@@ -21,56 +21,17 @@ from __future__ import annotations
 
 import argparse
 import os
-from typing import Iterable
 
-from google import genai
-from google.genai import types
+from experiments.genai_response import extract_audio_bytes
+from experiments.startup_profile import FLAG as STARTUP_PROFILE_FLAG, HELP as STARTUP_PROFILE_HELP, profile_if_requested
+
+# google.genai is imported where it is used, so --help and argument errors stay fast.
 
 
 DEFAULT_MODEL = "gemini-3.1-flash-lite-preview"
 DEFAULT_OUTPUT = "gemini_31_flash_lite_output.wav"
 
 
-def _iter_parts(response: object) -> Iterable[types.Part]:
-    """Best-effort iteration over parts across candidates."""
-    if not hasattr(response, "candidates"):
-        return []
-
-    parts: list[types.Part] = []
-    # google-genai response types are dynamic-ish; keep this defensive.
-    for cand in getattr(response, "candidates", []) or []:
-        content = getattr(cand, "content", None)
-        if not content:
-            continue
-        for part in getattr(content, "parts", []) or []:
-            parts.append(part)
-    return parts
-
-
-def _extract_audio_bytes(response: object) -> tuple[bytes | None, str | None]:
-    """Extract (audio_bytes, mime_type) from a generate_content response."""
-
-    # Some SDK responses may surface a top-level `response.audio.data`.
-    audio_obj = getattr(response, "audio", None)
-    if audio_obj is not None:
-        data = getattr(audio_obj, "data", None)
-        mime = getattr(audio_obj, "mime_type", None)
-        if data:
-            return data, mime
-
-    # Otherwise, scan parts for inline_data with audio/* mime.
-    for part in _iter_parts(response):
-        inline = getattr(part, "inline_data", None)
-        if not inline:
-            continue
-        mime_type = getattr(inline, "mime_type", None)
-        data = getattr(inline, "data", None)
-        if mime_type and isinstance(mime_type, str) and mime_type.startswith("audio") and data:
-            return data, mime_type
-
-    return None, None
-
-
 def generate_audio(
     *,
     text: str,
@@ -84,6 +45,9 @@ def generate_audio(
     if not api_key:
         raise SystemExit("Error: GEMINI_API_KEY environment variable is not set.")
 
+    from google import genai
+    from google.genai import types
+
     client = genai.Client(api_key=api_key, http_options={"api_version": api_version})
 
     # We keep this configurable because different endpoints have historically had
@@ -126,7 +90,7 @@ def generate_audio(
         print(str(e))
         raise
 
-    audio_bytes, mime_type = _extract_audio_bytes(response)
+    audio_bytes, mime_type = extract_audio_bytes(response)
     if not audio_bytes:
         print("No audio bytes found in response.")
         # Helpful breadcrumbs for debugging without dumping huge objects.
@@ -144,6 +108,8 @@ def generate_audio(
 
 
 def main() -> None:
+    profile_if_requested("experiments.gemini_31_flash_lite_audio_out:main")
+
     parser = argparse.ArgumentParser(
         description="Text to audio using gemini-3.1-flash-lite-preview (audio output modality probe)."
     )
@@ -173,6 +139,7 @@ def main() -> None:
         default="modalities",
         help="How to request audio output.",
     )
+    parser.add_argument(STARTUP_PROFILE_FLAG, action="store_true", help=STARTUP_PROFILE_HELP)
 
     args = parser.parse_args()
 
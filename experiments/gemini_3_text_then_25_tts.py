@@ -11,11 +11,18 @@ this script does a 2-step pipeline:
 
 Output details
 - The TTS model returns raw PCM16 (commonly mime_type
-  `audio/L16;codec=pcm;rate=24000`). This script wraps it in a WAV container.
+  `audio/L16;codec=pcm;rate=24000`). This script wraps it in a WAV container, or
+  encodes it with another codec (--format flac|ogg|mulaw, see experiments/audio_codecs.py).
+- The TTS response is streamed (`generate_content_stream`): audio is written, and
+  played with --play, as it arrives, and every audio part is kept
+  (see experiments/genai_response.py).
 
 Verification (optional)
-- As a sanity check, the script can transcribe the resulting WAV using a Gemini 3.1 model
-  that supports audio *input* (text output), and print the transcript.
+- As a sanity check, the script can transcribe the generated audio using a Gemini 3.1 model
+  that supports audio *input* (text output) and score the transcript against the intended
+  text as word error rate (see experiments/verification.py). It runs in the background, so
+  the WAV is written without waiting for it; batch and streaming runs can sample a fraction
+  of their outputs (--verify-sample).
 
 Examples
   uv run experiments/gemini_3_text_then_25_tts.py \
@@ -23,6 +30,9 @@ Examples
     -o out.wav \
     --verify
 
+  # Batch mode: one WAV per row of a JSONL/CSV file, plus out/manifest.jsonl (see experiments/tts_batch.py)
+  uv run experiments/gemini_3_text_then_25_tts.py --batch prompts.jsonl --out-dir out/ --workers 8 --rpm 120
+
 Requires:
 - GEMINI_API_KEY (or GOOGLE_API_KEY) in env.
 """
@@ -31,13 +41,23 @@ from __future__ import annotations
 
 import argparse
 import os
-import re
-import wave
-from dataclasses import dataclass
-from typing import Iterable
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING
+
+from experiments.audio_cache import AudioCache, cache_key
+from experiments.audio_codecs import CODECS, DEFAULT_FORMAT, get_codec, output_path_for
+from experiments.genai_response import extract_audio_bytes, extract_text, stream_audio
+from experiments.pcm_audio import PcmFormat, parse_pcm_format_from_mime
+from experiments.rate_limit import QUOTA, QuotaLimiter
+from experiments.single_flight import SingleFlight
+from experiments.startup_profile import FLAG as STARTUP_PROFILE_FLAG
+from experiments.startup_profile import HELP as STARTUP_PROFILE_HELP
+from experiments.startup_profile import profile_if_requested
 
-from google import genai
-from google.genai import types
+# google.genai is imported where it is used, so --help and argument errors stay fast.
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
 
 
 DEFAULT_TEXT_MODEL = "gemini-3-flash-preview"
@@ -46,121 +66,195 @@ DEFAULT_VERIFY_MODEL = "gemini-3.1-flash-lite-preview"
 DEFAULT_VOICE = "Puck"
 DEFAULT_OUT = "gemini_3_text_then_25_tts.wav"
 
+# Empirical behavior: the TTS preview model sometimes errors if given only the transcript
+# (complaining it "tried to generate text"). A small wrapper prompt nudges it into TTS mode.
+# We keep the wrapper *minimal* to reduce the risk of it being spoken.
+TTS_TRANSCRIPT_PREFIX = "Transcript:\n"
+TTS_FLIGHTS = SingleFlight()  # Identical concurrent TTS requests share one model call
+
 
 def _get_api_key() -> str | None:
     return os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")
 
 
-def _iter_parts(response: object) -> Iterable[types.Part]:
-    if not hasattr(response, "candidates"):
-        return []
-
-    parts: list[types.Part] = []
-    for cand in getattr(response, "candidates", []) or []:
-        content = getattr(cand, "content", None)
-        if not content:
-            continue
-        for part in getattr(content, "parts", []) or []:
-            parts.append(part)
-    return parts
-
-
-def _extract_text(response: object) -> str:
-    # The SDK often provides response.text
-    t = getattr(response, "text", None)
-    if isinstance(t, str) and t.strip():
-        return t
-
-    # Fall back to concatenating text parts.
-    chunks: list[str] = []
-    for part in _iter_parts(response):
-        txt = getattr(part, "text", None)
-        if isinstance(txt, str) and txt:
-            chunks.append(txt)
-
-    text = "".join(chunks).strip()
-    if not text:
-        raise RuntimeError("No text found in response")
-    return text
+def _text_config() -> types.GenerateContentConfig:
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        system_instruction=(
+            "You will produce the exact text that will be spoken by a TTS engine. "
+            "Return plain text only. Keep it concise. Avoid markdown, lists, JSON, or code blocks."
+        ),
+        temperature=0.4,
+    )
+
 
+def _tts_config(voice: str) -> types.GenerateContentConfig:
+    from google.genai import types
 
-def _extract_audio_bytes(response: object) -> tuple[bytes | None, str | None]:
-    # Some shapes expose response.audio.data
-    audio_obj = getattr(response, "audio", None)
-    if audio_obj is not None:
-        data = getattr(audio_obj, "data", None)
-        mime = getattr(audio_obj, "mime_type", None)
-        if data:
-            return data, mime
-
-    # Otherwise inline_data in parts
-    for part in _iter_parts(response):
-        inline = getattr(part, "inline_data", None)
-        if not inline:
-            continue
-        mime_type = getattr(inline, "mime_type", None)
-        data = getattr(inline, "data", None)
-        if mime_type and isinstance(mime_type, str) and mime_type.startswith("audio") and data:
-            return data, mime_type
-
-    return None, None
-
-
-@dataclass(frozen=True)
-class PcmFormat:
-    sample_rate_hz: int
-    channels: int = 1
-    sample_width_bytes: int = 2  # PCM16
-
-
-def _parse_pcm_format_from_mime(mime_type: str | None, *, default_rate: int = 24000) -> PcmFormat:
-    # Example: audio/L16;codec=pcm;rate=24000
-    if not mime_type:
-        return PcmFormat(sample_rate_hz=default_rate)
-
-    m = re.search(r"rate=(\d+)", mime_type)
-    if m:
-        return PcmFormat(sample_rate_hz=int(m.group(1)))
-
-    return PcmFormat(sample_rate_hz=default_rate)
-
-
-def _write_wav_pcm16(path: str, pcm16: bytes, fmt: PcmFormat) -> None:
-    with wave.open(path, "wb") as wf:
-        wf.setnchannels(fmt.channels)
-        wf.setsampwidth(fmt.sample_width_bytes)
-        wf.setframerate(fmt.sample_rate_hz)
-        wf.writeframes(pcm16)
-
-
-def _transcribe_wav(client: genai.Client, *, model: str, wav_path: str) -> str:
-    with open(wav_path, "rb") as f:
-        wav_bytes = f.read()
-
-    # Provide the audio as inline data + a transcription instruction.
-    # (This is purely for verification and doesn't need to be perfect.)
-    resp = client.models.generate_content(
-        model=model,
-        contents=[
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part(inline_data=types.Blob(mime_type="audio/wav", data=wav_bytes)),
-                    types.Part(text="Transcribe this audio exactly. Output plain text only."),
-                ],
+    return types.GenerateContentConfig(
+        response_modalities=["AUDIO"],
+        speech_config=types.SpeechConfig(
+            voice_config=types.VoiceConfig(
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=voice)
             )
-        ],
-        config=types.GenerateContentConfig(temperature=0),
+        ),
     )
 
-    return _extract_text(resp)
+
+def _clip_text(text: str, max_chars: int) -> str:
+    text = text.strip()
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars].rstrip() + "…"
+    return text
+
+
+async def _synthesize_async(client: genai.Client, *, model: str, voice: str, text: str, cache: AudioCache | None, limiter: QuotaLimiter | None = None) -> tuple[bytes, PcmFormat, bool]:
+    """
+    TTS for one text via the async client, through the cache. Returns (pcm, format, cache_hit).
+    The model call goes through `limiter` (default: the shared `QUOTA`), which rate limits and retries it;
+    concurrent calls for the same text, voice and model make that call only once.
+    """
+    import asyncio
+
+    key = cache_key(model_id=model, voice_name=voice, system_instruction=TTS_TRANSCRIPT_PREFIX, text=text)
+    cached = await asyncio.to_thread(cache.get, key) if cache else None
+    if cached:
+        return cached[0], cached[1], True
+
+    async def request() -> tuple[bytes, PcmFormat]:
+        resp = await (limiter or QUOTA).call(model, lambda: client.aio.models.generate_content(model=model, contents=f"{TTS_TRANSCRIPT_PREFIX}{text}", config=_tts_config(voice)))
+        audio_bytes, mime_type = extract_audio_bytes(resp)
+        if not audio_bytes:
+            raise RuntimeError("No audio bytes found in TTS response")
+        fmt = parse_pcm_format_from_mime(mime_type)
+        if cache:
+            await asyncio.to_thread(cache.put, key, audio_bytes, fmt, model_id=model, voice_name=voice)
+        return audio_bytes, fmt
+
+    # Identical requests in flight at the same time share one model call (and one rate-limit token).
+    audio_bytes, fmt = await TTS_FLIGHTS.call((id(client), key), request)
+    return audio_bytes, fmt, False
+
+
+async def stream_tts_async(client: genai.Client, *, model: str, voice: str, text: str, cache: AudioCache | None, limiter: QuotaLimiter | None = None, coalesce: bool = True) -> AsyncIterator[tuple[bytes, PcmFormat, bool]]:
+    """
+    Streaming TTS for one text: yields (pcm, format, cache_hit) chunks as the model produces them,
+    so playback and encoding start before the whole clip exists. A cache hit is yielded as one chunk,
+    and a complete stream is cached. Concurrent calls for the same text, voice and model share one stream.
+    `limiter` (default: the shared `QUOTA`) rate limits the request and retries it until audio arrives.
+    `coalesce=False` gives the call its own stream, for callers that coalesce requests themselves.
+    """
+    import asyncio
+
+    key = cache_key(model_id=model, voice_name=voice, system_instruction=TTS_TRANSCRIPT_PREFIX, text=text)
+    cached = await asyncio.to_thread(cache.get, key) if cache else None
+    if cached:
+        yield cached[0], cached[1], True
+        return
+
+    async def audio() -> AsyncIterator[tuple[bytes, str | None]]:
+        responses = await client.aio.models.generate_content_stream(model=model, contents=f"{TTS_TRANSCRIPT_PREFIX}{text}", config=_tts_config(voice))
+        async for item in stream_audio(responses):
+            yield item
+
+    async def request() -> AsyncIterator[tuple[bytes, PcmFormat, bool]]:
+        chunks: list[bytes] = []
+        fmt: PcmFormat | None = None
+        async for data, mime_type in (limiter or QUOTA).stream(model, audio):
+            chunk_fmt = parse_pcm_format_from_mime(mime_type)
+            if fmt is None:
+                fmt = chunk_fmt
+            elif chunk_fmt != fmt:
+                raise RuntimeError(f"TTS stream switched from {fmt} to {chunk_fmt}")
+            chunks.append(data)
+            yield data, fmt, False
+        if fmt is None:
+            raise RuntimeError("No audio bytes found in TTS response")
+        if cache:
+            await asyncio.to_thread(cache.put, key, b"".join(chunks), fmt, model_id=model, voice_name=voice)
+
+    async for item in TTS_FLIGHTS.stream(("stream", id(client), key), request) if coalesce else request():
+        yield item
+
+
+async def _speak_text(client: genai.Client, args: argparse.Namespace, text: str, cache: AudioCache | None) -> tuple[bytes, bytes, PcmFormat, bool]:
+    """
+    Single-run TTS step: streams the audio into the output file (and player) as it arrives.
+    Returns (model audio, delivered audio, format, cache_hit); they differ only with --postprocess.
+    """
+    from experiments.audio_codecs import AudioWriter, open_audio_writer
+    from experiments.gemini_live_audio import open_player
+    from experiments.playback import JitterBufferPlayer
+    from experiments.postprocess import AudioPostProcessor
+    from experiments.wav_stream import OffloopWriter
+
+    writer = OffloopWriter()
+    wav: AudioWriter | None = None
+    player: JitterBufferPlayer | None = None
+    processor: AudioPostProcessor | None = None
+    received: list[bytes] = []
+    delivered: list[bytes] = []
+    fmt: PcmFormat | None = None
+    cached = False
+
+    async def deliver(audio: bytes) -> None:
+        if not audio:
+            return
+        delivered.append(audio)
+        if wav:
+            await writer.submit(wav.write, audio)
+        if player:
+            await player.write(audio)
+
+    complete = False
+    try:
+        async for pcm, fmt, cached in stream_tts_async(client, model=args.tts_model, voice=args.voice, text=text, cache=cache):
+            if wav is None:
+                wav = open_audio_writer(args.output, fmt, args.format)
+                if args.play:
+                    player = open_player(fmt, args.prebuffer_ms / 1000)
+                if args.postprocess:
+                    processor = AudioPostProcessor(fmt)
+            received.append(pcm)
+            await deliver(processor.process(pcm) if processor else pcm)
+        if processor:
+            await deliver(processor.flush())
+        complete = True
+    finally:
+        try:
+            if wav:
+                await writer.submit(wav.close)
+        finally:
+            await writer.close()
+        if player:
+            if complete:
+                await player.finish()
+            else:
+                player.close()
+    assert fmt is not None and wav is not None
+    print(wav.stats().summary_line())
+    if processor:
+        print(processor.stats_line())
+    audio = b"".join(received)
+    return audio, b"".join(delivered) if processor else audio, fmt, cached
 
 
 def main() -> None:
+    profile_if_requested("experiments.gemini_3_text_then_25_tts:main")
+
     p = argparse.ArgumentParser(description="Gemini 3 text -> Gemini 2.5 TTS (GenerateContent) -> WAV")
 
-    p.add_argument("-p", "--prompt", required=True, help="Prompt for Gemini 3 to generate the text that will be spoken")
-    p.add_argument("-o", "--output", default=DEFAULT_OUT, help="Output WAV path")
+    source = p.add_mutually_exclusive_group(required=True)
+    source.add_argument("-p", "--prompt", help="Prompt for Gemini 3 to generate the text that will be spoken")
+    source.add_argument("-b", "--batch", metavar="FILE", help="Batch mode: read prompts from a JSONL or CSV file (field 'prompt', optional 'id' and 'voice')")
+    p.add_argument("-o", "--output", default=DEFAULT_OUT, help="Output audio path (default: gemini_3_text_then_25_tts.<format extension>)")
+    p.add_argument("--format", choices=list(CODECS), default=DEFAULT_FORMAT, help="Output codec: wav, flac (lossless), ogg or mulaw (lossy) (default: %(default)s)")
+
+    p.add_argument("--out-dir", default="tts_batch", help="Batch mode: directory for the audio files and manifest.jsonl (default: tts_batch)")
+    p.add_argument("--manifest", help="Batch mode: results manifest path (default: <out-dir>/manifest.jsonl)")
+    p.add_argument("--workers", type=int, default=4, help="Batch mode: prompts processed concurrently (default: 4)")
+    p.add_argument("--rpm", type=int, default=60, help="Batch mode: max model requests per minute, all stages combined; 0 disables (default: 60)")
 
     p.add_argument("--text-model", default=DEFAULT_TEXT_MODEL, help=f"Model for text generation (default: {DEFAULT_TEXT_MODEL})")
     p.add_argument("--tts-model", default=DEFAULT_TTS_MODEL, help=f"Model for TTS (default: {DEFAULT_TTS_MODEL})")
@@ -179,78 +273,178 @@ def main() -> None:
         help="Safety limit: truncate spoken text to this many characters (default: 800). Set 0 to disable.",
     )
 
-    p.add_argument("--verify", action="store_true", help="After writing WAV, transcribe it with a Gemini model and print transcript")
-    p.add_argument("--verify-model", default=DEFAULT_VERIFY_MODEL, help=f"Model used to transcribe the WAV (default: {DEFAULT_VERIFY_MODEL})")
+    p.add_argument("--no-cache", action="store_true", help="Bypass the on-disk audio cache for the TTS step")
+    p.add_argument("--postprocess", action="store_true", help="Trim silence and normalize loudness before writing (streaming mode: also crossfade the sentences)")
+    p.add_argument("--archive", nargs="?", const="", metavar="DIR", help="Record the exchange (prompt, spoken text, audio) in the session archive (default DIR: $SPEAK_ARCHIVE_DIR); not with --stream or --batch")
+    p.add_argument("--session", default=os.environ.get("SPEAK_SESSION"), help="Archive session id (default: $SPEAK_SESSION, or a new id per run)")
+
+    p.add_argument("--verify", action="store_true", help="Transcribe the audio in the background and report its word error rate against the intended text")
+    p.add_argument("--verify-model", default=DEFAULT_VERIFY_MODEL, help=f"Model used to transcribe the audio (default: {DEFAULT_VERIFY_MODEL})")
+    p.add_argument("--verify-sample", type=float, default=1.0, help="Batch/streaming mode: fraction of outputs to verify (default: 1.0)")
+    p.add_argument("--wer-threshold", type=float, default=0.2, help="Flag outputs whose word error rate exceeds this (default: 0.2)")
+
+    p.add_argument("--stream", action="store_true", help="Pipeline the stages: stream the text and synthesize each sentence as soon as it is complete")
+    p.add_argument("--play", action="store_true", help="Also play the audio while it is generated")
+    p.add_argument("--tts-concurrency", type=int, default=3, help="Streaming mode: max TTS requests in flight (default: 3)")
+    p.add_argument("--prebuffer-ms", type=int, default=200, help="Audio buffered before playback starts, in ms (default: 200)")
+
+    p.add_argument(STARTUP_PROFILE_FLAG, action="store_true", help=STARTUP_PROFILE_HELP)
 
     args = p.parse_args()
+    try:
+        get_codec(args.format)
+    except ValueError as e:
+        p.error(str(e))
+    if args.archive is not None and (args.stream or args.batch):
+        p.error(f"--archive records single exchanges; it cannot be combined with {'--stream' if args.stream else '--batch'}")
+    if args.output == DEFAULT_OUT:
+        args.output = output_path_for(DEFAULT_OUT, args.format)
 
     api_key = _get_api_key()
     if not api_key:
         raise SystemExit("Error: GEMINI_API_KEY or GOOGLE_API_KEY must be set")
 
+    from google import genai
+
     client = genai.Client(api_key=api_key, http_options={"api_version": args.api_version})
 
+    if args.batch:
+        _run_batch(client, args)
+        return
+    if args.stream:
+        _run_streaming(client, args)
+        return
+
     # Step 1: Generate text with Gemini 3
     print("Step 1/2: generating text...")
-    text_resp = client.models.generate_content(
-        model=args.text_model,
-        contents=args.prompt,
-        config=types.GenerateContentConfig(
-            system_instruction=(
-                "You will produce the exact text that will be spoken by a TTS engine. "
-                "Return plain text only. Keep it concise. Avoid markdown, lists, JSON, or code blocks."
-            ),
-            temperature=0.4,
-        ),
-    )
-    text_to_speak = _extract_text(text_resp).strip()
-
-    if args.max_chars and len(text_to_speak) > args.max_chars:
-        text_to_speak = text_to_speak[: args.max_chars].rstrip() + "…"
+    text_resp = QUOTA.call_blocking(args.text_model, lambda: client.models.generate_content(model=args.text_model, contents=args.prompt, config=_text_config()))
+    text_to_speak = _clip_text(extract_text(text_resp), args.max_chars)
 
     print("Text to speak:")
     print(text_to_speak)
     print()
 
-    # Step 2: Synthesize speech with Gemini 2.5 TTS preview
+    # Step 2: Synthesize speech with Gemini 2.5 TTS preview, streamed to the output as it arrives
     print("Step 2/2: synthesizing audio...")
 
-    # Empirical behavior: the TTS preview model sometimes errors if given only the transcript
-    # (complaining it "tried to generate text"). A small wrapper prompt nudges it into TTS mode.
-    # We keep the wrapper *minimal* to reduce the risk of it being spoken.
-    tts_input = f"Transcript:\n{text_to_speak}"
-
-    tts_resp = client.models.generate_content(
-        model=args.tts_model,
-        contents=tts_input,
-        config=types.GenerateContentConfig(
-            response_modalities=["AUDIO"],
-            speech_config=types.SpeechConfig(
-                voice_config=types.VoiceConfig(
-                    prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=args.voice)
-                )
-            ),
-        ),
-    )
+    import asyncio
 
-    audio_bytes, mime_type = _extract_audio_bytes(tts_resp)
-    if not audio_bytes:
-        raise SystemExit("No audio bytes found in TTS response")
+    asyncio.run(_speak_and_verify(client, args, text_to_speak))
 
-    fmt = _parse_pcm_format_from_mime(mime_type)
-    _write_wav_pcm16(args.output, audio_bytes, fmt)
 
-    print(f"Wrote WAV: {args.output}")
-    if mime_type:
-        print(f"TTS mime_type: {mime_type}")
-    print(f"Assumed PCM format: {fmt.sample_rate_hz} Hz, {fmt.channels}ch, 16-bit")
+async def _speak_and_verify(client: genai.Client, args: argparse.Namespace, text_to_speak: str) -> None:
+    """Synthesizes the text, then reports and archives it while the verification task runs on the same loop."""
+    import asyncio
 
+    # The transcript wrapper acts as the TTS model's instruction, so it is part of the cache key.
+    cache = None if args.no_cache else AudioCache()
+    audio_bytes, output_bytes, fmt, cached = await _speak_text(client, args, text_to_speak, cache)
+    if cached:
+        print("Cache hit: reusing previously synthesized audio.")
+
+    verification = None
     if args.verify:
-        print() 
-        print("Verification: transcribing generated WAV...")
-        transcript = _transcribe_wav(client, model=args.verify_model, wav_path=args.output)
-        print("Transcript:")
-        print(transcript)
+        from experiments.verification import verify_audio
+
+        verification = asyncio.create_task(verify_audio(client, model=args.verify_model, item_id=args.output, text=text_to_speak, pcm=audio_bytes, fmt=fmt, threshold=args.wer_threshold))
+
+    print(f"Wrote {args.format}: {args.output}")
+    if args.archive is not None:
+        await asyncio.to_thread(_archive_exchange, args, text_to_speak, output_bytes, fmt)
+    print(f"PCM format: {fmt.sample_rate_hz} Hz, {fmt.channels}ch, 16-bit")
+
+    if cache:
+        cache.report()
+
+    if verification:
+        print()
+        print("Verification: waiting for transcript...")
+        result = await verification
+        if result.error:
+            print(f"Verification failed: {result.error}")
+        else:
+            print("Transcript:")
+            print(result.transcript)
+            print(f"WER: {result.wer:.1%}" + (f"  FLAGGED (above {args.wer_threshold:.0%})" if result.flagged else ""))
+
+
+def _archive_exchange(args: argparse.Namespace, text_to_speak: str, audio_bytes: bytes, fmt: PcmFormat) -> None:
+    from experiments.session_archive import (
+        DEFAULT_ARCHIVE_DIR,
+        SessionArchive,
+        new_session_id,
+    )
+
+    with SessionArchive(args.archive or DEFAULT_ARCHIVE_DIR) as archive:
+        turn = archive.begin_turn(args.session or new_session_id(), args.prompt, fmt, model_id=args.tts_model, voice_name=args.voice)
+        try:
+            turn.write(audio_bytes)
+            turn_id = turn.commit(spoken_text=text_to_speak, text_model=args.text_model, output_path=args.output)
+        except BaseException:
+            turn.discard()
+            raise
+    print(f"Archived as turn {turn_id} (session {turn.session_id}).")
+
+
+def _run_streaming(client: genai.Client, args: argparse.Namespace) -> None:
+    import asyncio
+
+    from experiments.postprocess import PostProcessSettings
+    from experiments.sentence_pipeline import speak_prompt_streaming
+    from experiments.verification import Verifier
+
+    print("Streaming text -> sentence-level TTS...")
+    verifier = Verifier(client, model=args.verify_model, sample_rate=args.verify_sample, threshold=args.wer_threshold) if args.verify else None
+    seconds = asyncio.run(
+        speak_prompt_streaming(
+            client,
+            prompt=args.prompt,
+            text_model=args.text_model,
+            tts_model=args.tts_model,
+            voice=args.voice,
+            output=args.output,
+            output_format=args.format,
+            max_chars=args.max_chars,
+            concurrency=args.tts_concurrency,
+            play=args.play,
+            prebuffer_seconds=args.prebuffer_ms / 1000,
+            use_cache=not args.no_cache,
+            verifier=verifier,
+            postprocess=PostProcessSettings() if args.postprocess else None,
+        )
+    )
+    if not seconds:
+        raise SystemExit("No audio was produced")
+    print(f"Wrote {args.format}: {args.output}")
+    if verifier:
+        print(verifier.summary())
+
+
+def _run_batch(client: genai.Client, args: argparse.Namespace) -> None:
+    import asyncio
+
+    from experiments.tts_batch import BatchSettings, read_rows, run_batch
+
+    settings = BatchSettings(
+        text_model=args.text_model,
+        tts_model=args.tts_model,
+        voice=args.voice,
+        out_dir=args.out_dir,
+        max_chars=args.max_chars,
+        verify_model=args.verify_model if args.verify else None,
+        verify_sample=args.verify_sample,
+        wer_threshold=args.wer_threshold,
+        workers=args.workers,
+        rpm=args.rpm,
+        output_format=args.format,
+        postprocess=args.postprocess,
+    )
+    try:
+        _, failed = asyncio.run(run_batch(client, read_rows(args.batch), settings, manifest_path=args.manifest, use_cache=not args.no_cache))
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Error: {e}")
+    if failed:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
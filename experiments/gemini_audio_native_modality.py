@@ -1,7 +1,11 @@
 import os
+
 from google import genai
 from google.genai import types
 
+from experiments.genai_response import extract_audio_bytes
+
+
 def generate_audio_native(text: str, output_file: str = "gemini_native_output.wav") -> None:
     """
     Generates audio from text using Gemini API native audio modality.
@@ -30,31 +34,17 @@ def generate_audio_native(text: str, output_file: str = "gemini_native_output.wa
             )
         )
         
-        # In the new SDK, response.audio might be available directly as per search result
-        audio_data: bytes | None = None
-        if hasattr(response, 'audio') and response.audio and response.audio.data:
-             print("Audio data found in response.audio")
-             audio_data = response.audio.data
-        elif response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
-            # Fallback to checking parts
-            part = response.candidates[0].content.parts[0]
-            if part.inline_data and part.inline_data.data:
-                print("Audio data found in inline_data")
-                audio_data = part.inline_data.data
-            else:
-                print("No inline data found.")
-                return
-        else:
-            print("No content returned.")
+        # All audio parts, concatenated (response.audio if the SDK exposes it)
+        audio_data, mime_type = extract_audio_bytes(response)
+        if not audio_data:
+            print("No audio data found in response.")
             return
+        print(f"Audio data found ({len(audio_data)} bytes, {mime_type}).")
 
-        if audio_data:
-            # Save
-            with open(output_file, "wb") as f:
-                f.write(audio_data)
-            print(f"Audio saved to {output_file}")
-        else:
-            print("Failed to retrieve audio data.")
+        # Save
+        with open(output_file, "wb") as f:
+            f.write(audio_data)
+        print(f"Audio saved to {output_file}")
 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -1,7 +1,11 @@
 import os
+
 from google import genai
 from google.genai import types
 
+from experiments.genai_response import extract_audio_bytes
+
+
 def generate_audio(text: str, output_file: str = "gemini_native_output_aistudio.wav") -> None:
     """
     Generates audio from text using Gemini API (AI Studio) with a specific model.
@@ -31,18 +35,14 @@ def generate_audio(text: str, output_file: str = "gemini_native_output_aistudio.
             )
         )
         
-        # Check for audio data
-        if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
-            part = response.candidates[0].content.parts[0]
-            if part.inline_data and part.inline_data.data:
-                audio_data = part.inline_data.data
-                with open(output_file, "wb") as f:
-                    f.write(audio_data)
-                print(f"Audio saved to {output_file}")
-            else:
-                 print("No inline data found in response part.")
+        # Check for audio data (all audio parts, concatenated)
+        audio_data, _ = extract_audio_bytes(response)
+        if audio_data:
+            with open(output_file, "wb") as f:
+                f.write(audio_data)
+            print(f"Audio saved to {output_file}")
         else:
-            print("No content returned in response.")
+            print("No audio data found in response.")
 
     except Exception as e:
         print(f"An error occurred: {e}")
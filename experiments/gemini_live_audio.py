@@ -1,59 +1,94 @@
+from __future__ import annotations
+
+import argparse
 import asyncio
 import os
-import wave
-import argparse
 import sys
-from google import genai
-from google.genai import types
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict
+from typing import TYPE_CHECKING
+
+from experiments.audio_cache import AudioCache, cache_key
+from experiments.audio_codecs import (
+    CODECS,
+    DEFAULT_FORMAT,
+    get_codec,
+    open_audio_writer,
+    output_path_for,
+)
+from experiments.live_metrics import MetricsRecorder, SessionMetrics, append_jsonl
+from experiments.pcm_audio import GEMINI_PCM_FORMAT, PcmFormat
+from experiments.playback import (
+    DEFAULT_PREBUFFER_SECONDS,
+    JitterBufferPlayer,
+    negotiate_output_format,
+)
+from experiments.rate_limit import QUOTA
+from experiments.session_archive import (
+    DEFAULT_ARCHIVE_DIR,
+    SessionArchive,
+    new_session_id,
+)
+from experiments.single_flight import SingleFlight
+from experiments.startup_profile import FLAG as STARTUP_PROFILE_FLAG
+from experiments.startup_profile import HELP as STARTUP_PROFILE_HELP
+from experiments.startup_profile import profile_if_requested
+from experiments.text_segments import DEFAULT_SEGMENT_CHARS, split_text_segments
+from experiments.wav_stream import OffloopWriter
+
+# The Gemini SDK takes the better part of a second to import, so it is only loaded
+# on the code paths that talk to the API (not for --help, argument errors or cache hits).
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+    from google.genai.live import AsyncSession
+
+    from experiments.postprocess import AudioPostProcessor, PostProcessSettings
 
 # Configuration
 # Use the API key from environment
 API_KEY = os.environ.get("GEMINI_API_KEY")
 MODEL_ID = "gemini-2.5-flash-native-audio-preview-12-2025" # Live API supports this model
 OUTPUT_FILENAME = "gemini_live_output.wav"
+DEFAULT_CONCURRENCY = 3 # Max concurrent Live sessions in long-form mode
+LIVE_FLIGHTS = SingleFlight() # Identical concurrent requests share one Live generation
 
-async def play_audio_queue(queue: "asyncio.Queue[bytes | None]") -> None:
+def open_player(fmt: PcmFormat, prebuffer_seconds: float = DEFAULT_PREBUFFER_SECONDS) -> JitterBufferPlayer | None:
     """
-    Consumes audio chunks from the queue and plays them using sounddevice.
-    Run this as a background task.
+    Starts callback-driven playback through sounddevice, or returns None if no audio output is available.
+    Must be called from within the running event loop.
     """
     try:
-        import sounddevice as sd # type: ignore
-        import numpy as np
-    except ImportError:
-        print("Error: sounddevice and numpy are required for audio playback.")
-        print("Please install them with: pip install sounddevice numpy")
-        return
-
-    # Gemini Native Audio is typically 24kHz, 1 channel, 16-bit PCM
-    try:
-        with sd.OutputStream(samplerate=24000, channels=1, dtype='int16') as stream:
-            while True:
-                data = await queue.get()
-                if data is None: # Sentinel value to stop
-                    queue.task_done()
-                    break
-                
-                # Convert raw bytes to numpy array
-                array = np.frombuffer(data, dtype=np.int16)
-                
-                # stream.write is blocking, so run it in a thread to avoid blocking the event loop
-                await asyncio.to_thread(stream.write, array)
-                
-                queue.task_done()
+        device_fmt = negotiate_output_format(fmt)
+        if device_fmt != fmt:
+            print(f"Output device does not take {fmt.sample_rate_hz} Hz/{fmt.channels}ch; resampling to {device_fmt.sample_rate_hz} Hz/{device_fmt.channels}ch.")
+        player = JitterBufferPlayer(fmt, prebuffer_seconds=prebuffer_seconds, device_format=device_fmt)
+        player.start()
+    except (ImportError, OSError) as e: # OSError: PortAudio library not found
+        print(f"Error: sounddevice is required for audio playback ({e}).")
+        print("Please install it with: pip install sounddevice")
+        return None
     except Exception as e:
         print(f"\nError in audio playback: {e}")
+        return None
+    return player
 
-async def live_audio_session(play_audio: bool = False, save_audio: bool = True, model_id: str = MODEL_ID, voice_name: str = "Puck", text_to_speak_as_is: str = "I am pretty sure this will work.") -> None:
-    if not API_KEY:
-        print("Error: GEMINI_API_KEY not set.")
-        return
 
-    client = genai.Client(api_key=API_KEY, http_options={"api_version": "v1alpha"})
+SYSTEM_INSTRUCTION = "You are a specialized Text-to-Speech (TTS) engine. Your ONLY job is to speak the text the user provides exactly as written. Do not reply to the text. Do not greet the user. Do not answer questions. Just read the text out loud."
 
-    # Configure the session
-    config = types.LiveConnectConfig(
-        system_instruction="You are a specialized Text-to-Speech (TTS) engine. Your ONLY job is to speak the text the user provides exactly as written. Do not reply to the text. Do not greet the user. Do not answer questions. Just read the text out loud.",
+
+def create_client() -> genai.Client:
+    from google import genai
+
+    return genai.Client(api_key=API_KEY, http_options={"api_version": "v1alpha"})
+
+
+def _live_config(voice_name: str) -> types.LiveConnectConfig:
+    from google.genai import types
+
+    return types.LiveConnectConfig(
+        system_instruction=SYSTEM_INSTRUCTION,
         response_modalities=[types.Modality.AUDIO],
         speech_config=types.SpeechConfig(
             voice_config=types.VoiceConfig(
@@ -62,82 +97,287 @@ async def live_audio_session(play_audio: bool = False, save_audio: bool = True,
         )
     )
 
-    print(f"Connecting to Live API with model {model_id} using voice '{voice_name}'...")
-    
-    # Store audio chunks for saving
-    audio_chunks: list[bytes] = []
+
+async def _receive_turn(session: AsyncSession, text: str, verbose: bool = True, metrics: MetricsRecorder | None = None) -> AsyncIterator[bytes]:
+    """
+    Sends the text on an open Live session and yields audio chunks until the turn is complete.
+    """
+    if verbose:
+        print("Connected. Sending text prompt...")
+
+    # Send a text message to trigger speech
+    await session.send_realtime_input(text=text)
+    if metrics:
+        metrics.sent()
+
+    if verbose:
+        print(f"Listening for response to: '{text}'")
+
+    async for response in session.receive():
+        if response.server_content:
+            if response.server_content.model_turn:
+                parts = response.server_content.model_turn.parts
+                if parts:
+                    for part in parts:
+                        if part.inline_data and part.inline_data.mime_type and part.inline_data.mime_type.startswith("audio"):
+                            if part.inline_data.data:
+                                yield part.inline_data.data
+
+            if response.server_content.turn_complete:
+                if verbose:
+                    print("\nTurn complete.")
+                return
+
+
+async def _stream_segment(client: genai.Client, model_id: str, config: types.LiveConnectConfig, text: str, verbose: bool = True, metrics: MetricsRecorder | None = None) -> AsyncIterator[bytes]:
+    """
+    Opens one Live session, sends the text and yields audio chunks until the turn is complete.
+    Connecting is rate limited and retried (see `rate_limit.QUOTA`) until audio starts to arrive.
+    """
+
+    async def turn() -> AsyncIterator[bytes]:
+        if metrics:
+            metrics.connecting()
+        async with client.aio.live.connect(model=model_id, config=config) as session:
+            if metrics:
+                metrics.connected()
+            async for chunk in _receive_turn(session, text, verbose, metrics):
+                yield chunk
+
+    async for chunk in QUOTA.stream(model_id, turn):
+        yield chunk
+
+
+async def _stream_segments_parallel(client: genai.Client, model_id: str, config: types.LiveConnectConfig, segments: list[str], concurrency: int, metrics: MetricsRecorder | None = None, verbose: bool = True) -> AsyncIterator[bytes]:
+    """
+    Synthesizes segments in concurrent Live sessions (at most `concurrency` open at once)
+    and yields their audio strictly in segment order.
+
+    Segment 1 is yielded while it is still being generated; later segments are buffered
+    until all earlier ones have been yielded. A segment keeps its slot until its audio has
+    been yielded, so at most `concurrency` segments are held in memory. A failing segment
+    raises its error here when its turn comes, so that the truncated audio is not taken
+    for a complete turn.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    queues: list[asyncio.Queue[bytes | None]] = [asyncio.Queue() for _ in segments]
+    drained = [asyncio.Event() for _ in segments]
+
+    async def produce(index: int, segment: str) -> None:
+        queue = queues[index]
+        async with semaphore:
+            try:
+                async for chunk in _stream_segment(client, model_id, config, segment, verbose=False, metrics=metrics):
+                    queue.put_nowait(chunk)
+            except Exception as e:
+                raise RuntimeError(f"segment {index + 1}/{len(segments)} failed: {e}") from e
+            finally:
+                queue.put_nowait(None)
+            await drained[index].wait()
+
+    # Tasks are created in segment order, so the semaphore admits segment 1 first.
+    tasks = [asyncio.create_task(produce(i, segment)) for i, segment in enumerate(segments)]
+    try:
+        for index, queue in enumerate(queues):
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+            drained[index].set()
+            await tasks[index]  # Raises the segment's error, if it ended on one
+            if verbose:
+                print(f"\nSegment {index + 1}/{len(segments)} complete.")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _iter_cached(pcm: bytes) -> AsyncIterator[bytes]:
+    yield pcm
+
+
+def stream_live_audio(client: genai.Client, text: str, *, model_id: str = MODEL_ID, voice_name: str = "Puck", long_form: bool = False, concurrency: int = DEFAULT_CONCURRENCY, segment_chars: int = DEFAULT_SEGMENT_CHARS, session: AsyncSession | None = None, verbose: bool = True, metrics: MetricsRecorder | None = None, coalesce: bool = True) -> AsyncIterator[bytes]:
+    """
+    Yields the Live API audio (24kHz mono PCM16) for the text.
+
+    In long-form mode the text is split into segments that are synthesized in parallel
+    sessions. Otherwise a single session is used: `session` if an already connected
+    one is given (it is used for exactly one turn), else a freshly connected one.
+    `metrics` receives the connect/send timestamps (chunks are recorded by the consumer).
+
+    Concurrent calls for the same client, model, voice and text share one upstream
+    generation (see `single_flight`): later callers replay the audio received so far
+    and then follow the stream. Only the first caller's `metrics` see the connection.
+    `coalesce=False` skips that, for callers that coalesce requests themselves.
+    """
+    config = _live_config(voice_name)
+    segments = split_text_segments(text, segment_chars) if long_form else []
+    if session is not None and len(segments) <= 1:
+        return _receive_turn(session, text, verbose, metrics)  # A caller's own session is never shared
+
+    def start() -> AsyncIterator[bytes]:
+        if len(segments) > 1:
+            if verbose:
+                print(f"Long-form mode: {len(segments)} segments, up to {concurrency} concurrent sessions.")
+            if metrics:
+                metrics.metrics.segments = len(segments)
+            return _stream_segments_parallel(client, model_id, config, segments, concurrency, metrics, verbose)
+        return _stream_segment(client, model_id, config, text, verbose, metrics)
+
+    if not coalesce:
+        return start()
+    return LIVE_FLIGHTS.stream((id(client), model_id, voice_name, len(segments) > 1 and segment_chars, text), start)
+
+
+async def live_audio_session(play_audio: bool = False, save_audio: bool = True, model_id: str = MODEL_ID, voice_name: str = "Puck", text_to_speak_as_is: str = "I am pretty sure this will work.", long_form: bool = False, concurrency: int = DEFAULT_CONCURRENCY, segment_chars: int = DEFAULT_SEGMENT_CHARS, use_cache: bool = True, prebuffer_seconds: float = DEFAULT_PREBUFFER_SECONDS, metrics_path: str | None = None, trace_path: str | None = None, output_path: str = OUTPUT_FILENAME, output_format: str = DEFAULT_FORMAT, archive: SessionArchive | None = None, session_id: str | None = None, client: genai.Client | None = None, postprocess: PostProcessSettings | None = None) -> SessionMetrics | None:
+    """
+    Synthesizes the text with the Live API, optionally playing and saving it.
+    Returns the session's latency/throughput metrics (None if it could not start).
+    `client` defaults to a new `create_client()`; pass one to reuse it (or a stand-in).
+    With an `archive`, the turn (text, audio and metrics) is recorded under `session_id`.
+    With `postprocess`, the played, saved and archived audio is silence-trimmed and
+    loudness-normalized on the fly (the cache keeps the model's audio as received).
+    """
+    recorder = MetricsRecorder(model_id=model_id, voice_name=voice_name, text=text_to_speak_as_is, bytes_per_second=GEMINI_PCM_FORMAT.bytes_per_second)
+    cache = AudioCache() if use_cache else None
+    key = cache_key(model_id=model_id, voice_name=voice_name, system_instruction=SYSTEM_INSTRUCTION, text=text_to_speak_as_is)
+    cached = cache.get(key) if cache else None
+
+    if cached is None and client is None and not API_KEY:
+        print("Error: GEMINI_API_KEY not set.")
+        return None
+
+    fmt = cached[1] if cached else GEMINI_PCM_FORMAT
     
-    # Setup playback queue if requested
-    playback_queue: "asyncio.Queue[bytes | None] | None" = None
-    playback_task: "asyncio.Task[None] | None" = None
+    # Setup playback if requested
+    player: JitterBufferPlayer | None = None
     
     if play_audio:
-        playback_queue = asyncio.Queue()
-        playback_task = asyncio.create_task(play_audio_queue(playback_queue))
-        print("Audio playback enabled (streaming).")
+        player = open_player(fmt, prebuffer_seconds)
+        if player:
+            print("Audio playback enabled (streaming).")
     
     if not save_audio:
         print("Audio saving disabled.")
 
-    async with client.aio.live.connect(model=model_id, config=config) as session:
-        print("Connected. Sending text prompt...")
-        
-        # Send a text message to trigger speech
-        await session.send_realtime_input(text=text_to_speak_as_is)
+    chunk_source: AsyncIterator[bytes]
+    if cached:
+        print(f"Cache hit: serving {len(cached[0])} bytes without contacting the model.")
+        chunk_source = _iter_cached(cached[0])
+    else:
+        client = client or create_client()
+
+        print(f"Connecting to Live API with model {model_id} using voice '{voice_name}'...")
+        chunk_source = stream_live_audio(
+            client,
+            text_to_speak_as_is,
+            model_id=model_id,
+            voice_name=voice_name,
+            long_form=long_form,
+            concurrency=concurrency,
+            segment_chars=segment_chars,
+            metrics=recorder,
+        )
+
+    # Audio is encoded and written to disk (output file and cache entry) as it arrives, on a
+    # writer thread, so memory stays flat, encoding never delays playback, and a partial WAV
+    # survives if the process dies mid-turn.
+    writer = OffloopWriter()
+    wav = open_audio_writer(output_path, fmt, output_format) if save_audio else None
+    cache_entry = cache.writer(key, fmt, model_id=model_id, voice_name=voice_name) if cache and cached is None else None
+    archived = archive.begin_turn(session_id or new_session_id(), text_to_speak_as_is, fmt, model_id=model_id, voice_name=voice_name) if archive else None
+    processor: AudioPostProcessor | None = None
+    if postprocess:
+        from experiments.postprocess import AudioPostProcessor
+
+        processor = AudioPostProcessor(fmt, postprocess)
+    if wav:
+        print(f"Streaming {output_format} audio to {output_path}...")
 
-        print(f"Listening for response to: '{text_to_speak_as_is}'")
-        
+    async def deliver(audio: bytes) -> None:
+        if wav:
+            await writer.submit(wav.write, audio)
+        if archived:
+            await writer.submit(archived.write, audio)
+        # Stream to player (waits while the playback buffer is full)
+        if player:
+            await player.write(audio)
+
+    complete = False
+    error: str | None = None
+    try:
+        async for chunk in chunk_source:
+            recorder.chunk(len(chunk))
+            if cache_entry:
+                await writer.submit(cache_entry.write, chunk)
+            audio = processor.process(chunk) if processor else chunk
+            if audio:
+                await deliver(audio)
+
+            print(".", end="", flush=True)
+        if processor and (tail := processor.flush()):
+            await deliver(tail)
+        complete = True
+    except Exception as e:
+        print(f"\nError during receive: {e}")
+        error = str(e)
+    finally:
         try:
-            async for response in session.receive():
-                if response.server_content:
-                    if response.server_content.model_turn:
-                        parts = response.server_content.model_turn.parts
-                        if parts:
-                            for part in parts:
-                                if part.inline_data and part.inline_data.mime_type and part.inline_data.mime_type.startswith("audio"):
-                                    if part.inline_data.data:
-                                        chunk = part.inline_data.data
-                                        if save_audio:
-                                            audio_chunks.append(chunk)
-                                        
-                                        # Stream to player
-                                        if playback_queue:
-                                            playback_queue.put_nowait(chunk)
-                                            
-                                        print(".", end="", flush=True)
-                    
-                    if response.server_content.turn_complete:
-                        print("\nTurn complete.")
-                        break
-        except Exception as e:
-            print(f"\nError during receive: {e}")
+            if wav:
+                await writer.submit(wav.close)
+            # Only complete turns are cached, a broken session must not poison later runs.
+            if cache_entry:
+                await writer.submit(cache_entry.commit if complete else cache_entry.discard)
+            if archived and not complete:
+                await writer.submit(archived.discard)
+        finally:
+            await writer.close()  # Also when one of the calls above failed: the worker thread must not leak
+
+    metrics = recorder.finish(error=error)
+    metrics.cache_hit = cached is not None
+    if processor:
+        print(f"\n{processor.stats_line()}")
 
     # Signal playback to finish
-    if playback_queue and playback_task:
+    if player:
         print("\nWaiting for audio playback to finish...")
-        await playback_queue.put(None)
-        await playback_task
-
-    # Save audio
-    if save_audio and audio_chunks:
-        print(f"\nSaving {len(audio_chunks)} chunks to {OUTPUT_FILENAME}...")
-        
-        with wave.open(OUTPUT_FILENAME, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(24000)
-            for chunk in audio_chunks:
-                wf.writeframes(chunk)
+        await player.finish()
+        print(player.stats_line())
+        metrics.playback_underruns = player.underruns
+        metrics.playback_overruns = player.overruns
+
+    if wav and wav.pcm_bytes:
+        seconds = wav.pcm_bytes / fmt.bytes_per_second
+        print(f"\nSaved {seconds:.1f}s of audio to {output_path}.")
+        print(wav.stats().summary_line())
         print("Done.")
     elif not save_audio:
         print("\nDone (Not saved).")
     else:
         print("\nNo audio received.")
 
+    if cache:
+        cache.report()
+
+    print(metrics.summary_line())
+    if metrics_path:
+        append_jsonl(metrics_path, metrics)
+    if trace_path and cached is None:
+        recorder.write_trace(trace_path)
+    if archived and complete:
+        if archived.length:
+            turn_id = await asyncio.to_thread(archived.commit, metrics=asdict(metrics), output_path=output_path if save_audio else None)
+            print(f"Archived as turn {turn_id} (session {archived.session_id}).")
+        else:
+            archived.discard()
+    return metrics
+
 def main() -> None:
+    started = time.perf_counter()
+    profile_if_requested("experiments.gemini_live_audio:main")
+
     parser = argparse.ArgumentParser(
         description="Text-to-speech using Gemini Live API. Speaks the given text or file contents aloud.",
-        epilog="Examples:\n  speak -s -t 'Hello world'     # Speak text, play only (no file saved)\n  speak -s -f notes.txt       # Speak file contents\n  speak -v Charon -t 'Hi'    # Use voice 'Charon'",
+        epilog="Examples:\n  speak -s -t 'Hello world'     # Speak text, play only (no file saved)\n  speak -s -f notes.txt       # Speak file contents\n  speak -v Charon -t 'Hi'    # Use voice 'Charon'\n  speak -s -l -c 4 -f book.txt  # Long text: 4 parallel Live sessions",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
     parser.add_argument("-i", "--interactive", action="store_true", help="Play audio in real-time while generating (streaming playback)")
@@ -146,10 +386,61 @@ def main() -> None:
     parser.add_argument("-v", "--voice", type=str, default="Puck", help="Voice: Puck, Charon, Fenrir, Kore, Aoede, Leda, Orus, Zephyr")
     parser.add_argument("-t", "--text", type=str, default="I am pretty sure this will work.", help="Text to speak (ignored if -f is used)")
     parser.add_argument("-f", "--file", type=str, help="Read text from this file and speak its contents")
+    parser.add_argument("-l", "--long-form", action="store_true", help="Split long text at sentence/paragraph boundaries and synthesize segments in parallel Live sessions")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY, help=f"Max concurrent Live sessions in long-form mode (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk audio cache (always call the model)")
+    parser.add_argument("--prebuffer-ms", type=int, default=int(DEFAULT_PREBUFFER_SECONDS * 1000), help="Audio buffered before playback starts (and after an underrun), in ms (default: %(default)s)")
+    parser.add_argument("--metrics", type=str, metavar="FILE.jsonl", help="Append this session's latency/throughput metrics as a JSON line")
+    parser.add_argument("--trace", type=str, metavar="FILE.json", help="Save chunk arrival times, for replay by `python -m experiments.benchmark_pipeline --trace`")
+    parser.add_argument(STARTUP_PROFILE_FLAG, action="store_true", help=STARTUP_PROFILE_HELP)
+    parser.add_argument("--segment-chars", type=int, default=DEFAULT_SEGMENT_CHARS, help=f"Target segment size in characters for long-form mode (default: {DEFAULT_SEGMENT_CHARS})")
+    parser.add_argument("--archive", nargs="?", const=DEFAULT_ARCHIVE_DIR, metavar="DIR", help=f"Record this turn (text, audio, metrics) in the session archive (default DIR: {DEFAULT_ARCHIVE_DIR})")
+    parser.add_argument("--session", default=os.environ.get("SPEAK_SESSION"), help="Archive session id (default: $SPEAK_SESSION, or a new id per run)")
+    parser.add_argument("--replay", metavar="FILE", help="Play an existing 16-bit WAV or raw 24 kHz PCM file (memory-mapped) instead of synthesizing")
+    parser.add_argument("--seek", default="0", metavar="OFFSET", help="Replay mode: start at this offset (seconds, M:SS or H:MM:SS)")
+    parser.add_argument("--format", choices=list(CODECS), default=DEFAULT_FORMAT, help="Output codec: wav, flac (lossless), ogg or mulaw (lossy); encoded off the receive loop (default: %(default)s)")
+    parser.add_argument("--postprocess", action="store_true", help="Trim leading/trailing silence and normalize loudness of the played and saved audio (adds ~20 ms latency)")
+    parser.add_argument("--conversation", action="store_true", help="Speak each line read from stdin on one persistent Live session (reconnects and resumes automatically)")
     args = parser.parse_args()
 
+    if args.replay:
+        from experiments.replay import parse_time_offset, replay_file
+
+        try:
+            played = asyncio.run(replay_file(args.replay, seek_seconds=parse_time_offset(args.seek), prebuffer_seconds=args.prebuffer_ms / 1000, started=started))
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"Error: {e}")
+        raise SystemExit(0 if played else 1)
+
+    try:
+        get_codec(args.format)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+
     selected_model = "gemini-2.0-flash-exp" if args.old else MODEL_ID
 
+    if args.conversation:
+        from experiments.live_conversation import run_conversation, stdin_lines
+
+        if not API_KEY:
+            raise SystemExit("Error: GEMINI_API_KEY not set.")
+        try:
+            asyncio.run(
+                run_conversation(
+                    stdin_lines(),
+                    play_audio=args.interactive or args.speak_only,
+                    save_audio=not args.speak_only,
+                    model_id=selected_model,
+                    voice_name=args.voice,
+                    prebuffer_seconds=args.prebuffer_ms / 1000,
+                    output_path=output_path_for(OUTPUT_FILENAME, args.format),
+                    output_format=args.format,
+                )
+            )
+        except KeyboardInterrupt:
+            pass
+        return
+
     text_to_speak_as_is = args.text
     if args.file:
         try:
@@ -166,6 +457,11 @@ def main() -> None:
 
     play = args.interactive or args.speak_only
     save = not args.speak_only
+    postprocess = None
+    if args.postprocess:
+        from experiments.postprocess import PostProcessSettings
+
+        postprocess = PostProcessSettings()
 
     asyncio.run(
         live_audio_session(
@@ -174,6 +470,18 @@ def main() -> None:
             model_id=selected_model,
             voice_name=args.voice,
             text_to_speak_as_is=text_to_speak_as_is,
+            long_form=args.long_form,
+            concurrency=args.concurrency,
+            segment_chars=args.segment_chars,
+            use_cache=not args.no_cache,
+            prebuffer_seconds=args.prebuffer_ms / 1000,
+            metrics_path=args.metrics,
+            trace_path=args.trace,
+            output_path=output_path_for(OUTPUT_FILENAME, args.format),
+            output_format=args.format,
+            archive=SessionArchive(args.archive) if args.archive else None,
+            session_id=args.session,
+            postprocess=postprocess,
         )
     )
 
@@ -184,12 +492,12 @@ def speak_only_main() -> None:
 
 
 def speak_file_main() -> None:
-    sys.argv = [sys.argv[0], "-s", "-f", *sys.argv[1:]]
+    sys.argv = [sys.argv[0], "-s", "-l", "-f", *sys.argv[1:]]
     main()
 
 
 def speak_file_speak_me() -> None:
-    sys.argv = [sys.argv[0], "-s", "-f", "speak_me.txt", *sys.argv[1:]]
+    sys.argv = [sys.argv[0], "-s", "-l", "-f", "speak_me.txt", *sys.argv[1:]]
     main()
 
 
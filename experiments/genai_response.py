@@ -0,0 +1,91 @@
+"""Text and audio extraction from GenerateContent responses, buffered or streamed.
+
+One copy of the response-walking code for every GenerateContent caller:
+
+- `iter_parts(response)` yields the parts of every candidate, lazily.
+- `extract_text(response)` returns the response text. It raises if there is none.
+- `iter_audio(response)` yields `(data, mime_type)` for every audio part,
+  or for a top-level `response.audio` that some SDK shapes expose.
+- `extract_audio_bytes(response)` joins all audio parts in one copy. A
+  response split over several parts no longer loses everything after the first.
+- `stream_audio(responses)` / `iter_stream_audio(responses)` do the same
+  for a `generate_content_stream` response, chunk by chunk as it arrives, so
+  the audio can be written and played before the model has finished.
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterable, Iterator
+from typing import TYPE_CHECKING
+
+# google.genai is only needed for annotations; responses are walked defensively.
+if TYPE_CHECKING:
+    from google.genai import types
+
+
+def iter_parts(response: object) -> Iterator[types.Part]:
+    """Yields the parts of all candidates, skipping empty ones."""
+    for cand in getattr(response, "candidates", None) or []:
+        content = getattr(cand, "content", None)
+        if content:
+            yield from getattr(content, "parts", None) or []
+
+
+def extract_text(response: object) -> str:
+    # The SDK often provides response.text
+    t = getattr(response, "text", None)
+    if isinstance(t, str) and t.strip():
+        return t
+
+    # Fall back to concatenating text parts.
+    text = "".join(txt for part in iter_parts(response) if isinstance(txt := getattr(part, "text", None), str)).strip()
+    if not text:
+        raise RuntimeError("No text found in response")
+    return text
+
+
+def iter_audio(response: object) -> Iterator[tuple[bytes, str | None]]:
+    """Yields (data, mime_type) for each audio payload of one response (or streamed chunk)."""
+    # Some shapes expose response.audio.data
+    audio_obj = getattr(response, "audio", None)
+    if audio_obj is not None and (data := getattr(audio_obj, "data", None)):
+        yield data, getattr(audio_obj, "mime_type", None)
+        return
+
+    # Otherwise inline_data in parts
+    for part in iter_parts(response):
+        inline = getattr(part, "inline_data", None)
+        if not inline:
+            continue
+        mime_type = getattr(inline, "mime_type", None)
+        data = getattr(inline, "data", None)
+        if isinstance(mime_type, str) and mime_type.startswith("audio") and data:
+            yield data, mime_type
+
+
+def extract_audio_bytes(response: object) -> tuple[bytes | None, str | None]:
+    """Returns (all audio bytes, mime type of the first audio part), or (None, None)."""
+    mime_types: list[str | None] = []
+
+    def payloads() -> Iterator[bytes]:
+        for data, mime_type in iter_audio(response):
+            mime_types.append(mime_type)
+            yield data
+
+    audio = b"".join(payloads())  # One copy; a single part is returned as is
+    if not mime_types:
+        return None, None
+    return audio, mime_types[0]
+
+
+async def stream_audio(responses: AsyncIterator[object]) -> AsyncIterator[tuple[bytes, str | None]]:
+    """Yields (data, mime_type) from a streamed response as each chunk arrives."""
+    async for response in responses:
+        for item in iter_audio(response):
+            yield item
+
+
+def iter_stream_audio(responses: Iterable[object]) -> Iterator[tuple[bytes, str | None]]:
+    """Blocking counterpart of `stream_audio`."""
+    for response in responses:
+        yield from iter_audio(response)
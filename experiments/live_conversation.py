@@ -0,0 +1,347 @@
+"""Long-lived Live API session that speaks many utterances over one connection.
+
+`live_audio_session` connects, speaks one text and disconnects, so every
+utterance pays the connect and setup handshake. `PersistentLiveSession` keeps a
+single `client.aio.live.connect` session open instead:
+
+- `submit(text)` queues an utterance and returns a `LiveTurn` whose audio
+  chunks can be iterated as they arrive. Turns are spoken in order.
+- Sends are pipelined: the next queued text goes out the moment the previous
+  turn completes on the wire, while its audio may still be playing.
+- The session asks for resumption handles. When the server closes the socket,
+  or announces it will (GoAway), the session reconnects with the latest handle
+  and carries on. A turn that had not produced audio yet is sent again. A turn
+  cut off mid-audio ends early and is marked `interrupted`.
+- Context window compression (sliding window) lets the session outlive the
+  model's context limit.
+
+`run_conversation` drives a session from any async iterator of lines (stdin
+for `speak --conversation`), playing every turn through one jitter buffer and
+writing all of them to one output file.
+
+Usage:
+  uv run speak --conversation                    # one utterance per stdin line
+  printf 'First line.\\nSecond line.\\n' | uv run speak --conversation -s
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Self
+
+from experiments.audio_codecs import DEFAULT_FORMAT, open_audio_writer
+from experiments.gemini_live_audio import (
+    MODEL_ID,
+    _live_config,
+    create_client,
+    open_player,
+)
+from experiments.pcm_audio import GEMINI_PCM_FORMAT
+from experiments.playback import DEFAULT_PREBUFFER_SECONDS
+from experiments.wav_stream import OffloopWriter
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+    from google.genai.live import AsyncSession
+
+DEFAULT_MAX_RECONNECTS = 5  # Consecutive failed connects before pending turns are failed
+_RECONNECT_BACKOFF_SECONDS = (0.0, 0.5, 1.0, 2.0, 4.0)
+
+
+def _ms(value: float | None) -> str:
+    return "n/a" if value is None else f"{value * 1000:.0f} ms"
+
+
+@dataclass
+class LiveTurn:
+    """One utterance on a persistent session; `async for chunk in turn` yields its audio."""
+
+    index: int
+    text: str
+    submitted: float = field(default_factory=time.perf_counter)
+    sent: float | None = None
+    first_audio: float | None = None
+    completed: float | None = None
+    audio_bytes: int = 0
+    sends: int = 0  # More than one after a reconnect
+    interrupted: bool = False
+    error: str | None = None
+    _queue: asyncio.Queue[bytes | None] = field(default_factory=asyncio.Queue, repr=False)
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.completed is not None
+
+    @property
+    def first_audio_seconds(self) -> float | None:
+        """From `submit()` to the first audio chunk; includes waiting for earlier turns."""
+        return None if self.first_audio is None else self.first_audio - self.submitted
+
+    @property
+    def send_to_first_audio_seconds(self) -> float | None:
+        return None if self.first_audio is None or self.sent is None else self.first_audio - self.sent
+
+    def summary_line(self) -> str:
+        state = f"error: {self.error}" if self.error else "interrupted" if self.interrupted else "complete"
+        resent = f", sent {self.sends}x" if self.sends > 1 else ""
+        return (
+            f"Turn {self.index}: {self.audio_bytes / GEMINI_PCM_FORMAT.bytes_per_second:.1f}s of audio, "
+            f"first audio {_ms(self.first_audio_seconds)} after submit ({_ms(self.send_to_first_audio_seconds)} after send){resent}, {state}"
+        )
+
+    def _chunk(self, data: bytes) -> None:
+        if self.first_audio is None:
+            self.first_audio = time.perf_counter()
+        self.audio_bytes += len(data)
+        self._queue.put_nowait(data)
+
+    def _finish(self, *, interrupted: bool = False, error: str | None = None) -> None:
+        if self.done:
+            return
+        self.completed = time.perf_counter()
+        self.interrupted = interrupted
+        self.error = error
+        self._queue.put_nowait(None)
+        self._done.set()
+
+    async def wait(self) -> None:
+        """Returns once the turn has finished on the wire (its audio may not have been consumed yet)."""
+        await self._done.wait()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while (chunk := await self._queue.get()) is not None:
+            yield chunk
+
+
+class PersistentLiveSession:
+    """
+    One Live connection reused across turns, reconnected (and resumed) when the
+    server drops it. Use as `async with PersistentLiveSession(client) as live:`.
+    """
+
+    def __init__(self, client: genai.Client, *, model_id: str = MODEL_ID, voice_name: str = "Puck", resume: bool = True, max_reconnects: int = DEFAULT_MAX_RECONNECTS, verbose: bool = True) -> None:
+        self.client = client
+        self.model_id = model_id
+        self.voice_name = voice_name
+        self.resume = resume
+        self.max_reconnects = max_reconnects
+        self.verbose = verbose
+        self.connects = 0
+        self.resumptions = 0
+        self._handle: str | None = None
+        self._pending: deque[LiveTurn] = deque()
+        self._in_flight: LiveTurn | None = None
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._go_away = False
+        self._turns = 0
+        self._connected = asyncio.Event()
+        self._runner: asyncio.Task[None] | None = None
+        self._failure: BaseException | None = None
+
+    def submit(self, text: str) -> LiveTurn:
+        """Queues `text`; the returned turn yields its audio once it is spoken."""
+        if self._closing:
+            raise RuntimeError("session is closed")
+        self._turns += 1
+        turn = LiveTurn(self._turns, text)
+        if self._failure is not None:
+            turn._finish(error=str(self._failure))
+            return turn
+        self._pending.append(turn)
+        self._wake.set()
+        return turn
+
+    async def start(self) -> None:
+        """Connects; raises if the first connection cannot be made."""
+        self._runner = asyncio.create_task(self._run())
+        connected = asyncio.create_task(self._connected.wait())
+        await asyncio.wait({self._runner, connected}, return_when=asyncio.FIRST_COMPLETED)
+        connected.cancel()
+        if self._runner.done():
+            self._runner.result()  # Re-raises why it stopped
+
+    async def close(self, *, drain: bool = True) -> None:
+        """Waits for the submitted turns (unless `drain` is False), then disconnects."""
+        if drain:
+            while (self._pending or self._in_flight) and self._runner and not self._runner.done():
+                last = self._pending[-1] if self._pending else self._in_flight
+                assert last is not None
+                waiter = asyncio.ensure_future(last.wait())
+                await asyncio.wait({waiter, self._runner}, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+        self._closing = True
+        self._wake.set()
+        if self._runner:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+        self._fail_all("session closed")
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close(drain=exc_info[0] is None)
+
+    def _config(self) -> types.LiveConnectConfig:
+        from google.genai import types
+
+        config = _live_config(self.voice_name)
+        if self.resume:
+            config.session_resumption = types.SessionResumptionConfig(handle=self._handle)
+            config.context_window_compression = types.ContextWindowCompressionConfig(sliding_window=types.SlidingWindow())
+        return config
+
+    def _fail_all(self, error: str) -> None:
+        if self._in_flight:
+            self._in_flight._finish(error=error)
+            self._in_flight = None
+        while self._pending:
+            self._pending.popleft()._finish(error=error)
+
+    async def _run(self) -> None:
+        failures = 0
+        while not self._closing:
+            try:
+                resuming = self._handle is not None
+                async with self.client.aio.live.connect(model=self.model_id, config=self._config()) as session:
+                    self.connects += 1
+                    self.resumptions += resuming
+                    failures = 0
+                    self._go_away = False
+                    if self.verbose and self.connects > 1:
+                        print(f"\n[live] Reconnected{' (resumed)' if resuming else ''}.")
+                    self._connected.set()
+                    await self._serve(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                if self.verbose:
+                    print(f"\n[live] Connection lost: {e}")
+                if failures > self.max_reconnects or not self._connected.is_set():
+                    self._failure = e
+                    self._fail_all(f"could not reconnect: {e}")
+                    raise
+                await asyncio.sleep(_RECONNECT_BACKOFF_SECONDS[min(failures, len(_RECONNECT_BACKOFF_SECONDS)) - 1])
+            self._requeue_in_flight()
+
+    def _requeue_in_flight(self) -> None:
+        turn, self._in_flight = self._in_flight, None
+        if turn is None or turn.done:
+            return
+        if turn.audio_bytes:
+            turn._finish(interrupted=True)  # Its audio cannot be continued on a new connection
+        else:
+            self._pending.appendleft(turn)  # Nothing was spoken yet: send it again
+
+    async def _send_next(self, session: AsyncSession) -> bool:
+        if not self._pending:
+            return False
+        turn = self._pending.popleft()
+        self._in_flight = turn
+        turn.sends += 1
+        await session.send_realtime_input(text=turn.text)
+        turn.sent = time.perf_counter()
+        return True
+
+    async def _serve(self, session: AsyncSession) -> None:
+        """Sends queued turns and routes the server's messages until a reconnect is due."""
+        while not self._closing:
+            if self._in_flight is None:
+                if self._go_away:
+                    return  # Reconnect between turns rather than in the middle of one
+                self._wake.clear()
+                if not await self._send_next(session):
+                    await self._wake.wait()
+                    continue
+            async for message in session.receive():
+                self._handle_message(message)
+            turn, self._in_flight = self._in_flight, None
+            if turn:
+                turn._finish()
+            if not self._go_away:
+                await self._send_next(session)  # Pipelined: the previous turn may still be playing
+
+    def _handle_message(self, message: types.LiveServerMessage) -> None:
+        update = message.session_resumption_update
+        if update and update.resumable and update.new_handle:
+            self._handle = update.new_handle
+        if message.go_away:
+            self._go_away = True
+            if self.verbose:
+                print(f"\n[live] Server will close the connection (time left: {message.go_away.time_left}); reconnecting after this turn.")
+        content = message.server_content
+        if not content or not self._in_flight:
+            return
+        for part in (content.model_turn.parts or []) if content.model_turn else []:
+            if part.inline_data and part.inline_data.data and (part.inline_data.mime_type or "").startswith("audio"):
+                self._in_flight._chunk(part.inline_data.data)
+        if content.interrupted:
+            self._in_flight._finish(interrupted=True)
+
+
+async def stdin_lines() -> AsyncIterator[str]:
+    """Non-empty lines from stdin, read off the event loop."""
+    while line := await asyncio.to_thread(sys.stdin.readline):
+        if line.strip():
+            yield line.strip()
+
+
+async def run_conversation(lines: AsyncIterator[str], *, play_audio: bool = True, save_audio: bool = False, model_id: str = MODEL_ID, voice_name: str = "Puck", prebuffer_seconds: float = DEFAULT_PREBUFFER_SECONDS, output_path: str | None = None, output_format: str = DEFAULT_FORMAT, client: genai.Client | None = None) -> list[LiveTurn]:
+    """
+    Speaks each line on one persistent Live session, in order, and returns the turns.
+    Lines are submitted as soon as they arrive; audio is played (and saved) turn by turn.
+    """
+    player = open_player(GEMINI_PCM_FORMAT, prebuffer_seconds) if play_audio else None
+    writer = OffloopWriter()
+    wav = open_audio_writer(output_path, GEMINI_PCM_FORMAT, output_format) if save_audio and output_path else None
+    turns: asyncio.Queue[LiveTurn | None] = asyncio.Queue()
+    spoken: list[LiveTurn] = []
+
+    print(f"Connecting to Live API with model {model_id} using voice '{voice_name}'...")
+    async with PersistentLiveSession(client or create_client(), model_id=model_id, voice_name=voice_name) as live:
+        print("Connected. Type a line to speak it (Ctrl-D to finish).", file=sys.stderr)
+
+        async def read() -> None:
+            try:
+                async for line in lines:
+                    await turns.put(live.submit(line))
+            finally:
+                await turns.put(None)
+
+        reader = asyncio.create_task(read())
+        try:
+            while (turn := await turns.get()) is not None:
+                async for chunk in turn:
+                    if wav:
+                        await writer.submit(wav.write, chunk)
+                    if player:
+                        await player.write(chunk)
+                print(turn.summary_line(), file=sys.stderr)
+                spoken.append(turn)
+            await reader
+        finally:
+            reader.cancel()
+            try:
+                if wav:
+                    await writer.submit(wav.close)
+            finally:
+                await writer.close()
+            if player:
+                await player.finish()
+        print(f"{len(spoken)} turn(s) over {live.connects} connection(s) ({live.resumptions} resumed).", file=sys.stderr)
+    if player:
+        print(player.stats_line(), file=sys.stderr)
+    if wav and wav.pcm_bytes:
+        print(wav.stats().summary_line(), file=sys.stderr)
+        print(f"Saved all turns to {output_path}.", file=sys.stderr)
+    return spoken
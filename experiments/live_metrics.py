@@ -0,0 +1,132 @@
+"""Latency and throughput metrics for a Live API synthesis session.
+
+`MetricsRecorder` is threaded through the Live stream (connect / send hooks) and
+the consumer loop (one call per audio chunk); `finish()` turns the recording
+into a `SessionMetrics` record that can be returned to callers and appended to a
+JSONL file (`speak --metrics out.jsonl`). `write_trace()` saves the raw chunk
+arrival times (`speak --trace trace.json`) so the offline benchmark can replay a
+real session's pacing (see experiments/fake_live.py).
+
+All durations are in seconds and measured with `time.perf_counter()`.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import time
+from dataclasses import asdict, dataclass, field
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in [0, 100])."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class SessionMetrics:
+    model_id: str
+    voice_name: str
+    text_chars: int
+    started_at: float  # Unix timestamp
+    segments: int = 1
+    cache_hit: bool = False
+    # Connect: from opening the first Live connection until the session is established.
+    connect_seconds: float | None = None
+    # From the first send_realtime_input to the first audio chunk received.
+    first_audio_seconds: float | None = None
+    # From the start of the session (before connecting) to the first audio chunk.
+    time_to_first_audio_seconds: float | None = None
+    chunks: int = 0
+    total_bytes: int = 0
+    inter_arrival_ms: dict[str, float] = field(default_factory=dict)
+    audio_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    # Wall-clock seconds per second of audio produced; below 1.0 is faster than real time.
+    real_time_factor: float | None = None
+    playback_underruns: int | None = None
+    playback_overruns: int | None = None
+    error: str | None = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    def summary_line(self) -> str:
+        def ms(value: float | None) -> str:
+            return "n/a" if value is None else f"{value * 1000:.0f} ms"
+
+        rtf = "n/a" if self.real_time_factor is None else f"{self.real_time_factor:.2f}"
+        return (
+            f"Metrics: connect {ms(self.connect_seconds)}, first audio {ms(self.first_audio_seconds)} after send "
+            f"({ms(self.time_to_first_audio_seconds)} end-to-end), {self.chunks} chunks, "
+            f"{self.audio_seconds:.1f}s audio in {self.wall_seconds:.1f}s (RTF {rtf})"
+        )
+
+
+def append_jsonl(path: str, metrics: SessionMetrics) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(metrics.to_json() + "\n")
+
+
+class MetricsRecorder:
+    def __init__(self, *, model_id: str, voice_name: str, text: str, bytes_per_second: int) -> None:
+        self.metrics = SessionMetrics(model_id=model_id, voice_name=voice_name, text_chars=len(text), started_at=time.time())
+        self._bytes_per_second = bytes_per_second
+        self._t0 = time.perf_counter()
+        self._connect_started: float | None = None
+        self._sent: float | None = None
+        self._last_chunk: float | None = None
+        self._gaps: list[float] = []
+        self._arrivals: list[tuple[float, int]] = []
+
+    # Hooks called by the Live stream. With parallel segments only the first call counts.
+    def connecting(self) -> None:
+        if self._connect_started is None:
+            self._connect_started = time.perf_counter()
+
+    def connected(self) -> None:
+        if self.metrics.connect_seconds is None and self._connect_started is not None:
+            self.metrics.connect_seconds = time.perf_counter() - self._connect_started
+
+    def sent(self) -> None:
+        if self._sent is None:
+            self._sent = time.perf_counter()
+
+    def chunk(self, n_bytes: int) -> None:
+        now = time.perf_counter()
+        if self._last_chunk is None:
+            self.metrics.time_to_first_audio_seconds = now - self._t0
+            if self._sent is not None:
+                self.metrics.first_audio_seconds = now - self._sent
+        else:
+            self._gaps.append(now - self._last_chunk)
+        self._last_chunk = now
+        self._arrivals.append((now - (self._sent if self._sent is not None else self._t0), n_bytes))
+        self.metrics.chunks += 1
+        self.metrics.total_bytes += n_bytes
+
+    def finish(self, *, error: str | None = None) -> SessionMetrics:
+        """Closes the recording once the last chunk was received (playback stats are filled in by the caller)."""
+        m = self.metrics
+        m.wall_seconds = time.perf_counter() - self._t0
+        m.audio_seconds = m.total_bytes / self._bytes_per_second
+        m.real_time_factor = m.wall_seconds / m.audio_seconds if m.audio_seconds else None
+        m.error = error
+        if self._gaps:
+            gaps = sorted(self._gaps)
+            m.inter_arrival_ms = {
+                "mean": round(sum(gaps) / len(gaps) * 1000, 3),
+                "p50": round(percentile(gaps, 50) * 1000, 3),
+                "p90": round(percentile(gaps, 90) * 1000, 3),
+                "p99": round(percentile(gaps, 99) * 1000, 3),
+                "max": round(gaps[-1] * 1000, 3),
+            }
+        return m
+
+    def write_trace(self, path: str) -> None:
+        """Writes {"arrivals": [[seconds after send, bytes], ...]} for `fake_live.load_trace`."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"model_id": self.metrics.model_id, "arrivals": [[round(t, 6), n] for t, n in self._arrivals]}, f)
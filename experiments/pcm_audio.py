@@ -0,0 +1,43 @@
+"""Raw PCM helpers shared by the experiments (format parsing, WAV wrapping)."""
+
+from __future__ import annotations
+
+import re
+import wave
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PcmFormat:
+    sample_rate_hz: int
+    channels: int = 1
+    sample_width_bytes: int = 2  # PCM16
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate_hz * self.channels * self.sample_width_bytes
+
+
+# Gemini native audio (Live API and 2.5 TTS) is 24kHz, mono, 16-bit PCM.
+GEMINI_PCM_FORMAT = PcmFormat(sample_rate_hz=24000)
+
+
+def parse_pcm_format_from_mime(mime_type: str | None, *, default_rate: int = 24000) -> PcmFormat:
+    # Example: audio/L16;codec=pcm;rate=24000 (optionally ;channels=2)
+    if not mime_type:
+        return PcmFormat(sample_rate_hz=default_rate)
+
+    rate = re.search(r"rate=(\d+)", mime_type)
+    channels = re.search(r"channels=(\d+)", mime_type)
+    return PcmFormat(
+        sample_rate_hz=int(rate.group(1)) if rate else default_rate,
+        channels=int(channels.group(1)) if channels else 1,
+    )
+
+
+def write_wav_pcm16(path: str, pcm16: bytes, fmt: PcmFormat) -> None:
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(fmt.channels)
+        wf.setsampwidth(fmt.sample_width_bytes)
+        wf.setframerate(fmt.sample_rate_hz)
+        wf.writeframes(pcm16)
@@ -0,0 +1,260 @@
+"""Callback-driven streaming playback with a jitter buffer.
+
+The network delivers audio in bursts; the sound card consumes it at a fixed
+rate. `JitterBufferPlayer` sits in between:
+
+- Chunks are copied into a preallocated ring buffer (`PcmRingBuffer`).
+- The output device pulls from the ring in its own callback thread, so there is
+  no thread hop (and no numpy conversion) per network chunk.
+- Playback only starts (and restarts after an underrun) once `prebuffer_seconds`
+  of audio are buffered, which absorbs arrival jitter at a fixed latency cost.
+- The ring has a fixed capacity; `await player.write(chunk)` waits while it is
+  full, so a fast producer is slowed down to playback speed instead of buffering
+  without bound.
+
+The output stream is created by a `stream_factory`, which defaults to a
+`sounddevice.RawOutputStream` and can be replaced by a fake stream that calls
+the callback itself (tests, benchmarks, headless machines).
+
+If the device cannot open the source format (`negotiate_output_format`), the
+player is given a `device_format` and converts on write with a
+`StreamingResampler` (experiments/resample.py) instead of relying on the OS.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, Protocol
+
+from experiments.pcm_audio import PcmFormat
+
+if TYPE_CHECKING:
+    from experiments.resample import StreamingResampler
+
+DEFAULT_CAPACITY_SECONDS = 10.0
+DEFAULT_PREBUFFER_SECONDS = 0.2
+
+
+class OutputStream(Protocol):
+    def start(self) -> None: ...
+    def stop(self) -> None: ...
+    def close(self) -> None: ...
+
+
+# callback(outdata, frames, time_info, status), as in sounddevice.
+StreamCallback = Callable[[Any, int, Any, Any], None]
+StreamFactory = Callable[[PcmFormat, StreamCallback], OutputStream]
+
+
+def sounddevice_stream_factory(fmt: PcmFormat, callback: StreamCallback) -> OutputStream:
+    import sounddevice as sd  # type: ignore
+
+    stream: OutputStream = sd.RawOutputStream(
+        samplerate=fmt.sample_rate_hz,
+        channels=fmt.channels,
+        dtype="int16",
+        callback=callback,
+    )
+    return stream
+
+
+def negotiate_output_format(src: PcmFormat, device: int | str | None = None) -> PcmFormat:
+    """`src` if the output device accepts it as is, otherwise the device's native rate (and a channel count it has)."""
+    try:
+        import sounddevice as sd
+    except (ImportError, OSError):
+        return src
+    try:
+        sd.check_output_settings(device=device, samplerate=src.sample_rate_hz, channels=src.channels, dtype="int16")
+    except (sd.PortAudioError, ValueError):
+        try:
+            info = sd.query_devices(device, "output")
+        except (sd.PortAudioError, ValueError):
+            return src
+        channels = min(src.channels, max(1, int(info["max_output_channels"])))
+        return PcmFormat(sample_rate_hz=int(info["default_samplerate"]), channels=channels)
+    return src
+
+
+class PcmRingBuffer:
+    """Fixed-capacity byte ring buffer, safe for one writer and one reader thread."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._read = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def write(self, data: bytes | memoryview) -> int:
+        """Copies as much of `data` as fits and returns the number of bytes written."""
+        with self._lock:
+            n = min(len(data), self.capacity - self._size)
+            start = (self._read + self._size) % self.capacity
+            first = min(n, self.capacity - start)
+            self._view[start:start + first] = data[:first]
+            if n > first:
+                self._view[:n - first] = data[first:n]
+            self._size += n
+            return n
+
+    def read_into(self, out: memoryview) -> int:
+        """Fills `out` with as much buffered data as available and returns the byte count."""
+        with self._lock:
+            n = min(len(out), self._size)
+            first = min(n, self.capacity - self._read)
+            out[:first] = self._view[self._read:self._read + first]
+            if n > first:
+                out[first:n] = self._view[:n - first]
+            self._read = (self._read + n) % self.capacity
+            self._size -= n
+            return n
+
+
+class JitterBufferPlayer:
+    def __init__(
+        self,
+        fmt: PcmFormat,
+        *,
+        capacity_seconds: float = DEFAULT_CAPACITY_SECONDS,
+        prebuffer_seconds: float = DEFAULT_PREBUFFER_SECONDS,
+        stream_factory: StreamFactory = sounddevice_stream_factory,
+        device_format: PcmFormat | None = None,
+    ) -> None:
+        # `fmt` is what callers write; the ring and the device run at `device_format`.
+        self.source_fmt = fmt
+        self.fmt = device_format or fmt
+        self._resampler: StreamingResampler | None = None
+        if self.fmt != fmt:
+            from experiments.resample import StreamingResampler
+
+            self._resampler = StreamingResampler(fmt, self.fmt)
+        self._resample_slice = max(1, fmt.bytes_per_second // 10)  # 100 ms of source audio per conversion step
+        fmt = self.fmt
+        frame = fmt.channels * fmt.sample_width_bytes
+        capacity = max(frame, int(capacity_seconds * fmt.bytes_per_second) // frame * frame)
+        self._ring = PcmRingBuffer(capacity)
+        self._prebuffer_bytes = min(capacity, int(prebuffer_seconds * fmt.bytes_per_second) // frame * frame)
+        self._stream_factory = stream_factory
+        self._stream: OutputStream | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._silence = b""
+
+        # Shared with the callback thread (plain attribute reads/writes are atomic enough here).
+        self._playing = False
+        self._eof = False
+        self._writer_waiting = False
+        self._space = asyncio.Event()
+        self._drained = asyncio.Event()
+
+        # Underruns: the device wanted audio we did not have yet (audible gap).
+        # Overruns: writes that found the buffer full and had to wait (backpressure).
+        self.underruns = 0
+        self.overruns = 0
+        self.device_underflows = 0
+        self.bytes_played = 0
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stream = self._stream_factory(self.fmt, self._callback)
+        self._stream.start()
+
+    async def write(self, data: bytes | memoryview) -> None:
+        if not self._resampler:
+            await self._write(memoryview(data))
+            return
+        # Resample in bounded slices: a whole clip (cache hit, replay) would otherwise be converted,
+        # and held converted, all at once.
+        view = memoryview(data).cast("B")
+        for start in range(0, len(view), self._resample_slice):
+            await self._write(memoryview(self._resampler.process(view[start : start + self._resample_slice])))
+
+    async def _write(self, view: memoryview) -> None:
+        blocked = False
+        while view:
+            written = self._ring.write(view)
+            view = view[written:]
+            if view:
+                if not blocked:
+                    self.overruns += 1
+                    blocked = True
+                self._space.clear()
+                self._writer_waiting = True
+                # Re-check after arming the flag: the callback may have freed space in between.
+                if self._ring.free == 0:
+                    await self._space.wait()
+                self._writer_waiting = False
+
+    async def finish(self) -> None:
+        """Plays out everything still buffered, then closes the output stream."""
+        if self._resampler:
+            await self._write(memoryview(self._resampler.flush()))
+        self._eof = True
+        if self._stream is None:
+            return
+        # Generous bound in case the device stops calling back.
+        timeout = self._ring.size / self.fmt.bytes_per_second + 2.0
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        except TimeoutError:
+            print("\nWarning: audio device did not drain the playback buffer in time.")
+        self.close()
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def _notify(self, event: asyncio.Event) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(event.set)
+
+    def _callback(self, outdata: Any, frames: int, time_info: Any, status: Any) -> None:
+        if status and getattr(status, "output_underflow", False):
+            self.device_underflows += 1
+
+        out = memoryview(outdata).cast("B")
+        if not self._playing:
+            if self._ring.size >= self._prebuffer_bytes or (self._eof and self._ring.size):
+                self._playing = True
+            else:
+                self._fill_silence(out, 0)
+                if self._eof and not self._ring.size:
+                    self._notify(self._drained)
+                return
+
+        n = self._ring.read_into(out)
+        self.bytes_played += n
+        if n < len(out):
+            self._fill_silence(out, n)
+            if self._eof:
+                self._notify(self._drained)
+            else:
+                # Starved mid-stream: count it and rebuffer up to the watermark.
+                self.underruns += 1
+                self._playing = False
+
+        if self._writer_waiting:
+            self._notify(self._space)
+
+    def _fill_silence(self, out: memoryview, start: int) -> None:
+        missing = len(out) - start
+        if len(self._silence) < missing:
+            self._silence = bytes(missing)
+        out[start:] = self._silence[:missing]
+
+    def stats_line(self) -> str:
+        seconds = self.bytes_played / self.fmt.bytes_per_second
+        return f"Playback: {seconds:.1f}s played, {self.underruns} underrun(s), {self.overruns} overrun(s)."
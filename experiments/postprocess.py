@@ -0,0 +1,306 @@
+"""Streaming post-processing of synthesized PCM16: silence trimming, loudness normalization, crossfades.
+
+`AudioPostProcessor` works on 10 ms blocks, as chunks arrive:
+
+- Silence trimming: a block is silent when its RMS level is below
+  `silence_threshold_db`. Silence before the first speech is dropped, except
+  the last `keep_silence_ms`, so audible audio starts with the first chunk that
+  carries speech. Pauses inside speech are held back while they last: if speech
+  resumes, they are emitted, shortened to `max_pause_ms`. If the segment ends
+  instead, only `keep_silence_ms` of the pause is kept.
+- Loudness normalization: the speech level (RMS of voiced blocks, averaged over
+  `level_window_seconds`) is steered towards `target_db` dBFS. The gain is
+  limited to `max_gain_db` either way and changes by at most
+  `max_gain_change_db_per_second`, ramping linearly within each block. A peak
+  guard keeps the output below `ceiling_db`, so loud passages are not clipped.
+  The level carries over between segments. Audio from a different model,
+  voice or Cloud TTS therefore ends up at the same loudness.
+- Crossfades: `next_segment()` marks where one clip ends and the next begins.
+  The end of one segment and the start of the next overlap by `crossfade_ms`
+  with an equal-power fade, instead of being butted together.
+
+Added latency is one block plus the crossfade tail (about 20 ms). Only
+pauses are held for longer, and only until speech resumes. The processing is
+NumPy-vectorized per chunk, with one scalar step per block for the gain and
+silence decisions.
+
+Usage:
+  uv run python -m experiments.postprocess input.wav output.wav --target-db -20
+  uv run speak --postprocess -t "Hello there."
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import wave
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass
+
+import numpy as np
+
+from experiments.pcm_audio import PcmFormat
+
+_BLOCK_SECONDS = 0.01
+
+
+@dataclass(frozen=True)
+class PostProcessSettings:
+    trim_silence: bool = True
+    silence_threshold_db: float = -45.0  # Block RMS, dBFS
+    keep_silence_ms: int = 40  # Kept before the first speech and after the last
+    max_pause_ms: int = 600  # Longer pauses inside speech are shortened to this
+    normalize: bool = True
+    target_db: float = -20.0  # Speech RMS, dBFS
+    max_gain_db: float = 12.0
+    max_gain_change_db_per_second: float = 30.0
+    level_window_seconds: float = 1.5
+    ceiling_db: float = -1.0  # Peak limit after gain, dBFS
+    crossfade_ms: int = 10
+
+
+DEFAULT_SETTINGS = PostProcessSettings()
+
+
+def _db(value: float) -> float:
+    return 20 * math.log10(value) if value > 0 else -math.inf
+
+
+class AudioPostProcessor:
+    """Processes one PCM16 stream made of one or more segments; `flush()` at the end."""
+
+    def __init__(self, fmt: PcmFormat, settings: PostProcessSettings = DEFAULT_SETTINGS) -> None:
+        if fmt.sample_width_bytes != 2:
+            raise ValueError("AudioPostProcessor only processes 16-bit PCM")
+        self.fmt = fmt
+        self.settings = settings
+        self._block = max(1, round(fmt.sample_rate_hz * _BLOCK_SECONDS))
+        self._frame_bytes = fmt.channels * 2
+        self._keep_blocks = settings.keep_silence_ms // 10
+        self._max_pause_blocks = max(self._keep_blocks, settings.max_pause_ms // 10)
+        self._crossfade = fmt.sample_rate_hz * settings.crossfade_ms // 1000
+        self._partial = b""  # Bytes short of a whole block
+        self._speaking = False  # Speech seen in the current segment
+        self._silence: list[np.ndarray] = []  # Silent blocks held back
+        self._level_power: float | None = None  # Running mean square of voiced blocks
+        self._gain_db = 0.0
+        self._tail = np.zeros((0, fmt.channels))  # Last output samples, held for a crossfade
+        self._fade_pending = False
+        self._fade_head = np.zeros((0, fmt.channels))
+        self.trimmed_leading_seconds = 0.0  # Of the first segment: time to first audio saved
+        self.trimmed_silence_seconds = 0.0  # All silence removed
+        self.segments = 1
+
+    @property
+    def gain_db(self) -> float:
+        return self._gain_db
+
+    def process(self, pcm: bytes | memoryview) -> bytes:
+        data = self._partial + bytes(pcm)
+        size = self._block * self._frame_bytes
+        whole = len(data) - len(data) % size
+        self._partial = data[whole:]
+        if not whole:
+            return b""
+        samples = np.frombuffer(data[:whole], dtype="<i2").astype(np.float64).reshape(-1, self._block, self.fmt.channels)
+        return self._emit(self._blocks(samples))
+
+    def next_segment(self) -> bytes:
+        """Ends the current segment (its trailing silence is trimmed); the next one is crossfaded onto it."""
+        out = self._end_segment()
+        if len(self._tail) or self._fade_pending:
+            self._fade_pending = True
+        self._speaking = False
+        self.segments += 1
+        return self._emit(out)
+
+    def flush(self) -> bytes:
+        """Ends the stream: trims the final silence and releases the held-back tail."""
+        out = self._emit(self._end_segment(), final=True)
+        return out
+
+    def stats_line(self) -> str:
+        return (
+            f"Post-processing: trimmed {self.trimmed_leading_seconds * 1000:.0f} ms of leading silence "
+            f"({self.trimmed_silence_seconds:.2f}s in total), gain {self._gain_db:+.1f} dB, {self.segments} segment(s)"
+        )
+
+    def _end_segment(self) -> np.ndarray:
+        pieces = []
+        if self._partial:
+            # A short last block: it is trimmed or kept as a whole with the pause before it.
+            rest = np.frombuffer(self._partial, dtype="<i2").astype(np.float64).reshape(-1, self.fmt.channels)
+            self._partial = b""
+            if self._voiced(rest) or not self.settings.trim_silence:
+                pieces = [*self._silence, rest]
+                self._silence = []
+            else:
+                self.trimmed_silence_seconds += len(rest) / self.fmt.sample_rate_hz
+        if self._silence:
+            kept = self._silence[: self._keep_blocks] if self._speaking else []
+            self._count_trimmed(len(self._silence) - len(kept), leading=not self._speaking)
+            pieces = kept + pieces
+            self._silence = []
+        if not pieces:
+            return np.zeros((0, self.fmt.channels))
+        return self._apply_gain(pieces)
+
+    def _voiced(self, samples: np.ndarray) -> bool:
+        rms = math.sqrt(float(np.mean(np.square(samples)))) if samples.size else 0.0
+        return _db(rms / 32768) > self.settings.silence_threshold_db
+
+    def _count_trimmed(self, blocks: int, *, leading: bool) -> None:
+        seconds = blocks * self._block / self.fmt.sample_rate_hz
+        self.trimmed_silence_seconds += seconds
+        if leading and self.segments == 1:
+            self.trimmed_leading_seconds += seconds
+
+    def _blocks(self, blocks: np.ndarray) -> np.ndarray:
+        """Trims silence from whole blocks and applies the gain; returns the samples to emit."""
+        power = np.mean(np.square(blocks), axis=(1, 2))
+        voiced = 10 * np.log10(np.maximum(power, 1e-12) / 32768**2) > self.settings.silence_threshold_db
+        keep: list[np.ndarray] = []
+        for block, is_voiced in zip(blocks, voiced):
+            if not self.settings.trim_silence:
+                keep.append(block)
+            elif is_voiced:
+                if not self._speaking:
+                    self._count_trimmed(max(0, len(self._silence) - self._keep_blocks), leading=True)
+                    self._silence = self._silence[-self._keep_blocks :] if self._keep_blocks else []
+                elif len(self._silence) > self._max_pause_blocks:
+                    self._count_trimmed(len(self._silence) - self._max_pause_blocks, leading=False)
+                    half = self._max_pause_blocks // 2
+                    self._silence = self._silence[:half] + self._silence[len(self._silence) - (self._max_pause_blocks - half) :]
+                self._speaking = True
+                keep.extend(self._silence)
+                self._silence = []
+                keep.append(block)
+            else:
+                self._silence.append(block)
+                if not self._speaking and len(self._silence) > self._keep_blocks:
+                    self._count_trimmed(1, leading=True)
+                    self._silence.pop(0)
+        if not keep:
+            return np.zeros((0, self.fmt.channels))
+        return self._apply_gain(keep)
+
+    def _apply_gain(self, pieces: list[np.ndarray]) -> np.ndarray:
+        """Applies the normalizing gain to consecutive blocks, ramping it within each one."""
+        s = self.settings
+        if not s.normalize:
+            return np.concatenate(pieces)
+        step_db = s.max_gain_change_db_per_second * _BLOCK_SECONDS
+        alpha = min(1.0, _BLOCK_SECONDS / s.level_window_seconds)
+        ceiling = 32768 * 10 ** (s.ceiling_db / 20)
+        out = []
+        for piece in pieces:
+            power = float(np.mean(np.square(piece))) if piece.size else 0.0
+            if 10 * math.log10(max(power, 1e-12) / 32768**2) > s.silence_threshold_db:
+                self._level_power = power if self._level_power is None else self._level_power + alpha * (power - self._level_power)
+            start_db = self._gain_db
+            if self._level_power:
+                wanted = s.target_db - _db(math.sqrt(self._level_power) / 32768)
+                wanted = max(-s.max_gain_db, min(s.max_gain_db, wanted))
+                self._gain_db = max(start_db - step_db, min(start_db + step_db, wanted))
+            peak = float(np.max(np.abs(piece))) if piece.size else 0.0
+            if peak and _db(peak * 10 ** (self._gain_db / 20)) > _db(ceiling):
+                self._gain_db = _db(ceiling / peak)
+                start_db = min(start_db, self._gain_db)  # No ramp up into a peak
+            ramp = np.linspace(10 ** (start_db / 20), 10 ** (self._gain_db / 20), len(piece), endpoint=False)
+            out.append(piece * ramp[:, None])
+        return np.concatenate(out)
+
+    def _emit(self, samples: np.ndarray, *, final: bool = False) -> bytes:
+        if self._fade_pending and len(samples):
+            self._fade_head = np.concatenate([self._fade_head, samples])
+            samples = np.zeros((0, self.fmt.channels))
+            if len(self._fade_head) >= self._crossfade or final:
+                n = min(len(self._tail), len(self._fade_head))
+                t = np.linspace(0, math.pi / 2, n, endpoint=False)[:, None]
+                mixed = self._tail[len(self._tail) - n :] * np.cos(t) + self._fade_head[:n] * np.sin(t)
+                samples = np.concatenate([mixed, self._fade_head[n:]])
+                self._tail = self._tail[: len(self._tail) - n]
+                self._fade_head = np.zeros((0, self.fmt.channels))
+                self._fade_pending = False
+        elif final and self._fade_pending:
+            self._fade_pending = False
+        buffered = np.concatenate([self._tail, samples])
+        hold = 0 if final else min(self._crossfade, len(buffered))
+        self._tail = buffered[len(buffered) - hold :]
+        pcm: bytes = np.clip(np.rint(buffered[: len(buffered) - hold]), -32768, 32767).astype("<i2").tobytes()
+        return pcm
+
+
+def postprocess_clip(pcm: bytes, fmt: PcmFormat, settings: PostProcessSettings = DEFAULT_SETTINGS) -> bytes:
+    """Processes a whole clip in one go."""
+    processor = AudioPostProcessor(fmt, settings)
+    return processor.process(pcm) + processor.flush()
+
+
+def postprocess_segments(segments: Iterable[bytes], fmt: PcmFormat, settings: PostProcessSettings = DEFAULT_SETTINGS) -> Iterator[bytes]:
+    """Joins clips into one stream, trimmed, normalized and crossfaded at the seams."""
+    processor = AudioPostProcessor(fmt, settings)
+    for index, segment in enumerate(segments):
+        if index and (out := processor.next_segment()):
+            yield out
+        if out := processor.process(segment):
+            yield out
+    if tail := processor.flush():
+        yield tail
+
+
+async def postprocess_stream(chunks: AsyncIterator[bytes], processor: AudioPostProcessor) -> AsyncIterator[bytes]:
+    """Runs a chunk stream through `processor`, skipping chunks that produce no output yet."""
+    async for chunk in chunks:
+        if out := processor.process(chunk):
+            yield out
+    if tail := processor.flush():
+        yield tail
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trim silence, normalize loudness and crossfade 16-bit PCM WAV files.")
+    parser.add_argument("inputs", nargs="+", help="Input WAV file(s); several are joined with crossfades")
+    parser.add_argument("output", help="Output WAV file")
+    parser.add_argument("--target-db", type=float, default=DEFAULT_SETTINGS.target_db, help="Speech loudness target, dBFS RMS (default: %(default)s)")
+    parser.add_argument("--threshold-db", type=float, default=DEFAULT_SETTINGS.silence_threshold_db, help="Blocks quieter than this are silence (default: %(default)s)")
+    parser.add_argument("--crossfade-ms", type=int, default=DEFAULT_SETTINGS.crossfade_ms, help="Overlap between joined files (default: %(default)s)")
+    parser.add_argument("--no-trim", action="store_true", help="Keep silence")
+    parser.add_argument("--no-normalize", action="store_true", help="Keep the original level")
+    args = parser.parse_args()
+
+    from experiments.wav_stream import StreamingWavWriter
+
+    settings = PostProcessSettings(
+        trim_silence=not args.no_trim,
+        silence_threshold_db=args.threshold_db,
+        normalize=not args.no_normalize,
+        target_db=args.target_db,
+        crossfade_ms=args.crossfade_ms,
+    )
+    clips: list[bytes] = []
+    fmt: PcmFormat | None = None
+    try:
+        for path in args.inputs:
+            with wave.open(path, "rb") as source:
+                clip_fmt = PcmFormat(source.getframerate(), source.getnchannels(), source.getsampwidth())
+                if fmt is not None and clip_fmt != fmt:
+                    raise ValueError(f"{path} is {clip_fmt}, the first input is {fmt}")
+                fmt = clip_fmt
+                clips.append(source.readframes(source.getnframes()))
+        assert fmt is not None
+        processor = AudioPostProcessor(fmt, settings)
+        with StreamingWavWriter(args.output, fmt) as out:
+            for index, clip in enumerate(clips):
+                if index:
+                    out.write(processor.next_segment())
+                out.write(processor.process(clip))
+            out.write(processor.flush())
+    except (OSError, ValueError, wave.Error) as e:
+        raise SystemExit(f"Error: {e}")
+    total = sum(len(clip) for clip in clips) / fmt.bytes_per_second
+    print(f"{total:.2f}s in -> {out.data_bytes / fmt.bytes_per_second:.2f}s out. {processor.stats_line()}")
+
+
+if __name__ == "__main__":
+    main()
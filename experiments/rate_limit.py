@@ -0,0 +1,328 @@
+"""Quota-aware rate limiting and retries, shared by every backend.
+
+A 429 or 503 from `generate_content`, `live.connect`, `recognize` or
+`synthesize_speech` used to end the run. `QuotaLimiter` wraps each call
+instead:
+
+- Token buckets (`TokenBucket`): one per key, at `rpm` requests per minute
+  with bursts of up to `burst`. A key is a model, or a Cloud API such as
+  "cloud-tts" or "chirp", so it follows the quota it is billed against.
+  `project_rpm` adds one bucket shared by all keys. This is the batch mode's
+  --rpm ceiling, which counts every stage together.
+- Retries with full-jitter exponential backoff (`Backoff`). They cover
+  throttling (429 / RESOURCE_EXHAUSTED, 503 / UNAVAILABLE), transient server
+  errors and dropped connections. When the server sends a retry hint (a
+  RetryInfo `retryDelay`, or a Retry-After header), the wait is at least that
+  long. Any other error is raised at once.
+- A concurrency governor per key (`ConcurrencyGovernor`, AIMD). Throttling
+  halves the number of calls allowed in flight. Each success grows it again
+  by 1/limit, so roughly one more call is allowed per round of successes.
+  Under load, the process settles just below the quota instead of thrashing
+  on errors.
+
+Streams (`QuotaLimiter.stream`) are retried only until they yield their first
+item. After that a failure is raised to the caller, which already has part of
+the output. Blocking calls made on worker threads (`call_blocking`) get the
+buckets and the retries but not the governor, since their thread pools set
+the concurrency.
+
+`QUOTA` is the process-wide instance that the scripts use. It is configured
+from the environment:
+- SPEAK_RPM: requests per minute per key; 0, the default, means unlimited.
+- SPEAK_MAX_RETRIES: default 5.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MAX_CONCURRENCY = 16
+THROTTLE_COOLDOWN_SECONDS = 1.0  # Throttling errors within this window count as one
+
+# HTTP statuses (and Live API WebSocket close codes) worth retrying, and those that mean "slow down".
+RETRYABLE_CODES = frozenset({429, 500, 502, 503, 504, 1011, 1013})
+THROTTLING_CODES = frozenset({429, 503, 1013})
+RETRYABLE_STATUSES = frozenset({"RESOURCE_EXHAUSTED", "UNAVAILABLE", "INTERNAL", "DEADLINE_EXCEEDED"})
+THROTTLING_STATUSES = frozenset({"RESOURCE_EXHAUSTED", "UNAVAILABLE"})
+
+
+def _status(error: BaseException) -> tuple[int | None, str]:
+    """(HTTP-like code, canonical status name) of a google-genai, google-api-core or gRPC error."""
+    code = getattr(error, "code", None)
+    status = getattr(error, "status", None)
+    if callable(code):  # grpc.RpcError: code() returns a StatusCode
+        with contextlib.suppress(Exception):
+            status = code().name
+        code = None
+    return (int(code) if isinstance(code, int) else None), (status if isinstance(status, str) else "")
+
+
+def is_throttling(error: BaseException) -> bool:
+    code, status = _status(error)
+    return code in THROTTLING_CODES or status in THROTTLING_STATUSES
+
+
+def is_retryable(error: BaseException) -> bool:
+    code, status = _status(error)
+    if code in RETRYABLE_CODES or status in RETRYABLE_STATUSES:
+        return True
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def retry_after(error: BaseException) -> float | None:
+    """The server's retry hint in seconds: a Retry-After header, or RetryInfo in the error details."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None and hasattr(headers, "get") else None
+    if value:
+        with contextlib.suppress(ValueError):
+            return max(0.0, float(value))
+    return _find_retry_delay(getattr(error, "details", None))
+
+
+def _find_retry_delay(details: Any) -> float | None:
+    if isinstance(details, dict):
+        delay = details.get("retryDelay")  # google-genai: JSON error body
+        if isinstance(delay, str) and delay.endswith("s"):
+            with contextlib.suppress(ValueError):
+                return max(0.0, float(delay[:-1]))
+        items: Any = details.values()
+    elif isinstance(details, (list, tuple)):
+        items = details
+    else:
+        delay = getattr(details, "retry_delay", None)  # google-api-core: RetryInfo protos
+        if delay is not None and hasattr(delay, "seconds"):
+            return float(delay.seconds) + getattr(delay, "nanos", 0) / 1e9
+        return None
+    for item in items:
+        if (found := _find_retry_delay(item)) is not None:
+            return found
+    return None
+
+
+@dataclass(frozen=True)
+class Backoff:
+    base_seconds: float = 1.0
+    max_seconds: float = 60.0
+    retries: int = 5
+
+    def delay(self, attempt: int, hint: float | None = None, rng: random.Random | None = None) -> float:
+        """Seconds to wait before retry number `attempt` + 1 (full jitter), or after the server's hint."""
+        uniform = rng.uniform if rng else random.uniform
+        if hint is not None:
+            return hint + uniform(0, self.base_seconds)  # Spread out callers given the same hint
+        return uniform(0, min(self.max_seconds, self.base_seconds * 2**attempt))
+
+
+DEFAULT_BACKOFF = Backoff()
+
+
+class TokenBucket:
+    """At most `rpm` request starts per minute on average, bursts of up to `burst` (0 disables it). Thread-safe."""
+
+    def __init__(self, rpm: float, burst: int = 1) -> None:
+        self.rpm = rpm
+        self._interval = 60.0 / rpm if rpm > 0 else 0.0
+        self._burst_window = (max(1, burst) - 1) * self._interval
+        self._next = 0.0  # Start of the next free slot; up to `burst` slots can be taken ahead of it
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes a token now or reserves the next one; returns the seconds to wait for it."""
+        if not self._interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self._interval
+            return max(0.0, slot - self._burst_window - now)
+
+    async def acquire(self) -> None:
+        # Reserving before sleeping makes concurrent callers queue up behind each other.
+        if wait := self._reserve():
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self) -> None:
+        if wait := self._reserve():
+            time.sleep(wait)
+
+
+class ConcurrencyGovernor:
+    """AIMD limit on calls in flight: halved on throttling, +1/limit per success, within [minimum, maximum]."""
+
+    def __init__(self, maximum: int = DEFAULT_MAX_CONCURRENCY, minimum: int = 1) -> None:
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._last_cut = -THROTTLE_COOLDOWN_SECONDS
+        self._waiters: list[asyncio.Future[None]] = []
+
+    async def acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()  # Pass the wake-up on to the next waiter
+                raise
+            finally:
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def throttled(self) -> None:
+        now = time.monotonic()
+        if now - self._last_cut >= THROTTLE_COOLDOWN_SECONDS:  # One burst of 429s is one signal
+            self._last_cut = now
+            self.limit = max(float(self.minimum), self.limit / 2)
+
+    def succeeded(self) -> None:
+        if self.limit < self.maximum:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._wake()
+
+    def _wake(self) -> None:
+        for waiter in self._waiters[: max(0, int(self.limit) - self.in_flight)]:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class QuotaLimiter:
+    """Rate limits, retries and governs the calls made under each key (see the module docstring)."""
+
+    def __init__(
+        self,
+        *,
+        rpm: float = 0,
+        burst: int = 1,
+        project_rpm: float = 0,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        backoff: Backoff = DEFAULT_BACKOFF,
+        rng: random.Random | None = None,
+        verbose: bool = True,
+    ) -> None:
+        self.rpm = rpm
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.backoff = backoff
+        self.verbose = verbose
+        self._rng = rng or random.Random()
+        self._project = TokenBucket(project_rpm) if project_rpm > 0 else None
+        self._buckets: dict[str, TokenBucket] = {}
+        self._governors: dict[str, ConcurrencyGovernor] = {}
+        self.retries = 0  # Retries made
+        self.throttled = 0  # Throttling errors seen
+
+    def bucket(self, key: str) -> TokenBucket:
+        if (bucket := self._buckets.get(key)) is None:
+            bucket = self._buckets.setdefault(key, TokenBucket(self.rpm, self.burst))
+        return bucket
+
+    def governor(self, key: str) -> ConcurrencyGovernor:
+        if (governor := self._governors.get(key)) is None:
+            governor = self._governors.setdefault(key, ConcurrencyGovernor(self.max_concurrency))
+        return governor
+
+    def stats_line(self) -> str:
+        limits = ", ".join(f"{key} {g.limit:.1f}" for key, g in sorted(self._governors.items()) if g.limit < g.maximum)
+        return f"Quota: {self.retries} retr{'y' if self.retries == 1 else 'ies'}, {self.throttled} throttled" + (f"; concurrency reduced: {limits}" if limits else "")
+
+    def _retry_delay(self, key: str, error: BaseException, attempt: int, *, govern: bool = True) -> float | None:
+        """Seconds to wait before retrying after `error`, or None to give up."""
+        if attempt >= self.backoff.retries or not is_retryable(error):
+            return None
+        if is_throttling(error):
+            self.throttled += 1
+            if govern:
+                self.governor(key).throttled()
+        delay = self.backoff.delay(attempt, retry_after(error), self._rng)
+        self.retries += 1
+        if self.verbose:
+            detail = getattr(error, "message", None) or str(error) or "no details"
+            print(f"{key}: {type(error).__name__}: {detail[:120]}; retry {attempt + 1}/{self.backoff.retries} in {delay:.1f}s", file=sys.stderr)
+        return delay
+
+    async def _admit(self, key: str) -> ConcurrencyGovernor:
+        if self._project:
+            await self._project.acquire()
+        await self.bucket(key).acquire()
+        governor = self.governor(key)
+        await governor.acquire()
+        return governor
+
+    async def call(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Awaits `fn()` under the key's limits, retrying it on throttling and transient errors."""
+        attempt = 0
+        while True:
+            governor = await self._admit(key)
+            try:
+                result = await fn()
+            except Exception as e:
+                if (delay := self._retry_delay(key, e, attempt)) is None:
+                    raise
+            else:
+                governor.succeeded()
+                return result
+            finally:
+                governor.release()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def stream(self, key: str, start: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Yields from `start()` under the key's limits; retries with a new `start()` until the first item."""
+        attempt = 0
+        while True:
+            governor = await self._admit(key)
+            items = start()
+            started = False
+            try:
+                async for item in items:
+                    if not started:
+                        started = True
+                        governor.succeeded()
+                    yield item
+                return
+            except Exception as e:
+                if started or (delay := self._retry_delay(key, e, attempt)) is None:
+                    raise
+            finally:
+                governor.release()
+                if aclose := getattr(items, "aclose", None):
+                    await aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def call_blocking(self, key: str, fn: Callable[[], T]) -> T:
+        """Thread-side `call`: rate limits and retries `fn()`, sleeping in the calling thread."""
+        attempt = 0
+        while True:
+            if self._project:
+                self._project.acquire_blocking()
+            self.bucket(key).acquire_blocking()
+            try:
+                return fn()
+            except Exception as e:
+                if (delay := self._retry_delay(key, e, attempt, govern=False)) is None:
+                    raise
+            attempt += 1
+            time.sleep(delay)
+
+
+QUOTA = QuotaLimiter(rpm=float(os.environ.get("SPEAK_RPM") or 0), backoff=Backoff(retries=int(os.environ.get("SPEAK_MAX_RETRIES") or DEFAULT_BACKOFF.retries)))
@@ -0,0 +1,155 @@
+"""Zero-copy replay of stored audio through the playback jitter buffer.
+
+`open_mapped_audio` memory-maps a PCM16 WAV (or a headerless .pcm file) and
+exposes its samples as a `memoryview`; only the RIFF chunk headers are parsed.
+`play_view` hands slices of that view straight to `JitterBufferPlayer.write`,
+which copies them into its ring buffer: the file is never read into Python
+bytes, pages are faulted in just ahead of playback, and seeking is slicing.
+Start-up cost is independent of the file's length, so multi-hour recordings
+start as fast as short ones.
+
+WAV files cut short by a crash (see `StreamingWavWriter`) play up to their last
+whole frame, whatever their header says.
+
+Usage:
+  uv run speak --replay gemini_live_output.wav
+  uv run speak --replay meeting.wav --seek 1:02:30
+  uv run speak --replay turn.pcm --seek 90
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+import time
+from dataclasses import dataclass
+from typing import Self
+
+from experiments.pcm_audio import GEMINI_PCM_FORMAT, PcmFormat
+from experiments.playback import DEFAULT_PREBUFFER_SECONDS, JitterBufferPlayer
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass
+class MappedAudio:
+    path: str
+    fmt: PcmFormat
+    data: memoryview  # Whole frames of PCM, backed by the mapping
+    _map: mmap.mmap
+
+    @property
+    def duration_seconds(self) -> float:
+        return len(self.data) / self.fmt.bytes_per_second
+
+    def slice(self, start_seconds: float = 0.0, end_seconds: float | None = None) -> memoryview:
+        """Frame-aligned view of the audio between the two offsets (no copy)."""
+        frame = self.fmt.channels * self.fmt.sample_width_bytes
+        start = min(len(self.data), int(max(0.0, start_seconds) * self.fmt.bytes_per_second) // frame * frame)
+        end = len(self.data) if end_seconds is None else min(len(self.data), int(end_seconds * self.fmt.bytes_per_second) // frame * frame)
+        return self.data[start:max(start, end)]
+
+    def close(self) -> None:
+        self.data.release()
+        self._map.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _wav_layout(mapped: mmap.mmap, path: str) -> tuple[PcmFormat, int, int]:
+    """(format, data offset, data bytes) of a PCM16 WAV, from its chunk headers."""
+    if len(mapped) < 12 or mapped[:4] != b"RIFF" or mapped[8:12] != b"WAVE":
+        raise ValueError(f"{path} is not a WAV file")
+    fmt: PcmFormat | None = None
+    position = 12
+    while position + 8 <= len(mapped):
+        chunk_id, size = struct.unpack_from("<4sI", mapped, position)
+        body = position + 8
+        if chunk_id == b"fmt ":
+            tag, channels, rate = struct.unpack_from("<HHI", mapped, body)
+            bits = struct.unpack_from("<H", mapped, body + 14)[0]
+            if tag == _WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                tag = struct.unpack_from("<H", mapped, body + 24)[0]  # First bytes of the subformat GUID
+            if tag != _WAVE_FORMAT_PCM or bits != 16:
+                raise ValueError(f"{path}: replay needs 16-bit PCM WAV (format tag {tag}, {bits}-bit)")
+            fmt = PcmFormat(sample_rate_hz=rate, channels=channels)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError(f"{path}: data chunk before fmt chunk")
+            available = len(mapped) - body
+            # 0 / 0xFFFFFFFF / too large: a header that was never patched, use what is on disk.
+            length = size if 0 < size <= available else available
+            return fmt, body, length
+        position = body + size + (size & 1)
+    raise ValueError(f"{path}: no data chunk")
+
+
+def open_mapped_audio(path: str, raw_fmt: PcmFormat = GEMINI_PCM_FORMAT) -> MappedAudio:
+    """Maps a PCM16 WAV file, or a headerless PCM file in `raw_fmt`, read-only."""
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError(f"{path} is empty") from None
+    try:
+        if mapped[:4] == b"RIFF":
+            fmt, offset, length = _wav_layout(mapped, path)
+        else:
+            fmt, offset, length = raw_fmt, 0, len(mapped)
+    except BaseException:
+        mapped.close()
+        raise
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    length -= length % (fmt.channels * fmt.sample_width_bytes)
+    return MappedAudio(path, fmt, memoryview(mapped)[offset : offset + length], mapped)
+
+
+def parse_time_offset(value: str) -> float:
+    """Seconds from "90", "1:30" or "1:02:30.5"."""
+    seconds = 0.0
+    for part in value.split(":"):
+        seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(f"negative time offset: {value}")
+    return seconds
+
+
+async def play_view(view: memoryview, player: JitterBufferPlayer) -> None:
+    """Feeds `view` to a started player and waits until it has been played out."""
+    try:
+        # write() copies as much as fits into the ring and waits for room; no other copy is made.
+        await player.write(view)
+        await player.finish()
+    except BaseException:
+        player.close()
+        raise
+
+
+async def replay_file(path: str, *, seek_seconds: float = 0.0, raw_fmt: PcmFormat = GEMINI_PCM_FORMAT, prebuffer_seconds: float = DEFAULT_PREBUFFER_SECONDS, started: float | None = None) -> bool:
+    """Plays `path` from `seek_seconds`; returns False if no audio output is available."""
+    from experiments.gemini_live_audio import open_player
+
+    started = time.perf_counter() if started is None else started
+    with open_mapped_audio(path, raw_fmt) as audio:
+        if seek_seconds >= audio.duration_seconds:
+            raise ValueError(f"{path} is only {audio.duration_seconds:.1f}s long (seek to {seek_seconds:.1f}s)")
+        player = open_player(audio.fmt, prebuffer_seconds)
+        if player is None:
+            return False
+        view = audio.slice(seek_seconds)
+        print(
+            f"Replaying {path} from {seek_seconds:.1f}s of {audio.duration_seconds:.1f}s "
+            f"({audio.fmt.sample_rate_hz} Hz, {audio.fmt.channels}ch), ready in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        try:
+            await play_view(view, player)
+        finally:
+            view.release()
+        print(player.stats_line())
+    return True
@@ -0,0 +1,205 @@
+"""Streaming sample-rate and channel conversion for PCM16, in NumPy.
+
+`StreamingResampler` converts between any two `PcmFormat`s chunk by chunk:
+
+- Rates are converted with a polyphase windowed-sinc filter for the reduced
+  ratio up/down (24000 -> 16000 is 2/3, 24000 -> 44100 is 147/80). Each output
+  sample is a dot product of one filter phase with the input taps around it,
+  computed for a whole chunk at once.
+- The last input samples are kept between calls, so chunk boundaries are
+  seamless: feeding a stream in any chunking gives the same output as
+  converting it in one piece. `flush()` emits the tail held back as look-ahead.
+- Channels are down-mixed by averaging or up-mixed by duplicating mono.
+- Large inputs (a whole clip from the cache or a replayed file) are converted
+  in 100 ms blocks, so the working memory does not grow with the input.
+
+`JitterBufferPlayer` uses it when the output device cannot open the source
+format (see `playback.negotiate_output_format`), so the conversion happens here
+instead of in the OS mixer. Chirp streaming uses it to send 16 kHz mono.
+
+Usage:
+  uv run python -m experiments.resample input.wav output.wav --rate 16000 --channels 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import wave
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+
+import numpy as np
+
+from experiments.pcm_audio import PcmFormat
+
+DEFAULT_HALF_TAPS = 16  # Filter taps on each side of an output sample, per phase
+_BLOCK_SECONDS = 0.1  # Input converted per step: the filter window array grows with it
+_KAISER_BETA = 8.6  # About 80 dB stopband attenuation
+
+
+@lru_cache(maxsize=16)
+def _filter_bank(up: int, down: int, half_taps: int) -> np.ndarray:
+    """(up, taps) polyphase bank of a low-pass windowed sinc for the upsampled rate, with gain `up`."""
+    factor = max(up, down)
+    length = 2 * half_taps * factor + 1
+    n = np.arange(length) - (length - 1) / 2
+    cutoff = 0.95 / factor  # Slightly below the lower Nyquist frequency, as a fraction of the upsampled one
+    h = cutoff * np.sinc(cutoff * n) * np.kaiser(length, _KAISER_BETA) * up
+    taps = math.ceil(length / up)
+    padded = np.zeros(taps * up)
+    padded[:length] = h
+    # bank[p, k] = h[p + k * up]: the taps for input x[j - k] when the output falls on phase p of input j.
+    bank: np.ndarray = padded.reshape(taps, up).T.copy()
+    return bank
+
+
+def _mix_channels(samples: np.ndarray, channels: int) -> np.ndarray:
+    if samples.shape[1] == channels:
+        return samples
+    if channels == 1:
+        mixed: np.ndarray = samples.mean(axis=1, keepdims=True)
+        return mixed
+    mono = samples.mean(axis=1, keepdims=True) if samples.shape[1] != 1 else samples
+    repeated: np.ndarray = np.repeat(mono, channels, axis=1)
+    return repeated
+
+
+class StreamingResampler:
+    """Converts a PCM16 stream from `src` to `dst`; keeps filter state between chunks."""
+
+    def __init__(self, src: PcmFormat, dst: PcmFormat, *, half_taps: int = DEFAULT_HALF_TAPS) -> None:
+        if src.sample_width_bytes != 2 or dst.sample_width_bytes != 2:
+            raise ValueError("StreamingResampler only converts 16-bit PCM")
+        self.src = src
+        self.dst = dst
+        g = math.gcd(src.sample_rate_hz, dst.sample_rate_hz)
+        self.up = dst.sample_rate_hz // g
+        self.down = src.sample_rate_hz // g
+        self.passthrough = src == dst
+        self._frame = src.channels * src.sample_width_bytes
+        self._partial = b""
+        self._work_channels = min(src.channels, dst.channels)  # Down-mixing happens before the filter, up-mixing after
+        if self.up != 1 or self.down != 1:
+            self._bank = _filter_bank(self.up, self.down, half_taps)
+            taps = self._bank.shape[1]
+            # Centre the filter on the output instant; the look-ahead is released by flush().
+            self._delay = (2 * half_taps * max(self.up, self.down)) // 2
+            self._history = np.zeros((taps - 1, self._work_channels))
+            self._history_start = -(taps - 1)  # Input index of self._history[0]
+        self._consumed = 0  # Input frames seen
+        self._produced = 0  # Output frames emitted
+
+    def process(self, pcm: bytes | memoryview) -> bytes:
+        """Converts one chunk; a frame split across chunks is completed by the next one."""
+        if self.passthrough:
+            return bytes(pcm)
+        view = memoryview(pcm).cast("B")
+        block = max(1, round(self.src.sample_rate_hz * _BLOCK_SECONDS)) * self._frame
+        if self._partial:
+            # Complete the split frame first, then continue on frame boundaries.
+            head = min(len(view), self._frame - len(self._partial))
+            data = self._partial + bytes(view[:head])
+            view = view[head:]
+            if len(data) < self._frame:
+                self._partial = data
+                return b""
+            self._partial = b""
+            pieces = [self._process_frames(data)]
+        else:
+            pieces = []
+        whole = len(view) - len(view) % self._frame
+        pieces += [self._process_frames(view[start : min(start + block, whole)]) for start in range(0, whole, block)]
+        self._partial = bytes(view[whole:])
+        return b"".join(pieces)
+
+    def _process_frames(self, data: bytes | memoryview) -> bytes:
+        samples = np.frombuffer(data, dtype="<i2").reshape(-1, self.src.channels).astype(np.float64)
+        if self.dst.channels < self.src.channels:
+            samples = _mix_channels(samples, self.dst.channels)
+        return self._emit(self._resample(samples))
+
+    def flush(self) -> bytes:
+        """Ends the stream: emits the output still waiting for look-ahead, padding the input with silence."""
+        if self.passthrough or (self.up == 1 and self.down == 1):
+            return b""
+        total = math.ceil(self._consumed * self.up / self.down)
+        before = self._produced
+        if before >= total:
+            return b""
+        out = self._resample(np.zeros((self._delay // self.up + 2, self._work_channels)))[: total - before]
+        self._produced = total
+        return self._emit(out)
+
+    def _resample(self, samples: np.ndarray) -> np.ndarray:
+        if self.up == 1 and self.down == 1:
+            self._consumed += len(samples)
+            return samples
+        buffer = np.concatenate([self._history, samples])
+        self._consumed += len(samples)
+        taps = self._bank.shape[1]
+        # Output n needs input up to j = (n * down + delay) // up.
+        last = self._consumed * self.up - 1 - self._delay
+        count = last // self.down - self._produced + 1 if last >= 0 else 0
+        if count > 0:
+            n = np.arange(self._produced, self._produced + count)
+            position = n * self.down + self._delay
+            j = position // self.up - self._history_start
+            phase = position % self.up
+            window = buffer[j[:, None] - np.arange(taps)[None, :]]  # (count, taps, channels)
+            out: np.ndarray = np.einsum("nkc,nk->nc", window, self._bank[phase])
+            self._produced += count
+        else:
+            out = np.zeros((0, buffer.shape[1]))
+        keep = taps - 1
+        self._history = buffer[len(buffer) - keep :] if keep else buffer[:0]
+        self._history_start = self._consumed - keep
+        return out
+
+    def _emit(self, samples: np.ndarray) -> bytes:
+        if self.dst.channels > samples.shape[1]:
+            samples = _mix_channels(samples, self.dst.channels)
+        pcm: bytes = np.clip(np.rint(samples), -32768, 32767).astype("<i2").tobytes()
+        return pcm
+
+
+def resample_chunks(chunks: Iterable[bytes], src: PcmFormat, dst: PcmFormat) -> Iterator[bytes]:
+    """Lazily converts a stream of PCM chunks from `src` to `dst`."""
+    resampler = StreamingResampler(src, dst)
+    for chunk in chunks:
+        if out := resampler.process(chunk):
+            yield out
+    if tail := resampler.flush():
+        yield tail
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert a 16-bit PCM WAV file to another sample rate / channel count.")
+    parser.add_argument("input", help="16-bit PCM WAV file")
+    parser.add_argument("output", help="Output WAV file")
+    parser.add_argument("--rate", type=int, required=True, help="Output sample rate in Hz")
+    parser.add_argument("--channels", type=int, help="Output channel count (default: same as input)")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Conversion chunk length, as a stream would deliver it (default: %(default)s)")
+    args = parser.parse_args()
+
+    import time
+
+    from experiments.wav_stream import StreamingWavWriter
+
+    with wave.open(args.input, "rb") as source:
+        if source.getsampwidth() != 2:
+            raise SystemExit(f"Error: {args.input} is not 16-bit PCM")
+        src = PcmFormat(source.getframerate(), source.getnchannels())
+        dst = PcmFormat(args.rate, args.channels or src.channels)
+        frames = max(1, src.sample_rate_hz * args.chunk_ms // 1000)
+        started = time.perf_counter()
+        with StreamingWavWriter(args.output, dst) as out:
+            for chunk in resample_chunks(iter(lambda: source.readframes(frames), b""), src, dst):
+                out.write(chunk)
+        elapsed = time.perf_counter() - started
+    seconds = out.data_bytes / dst.bytes_per_second
+    print(f"{src.sample_rate_hz} Hz {src.channels}ch -> {dst.sample_rate_hz} Hz {dst.channels}ch: {seconds:.1f}s of audio in {elapsed * 1000:.0f} ms ({seconds / elapsed if elapsed else 0:.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""Latency-aware routing of synthesis requests across backends, models and API versions.
+
+Each route is a (backend, model, API version, voice) combination. For every
+route the router keeps a rolling window of recent outcomes: time to first
+audio, real-time factor (synthesis wall time / audio duration; below 1 keeps
+up with playback) and whether the request failed. Samples older than
+`max_age_seconds` are dropped, so an endpoint that was slow an hour ago gets a
+fresh chance once its old samples expire. The statistics are saved as JSON and
+shared across runs.
+
+A request goes to the route with the lowest median time to first audio among
+the healthy routes that satisfy the caller's `RouteConstraints`:
+
+- Routes with fewer than `min_samples` samples are tried first, so every
+  route gets measured.
+- A route is unhealthy while its error rate is above `max_error_rate`, or for
+  `cooldown_seconds` after `failure_streak` consecutive failures.
+- With probability `explore_rate`, another eligible route is chosen instead,
+  to notice when it has become faster.
+
+`synthesize_routed` hedges the best route with the next best (see
+`experiments.synthesis`) and records what happened to every attempt. Attempts
+that lost the race are recorded with the time they had already waited, a
+lower bound on their latency, so a route that is always overtaken still drops
+in the ranking.
+
+Configuration via environment:
+- SPEAK_ROUTER_STATS: statistics file (default: ~/.cache/speak-to-me/router_stats.json)
+
+Usage:
+  uv run python -m experiments.router speak "Hello there." -o out.wav
+  uv run python -m experiments.router speak "Hello there." --backends live,tts --max-ttfa-ms 2000 --max-rtf 1
+  uv run python -m experiments.router stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from experiments.pcm_audio import GEMINI_PCM_FORMAT
+from experiments.synthesis import (
+    DEFAULT_HEDGE_AFTER_SECONDS,
+    CloudTtsBackend,
+    GenerateContentTtsBackend,
+    HedgeOutcome,
+    LiveBackend,
+    SynthesisBackend,
+    synthesize_hedged,
+)
+
+DEFAULT_STATS_PATH = os.environ.get("SPEAK_ROUTER_STATS") or os.path.join(
+    os.path.expanduser("~"), ".cache", "speak-to-me", "router_stats.json"
+)
+DEFAULT_WINDOW = 50  # Samples kept per route
+DEFAULT_MAX_AGE_SECONDS = 3 * 3600
+DEFAULT_MIN_SAMPLES = 2
+DEFAULT_MAX_ERROR_RATE = 0.5
+DEFAULT_FAILURE_STREAK = 3
+DEFAULT_COOLDOWN_SECONDS = 120.0
+DEFAULT_EXPLORE_RATE = 0.05
+
+
+@dataclass(frozen=True)
+class Route:
+    backend: str  # "live", "tts" or "cloud"
+    model: str
+    api_version: str
+    voice: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.backend}/{self.model}/{self.api_version}/{self.voice}"
+
+
+def default_routes(voice: str = "Puck", cloud_voice: str = "en-US-Neural2-F") -> list[Route]:
+    """The models and API versions the experiments use, for one Gemini voice."""
+    from experiments.gemini_3_text_then_25_tts import DEFAULT_TTS_MODEL
+    from experiments.gemini_live_audio import MODEL_ID
+
+    routes = [Route("live", model, version, voice) for model in (MODEL_ID, "gemini-2.0-flash-exp") for version in ("v1alpha", "v1beta")]
+    routes += [Route("tts", model, version, voice) for model in (DEFAULT_TTS_MODEL, "gemini-2.5-pro-preview-tts") for version in ("v1beta", "v1alpha")]
+    routes.append(Route("cloud", "texttospeech", "v1", cloud_voice))
+    return routes
+
+
+def backend_for(route: Route) -> SynthesisBackend:
+    backend: SynthesisBackend
+    if route.backend == "live":
+        backend = LiveBackend(voice=route.voice, model_id=route.model, api_version=route.api_version)
+    elif route.backend == "tts":
+        backend = GenerateContentTtsBackend(voice=route.voice, model=route.model, api_version=route.api_version)
+    elif route.backend == "cloud":
+        backend = CloudTtsBackend(voice=route.voice, language_code="-".join(route.voice.split("-")[:2]))
+    else:
+        raise ValueError(f"unknown backend {route.backend!r}")
+    backend.name = route.key  # Hedge outcomes name the route, not just the backend
+    return backend
+
+
+@dataclass
+class Sample:
+    at: float  # Unix timestamp
+    ok: bool
+    first_audio_seconds: float | None = None
+    real_time_factor: float | None = None
+
+
+@dataclass
+class RouteStats:
+    samples: deque[Sample] = field(default_factory=lambda: deque(maxlen=DEFAULT_WINDOW))
+
+    def recent(self, now: float, max_age_seconds: float) -> list[Sample]:
+        return [s for s in self.samples if now - s.at <= max_age_seconds]
+
+    @staticmethod
+    def median(values: list[float]) -> float | None:
+        return statistics.median(values) if values else None
+
+    def summary(self, now: float, max_age_seconds: float) -> dict[str, Any]:
+        recent = self.recent(now, max_age_seconds)
+        streak = 0
+        for sample in reversed(recent):
+            if sample.ok:
+                break
+            streak += 1
+        return {
+            "samples": len(recent),
+            "error_rate": sum(not s.ok for s in recent) / len(recent) if recent else 0.0,
+            "failure_streak": streak,
+            "last_failure": max((s.at for s in recent if not s.ok), default=None),
+            "first_audio_p50": self.median([s.first_audio_seconds for s in recent if s.first_audio_seconds is not None]),
+            "rtf_p50": self.median([s.real_time_factor for s in recent if s.real_time_factor is not None]),
+        }
+
+
+@dataclass(frozen=True)
+class RouteConstraints:
+    backends: frozenset[str] | None = None
+    models: frozenset[str] | None = None
+    api_versions: frozenset[str] | None = None
+    voices: frozenset[str] | None = None
+    max_first_audio_seconds: float | None = None  # Applies once a route has been measured
+    max_real_time_factor: float | None = None
+
+    def allows(self, route: Route) -> bool:
+        return (
+            (self.backends is None or route.backend in self.backends)
+            and (self.models is None or route.model in self.models)
+            and (self.api_versions is None or route.api_version in self.api_versions)
+            and (self.voices is None or route.voice in self.voices or route.backend == "cloud")
+        )
+
+
+class LatencyRouter:
+    """Ranks routes by recent latency and health; `record()` outcomes, `save()` to persist them."""
+
+    def __init__(
+        self,
+        routes: Sequence[Route],
+        path: str | None = DEFAULT_STATS_PATH,
+        *,
+        window: int = DEFAULT_WINDOW,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        max_error_rate: float = DEFAULT_MAX_ERROR_RATE,
+        failure_streak: int = DEFAULT_FAILURE_STREAK,
+        cooldown_seconds: float = DEFAULT_COOLDOWN_SECONDS,
+        explore_rate: float = DEFAULT_EXPLORE_RATE,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.routes = list(routes)
+        self.path = path
+        self.window = window
+        self.max_age_seconds = max_age_seconds
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.failure_streak = failure_streak
+        self.cooldown_seconds = cooldown_seconds
+        self.explore_rate = explore_rate
+        self._rng = rng or random.Random()
+        self._stats: dict[str, RouteStats] = {}
+        if path:
+            self._load(path)
+
+    def stats(self, route: Route) -> RouteStats:
+        stats = self._stats.get(route.key)
+        if stats is None:
+            stats = self._stats[route.key] = RouteStats(deque(maxlen=self.window))
+        return stats
+
+    def record(self, route: Route, *, ok: bool, first_audio_seconds: float | None = None, real_time_factor: float | None = None, at: float | None = None) -> None:
+        self.stats(route).samples.append(Sample(time.time() if at is None else at, ok, first_audio_seconds, real_time_factor))
+
+    def healthy(self, route: Route, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        summary = self.stats(route).summary(now, self.max_age_seconds)
+        if summary["failure_streak"] >= self.failure_streak and now - summary["last_failure"] < self.cooldown_seconds:
+            return False
+        return bool(summary["samples"] < self.min_samples or summary["error_rate"] <= self.max_error_rate)
+
+    def rank(self, constraints: RouteConstraints | None = None, now: float | None = None) -> list[Route]:
+        """
+        Eligible routes, best first: unmeasured routes, then healthy routes by
+        median time to first audio, then unhealthy ones (as a last resort).
+        Routes that are measured and break a latency or RTF limit are left out.
+        """
+        now = time.time() if now is None else now
+        constraints = constraints or RouteConstraints()
+        unmeasured: list[Route] = []
+        healthy: list[tuple[float, Route]] = []
+        unhealthy: list[tuple[float, Route]] = []
+        for route in self.routes:
+            if not constraints.allows(route):
+                continue
+            summary = self.stats(route).summary(now, self.max_age_seconds)
+            first_audio, rtf = summary["first_audio_p50"], summary["rtf_p50"]
+            if constraints.max_first_audio_seconds is not None and first_audio is not None and first_audio > constraints.max_first_audio_seconds:
+                continue
+            if constraints.max_real_time_factor is not None and rtf is not None and rtf > constraints.max_real_time_factor:
+                continue
+            if not self.healthy(route, now):
+                unhealthy.append((summary["error_rate"], route))
+            elif summary["samples"] < self.min_samples or first_audio is None:
+                unmeasured.append(route)
+            else:
+                healthy.append((first_audio, route))
+        ranked = unmeasured + [route for _, route in sorted(healthy, key=lambda item: item[0])]
+        if len(ranked) > 1 and not unmeasured and self._rng.random() < self.explore_rate:
+            ranked.insert(0, ranked.pop(self._rng.randrange(1, len(ranked))))
+        return ranked + [route for _, route in sorted(unhealthy, key=lambda item: item[0])]
+
+    def choose(self, constraints: RouteConstraints | None = None) -> Route:
+        ranked = self.rank(constraints)
+        if not ranked:
+            raise ValueError("no route satisfies the constraints")
+        return ranked[0]
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                saved: dict[str, list[dict[str, Any]]] = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, samples in saved.items():
+            stats = self._stats[key] = RouteStats(deque(maxlen=self.window))
+            stats.samples.extend(Sample(**sample) for sample in samples)
+
+    def save(self) -> None:
+        """Writes the statistics atomically, merged with samples other processes saved since we loaded."""
+        if not self.path:
+            return
+        now = time.time()
+        merged = LatencyRouter([], self.path, window=self.window)._stats
+        for key, stats in self._stats.items():
+            seen = {(s.at, s.ok) for s in stats.samples}
+            combined = [s for s in merged.get(key, RouteStats()).samples if (s.at, s.ok) not in seen] + list(stats.samples)
+            merged[key] = RouteStats(deque(sorted(combined, key=lambda s: s.at), maxlen=self.window))
+        payload = {key: [vars(s) for s in stats.samples if now - s.at <= self.max_age_seconds] for key, stats in merged.items()}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({key: samples for key, samples in payload.items() if samples}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: could not save router statistics: {e}")
+
+
+async def synthesize_routed(
+    router: LatencyRouter,
+    text: str,
+    *,
+    constraints: RouteConstraints | None = None,
+    hedge_routes: int = 2,
+    hedge_after_seconds: float = DEFAULT_HEDGE_AFTER_SECONDS,
+    outcome: HedgeOutcome | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Streams 24 kHz PCM from the best route, hedged with the next `hedge_routes - 1`
+    routes, and records every attempt in `router` (saved when the stream ends).
+    """
+    routes = router.rank(constraints)[: max(1, hedge_routes)]
+    if not routes:
+        raise ValueError("no route satisfies the constraints")
+    by_key = {route.key: route for route in routes}
+    outcome = outcome if outcome is not None else HedgeOutcome()
+    started = time.perf_counter()
+    audio_bytes = 0
+    complete = False
+    try:
+        async for chunk in synthesize_hedged([backend_for(route) for route in routes], text, hedge_after_seconds=hedge_after_seconds, outcome=outcome):
+            audio_bytes += len(chunk)
+            yield chunk
+        complete = True
+    finally:
+        elapsed = time.perf_counter() - started
+        audio_seconds = audio_bytes / GEMINI_PCM_FORMAT.bytes_per_second
+        for attempt in outcome.attempts:
+            route = by_key[attempt.backend]
+            if attempt.error is not None:
+                router.record(route, ok=False)
+            elif attempt.backend == outcome.winner:
+                rtf = elapsed / audio_seconds if complete and audio_seconds else None
+                router.record(route, ok=True, first_audio_seconds=attempt.first_audio_seconds, real_time_factor=rtf)
+            elif attempt.cancelled and outcome.first_audio_seconds is not None:
+                # Overtaken: it had waited this long without audio, so its latency is at least that.
+                router.record(route, ok=True, first_audio_seconds=outcome.first_audio_seconds - attempt.started_seconds)
+        router.save()
+
+
+def _format_seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value * 1000:.0f} ms"
+
+
+def _print_stats(router: LatencyRouter, constraints: RouteConstraints) -> None:
+    now = time.time()
+    ranked = router.rank(constraints, now)
+    print(f"{'route':<70} {'n':>3} {'errors':>6} {'first audio':>11} {'rtf':>5}  state")
+    for route in router.routes:
+        summary = router.stats(route).summary(now, router.max_age_seconds)
+        state = f"#{ranked.index(route) + 1}" if route in ranked else "excluded"
+        if not router.healthy(route, now):
+            state += " unhealthy"
+        rtf = "-" if summary["rtf_p50"] is None else f"{summary['rtf_p50']:.2f}"
+        print(f"{route.key:<70} {summary['samples']:>3} {summary['error_rate']:>6.0%} {_format_seconds(summary['first_audio_p50']):>11} {rtf:>5}  {state}")
+
+
+async def _speak(router: LatencyRouter, args: argparse.Namespace, constraints: RouteConstraints) -> None:
+    from experiments.wav_stream import StreamingWavWriter
+
+    for run in range(args.repeat):
+        outcome = HedgeOutcome()
+        wav = StreamingWavWriter(args.output, GEMINI_PCM_FORMAT) if args.output and run == 0 else None
+        try:
+            async for chunk in synthesize_routed(router, args.text, constraints=constraints, hedge_routes=args.hedge_routes, hedge_after_seconds=args.hedge_after_ms / 1000, outcome=outcome):
+                if wav:
+                    wav.write(chunk)
+        except RuntimeError as e:
+            print(f"[{run + 1}] {e}")
+            continue
+        finally:
+            if wav:
+                wav.close()
+        print(f"[{run + 1}] {outcome.summary_line()}")
+    if args.output:
+        print(f"Wrote WAV: {args.output}")
+
+
+def _split(value: str | None) -> frozenset[str] | None:
+    return frozenset(v.strip() for v in value.split(",") if v.strip()) if value else None
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Route synthesis requests to the currently fastest healthy backend/model/API version.")
+    parser.add_argument("--stats-file", default=DEFAULT_STATS_PATH, help="Statistics file shared across runs (default: %(default)s)")
+    parser.add_argument("-v", "--voice", default="Puck", help="Gemini voice (default: Puck)")
+    parser.add_argument("--backends", help="Only route to these backends (comma-separated: live,tts,cloud)")
+    parser.add_argument("--models", help="Only route to these models (comma-separated)")
+    parser.add_argument("--api-versions", help="Only route to these API versions (comma-separated)")
+    parser.add_argument("--max-ttfa-ms", type=int, help="Skip routes whose median time to first audio is above this")
+    parser.add_argument("--max-rtf", type=float, help="Skip routes whose median real-time factor is above this (1 = just keeps up with playback)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    speak = sub.add_parser("speak", help="Synthesize text on the best route and record the outcome")
+    speak.add_argument("text", help="Text to speak")
+    speak.add_argument("-o", "--output", help="Write the audio of the first run to this WAV file")
+    speak.add_argument("--hedge-routes", type=int, default=2, help="Routes raced per request, best first (default: %(default)s)")
+    speak.add_argument("--hedge-after-ms", type=int, default=int(DEFAULT_HEDGE_AFTER_SECONDS * 1000), help="Start the next route when there is no audio after this long (default: %(default)s)")
+    speak.add_argument("--repeat", type=int, default=1, help="Synthesize the text this many times")
+    sub.add_parser("stats", help="Show the recorded statistics and the current ranking")
+    sub.add_parser("reset", help="Delete the recorded statistics")
+    args = parser.parse_args()
+
+    if args.command == "reset":
+        if os.path.exists(args.stats_file):
+            os.remove(args.stats_file)
+        print(f"Removed {args.stats_file}")
+        return
+
+    router = LatencyRouter(default_routes(args.voice), args.stats_file)
+    constraints = RouteConstraints(
+        backends=_split(args.backends),
+        models=_split(args.models),
+        api_versions=_split(args.api_versions),
+        voices=frozenset({args.voice}),
+        max_first_audio_seconds=args.max_ttfa_ms / 1000 if args.max_ttfa_ms is not None else None,
+        max_real_time_factor=args.max_rtf,
+    )
+    if args.command == "stats":
+        _print_stats(router, constraints)
+        return
+    try:
+        asyncio.run(_speak(router, args, constraints))
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
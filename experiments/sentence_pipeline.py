@@ -0,0 +1,203 @@
+"""Sentence-level pipelining of Gemini 3 text generation into Gemini 2.5 TTS.
+
+The plain pipeline waits for the whole text response before calling TTS, so the
+first audio arrives after text latency + TTS latency. Here the text model is
+consumed with streaming generation, the stream is cut into sentences as they
+complete (`SentenceStream`), and every sentence is sent to the TTS model right
+away (up to `concurrency` requests in flight). Results are reassembled in
+sentence order into the output file (encoded on a writer thread) and,
+optionally, the playback jitter buffer, so the first sentence plays while the
+rest is still being written.
+
+Usage:
+  uv run experiments/gemini_3_text_then_25_tts.py --stream --play -p "Tell me about octopuses."
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import aclosing
+from typing import TYPE_CHECKING
+
+from experiments.audio_cache import AudioCache
+from experiments.audio_codecs import DEFAULT_FORMAT, AudioWriter, open_audio_writer
+from experiments.gemini_3_text_then_25_tts import (
+    _clip_text,
+    _synthesize_async,
+    _text_config,
+)
+from experiments.genai_response import iter_parts
+from experiments.pcm_audio import PcmFormat
+from experiments.playback import DEFAULT_PREBUFFER_SECONDS, JitterBufferPlayer
+from experiments.rate_limit import QUOTA
+from experiments.text_segments import SentenceStream
+from experiments.verification import Verifier
+from experiments.wav_stream import OffloopWriter
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+
+    from experiments.postprocess import AudioPostProcessor, PostProcessSettings
+
+DEFAULT_MIN_SENTENCE_CHARS = 20
+DEFAULT_TTS_CONCURRENCY = 3
+
+SynthesisTask = asyncio.Task[tuple[bytes, PcmFormat, bool, str]]  # (pcm, format, cache hit, sentence)
+
+
+def _chunk_text(chunk: object) -> str:
+    # Concatenate text parts directly: `response.text` warns on chunks without text.
+    return "".join(part.text for part in iter_parts(chunk) if part.text and not part.thought)
+
+
+async def _raw_sentences(client: genai.Client, *, model: str, prompt: str, min_chars: int) -> AsyncGenerator[str]:
+    splitter = SentenceStream(min_chars)
+
+    async def chunks() -> AsyncIterator[types.GenerateContentResponse]:
+        async for chunk in await client.aio.models.generate_content_stream(model=model, contents=prompt, config=_text_config()):
+            yield chunk
+
+    async for chunk in QUOTA.stream(model, chunks):
+        for sentence in splitter.feed(_chunk_text(chunk)):
+            yield sentence
+    for sentence in splitter.flush():
+        yield sentence
+
+
+async def stream_sentences(client: genai.Client, *, model: str, prompt: str, min_chars: int = DEFAULT_MIN_SENTENCE_CHARS, max_chars: int = 0) -> AsyncIterator[str]:
+    """Yields the text model's reply sentence by sentence; stops generating once `max_chars` are reached."""
+    spoken = 0
+    async with aclosing(_raw_sentences(client, model=model, prompt=prompt, min_chars=min_chars)) as sentences:
+        async for sentence in sentences:
+            if max_chars and spoken + len(sentence) > max_chars:
+                remaining = max_chars - spoken  # Zero or less once the budget is used up
+                clipped = _clip_text(sentence, remaining) if remaining > 0 else ""
+                if clipped.rstrip("…"):
+                    yield clipped
+                return
+            spoken += len(sentence) + 1
+            yield sentence
+
+
+async def speak_prompt_streaming(
+    client: genai.Client,
+    *,
+    prompt: str,
+    text_model: str,
+    tts_model: str,
+    voice: str,
+    output: str | None,
+    output_format: str = DEFAULT_FORMAT,
+    max_chars: int = 0,
+    min_sentence_chars: int = DEFAULT_MIN_SENTENCE_CHARS,
+    concurrency: int = DEFAULT_TTS_CONCURRENCY,
+    play: bool = False,
+    prebuffer_seconds: float = DEFAULT_PREBUFFER_SECONDS,
+    use_cache: bool = True,
+    verifier: Verifier | None = None,
+    postprocess: PostProcessSettings | None = None,
+) -> float:
+    """
+    Runs the pipelined text -> TTS flow and returns the seconds of audio produced.
+    With a `verifier`, sentences are checked in the background as they arrive.
+    With `postprocess`, each sentence is trimmed, normalized and crossfaded onto the previous one.
+    """
+    from experiments.gemini_live_audio import open_player
+
+    started = time.perf_counter()
+    cache = AudioCache() if use_cache else None
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    pending: asyncio.Queue[SynthesisTask | None] = asyncio.Queue()
+
+    async def synthesize(sentence: str) -> tuple[bytes, PcmFormat, bool, str]:
+        async with semaphore:
+            return *await _synthesize_async(client, model=tts_model, voice=voice, text=sentence, cache=cache), sentence
+
+    async def produce() -> None:
+        try:
+            count = 0
+            async for sentence in stream_sentences(client, model=text_model, prompt=prompt, min_chars=min_sentence_chars, max_chars=max_chars):
+                count += 1
+                print(f"[{time.perf_counter() - started:5.2f}s] Sentence {count}: {sentence}")
+                await pending.put(asyncio.create_task(synthesize(sentence)))
+        finally:
+            await pending.put(None)
+
+    producer = asyncio.create_task(produce())
+    fmt: PcmFormat | None = None
+    writer = OffloopWriter()
+    wav: AudioWriter | None = None
+    player: JitterBufferPlayer | None = None
+    processor: AudioPostProcessor | None = None
+    audio_bytes = 0
+    sentences = 0
+    complete = False
+
+    async def deliver(audio: bytes) -> None:
+        nonlocal audio_bytes
+        if not audio:
+            return
+        audio_bytes += len(audio)
+        if wav:
+            await writer.submit(wav.write, audio)
+        if player:
+            await player.write(audio)
+
+    try:
+        while (task := await pending.get()) is not None:
+            pcm, chunk_fmt, cached, sentence = await task
+            if fmt is None:
+                fmt = chunk_fmt
+                print(f"[{time.perf_counter() - started:5.2f}s] First audio{' (cached)' if cached else ''}.")
+                if output:
+                    wav = open_audio_writer(output, fmt, output_format)
+                if play:
+                    player = open_player(fmt, prebuffer_seconds)
+                if postprocess:
+                    from experiments.postprocess import AudioPostProcessor
+
+                    processor = AudioPostProcessor(fmt, postprocess)
+            elif chunk_fmt != fmt:
+                raise RuntimeError(f"TTS returned {chunk_fmt} after {fmt}; cannot join sentences")
+            elif processor:
+                await deliver(processor.next_segment())
+            await deliver(processor.process(pcm) if processor else pcm)
+            if verifier:
+                sentences += 1
+                await verifier.submit(f"sentence-{sentences:03d}", sentence, pcm, chunk_fmt)
+        await producer  # Surfaces errors from the text stream
+        if processor:
+            await deliver(processor.flush())
+        complete = True
+    finally:
+        producer.cancel()
+        while not pending.empty():
+            leftover = pending.get_nowait()
+            if leftover:
+                leftover.cancel()
+        try:
+            if wav:
+                await writer.submit(wav.close)
+        finally:
+            await writer.close()
+        if player:
+            if complete:
+                await player.finish()
+                print(player.stats_line())
+            else:
+                player.close()
+        if cache:
+            cache.report()
+        if verifier and complete:
+            await verifier.drain()
+
+    seconds = audio_bytes / fmt.bytes_per_second if fmt else 0.0
+    print(f"[{time.perf_counter() - started:5.2f}s] Done: {seconds:.1f}s of audio.")
+    if wav:
+        print(wav.stats().summary_line())
+    if processor:
+        print(processor.stats_line())
+    return seconds
@@ -0,0 +1,383 @@
+"""Indexed archive of spoken exchanges: append-only audio segments plus a SQLite index.
+
+Layout of an archive directory:
+
+- `segments/000001.pcm`, ...: raw PCM, appended to and never rewritten. A new
+  segment starts once the current one exceeds `segment_bytes`.
+- `index.sqlite3`: one row per turn with its session, time, input text (and a
+  hash of it), model, voice, PCM format, timings, and the (segment, offset,
+  length) of its audio. Lookups by session, time range or text hash go through
+  indexes, so no directory is ever scanned.
+
+Writers take an exclusive lock on the segment they append to, so concurrent
+processes end up in different segments instead of interleaving their audio. A
+turn only becomes visible once its index row is committed; audio from a turn
+that was discarded (or a process that died) is dropped or left unreferenced.
+
+Reads memory-map the segment and return a `memoryview` of the requested time
+range, so replaying a turn copies nothing until the audio reaches the player.
+
+Configuration via environment:
+- SPEAK_ARCHIVE_DIR: archive directory (default: ~/.local/share/speak-to-me/archive)
+
+Usage:
+  uv run speak --archive -t "Hello there."
+  uv run python -m experiments.session_archive list --since 2026-01-01 --text "Hello there."
+  uv run python -m experiments.session_archive play 42 --start 3.5
+  uv run python -m experiments.session_archive export 42 -o turn.flac --format flac
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Self
+
+from experiments.audio_cache import normalize_text
+from experiments.audio_codecs import CODECS, DEFAULT_FORMAT
+from experiments.pcm_audio import PcmFormat
+
+DEFAULT_ARCHIVE_DIR = os.environ.get("SPEAK_ARCHIVE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".local", "share", "speak-to-me", "archive"
+)
+DEFAULT_SEGMENT_BYTES = 256 * 1024 * 1024
+
+_INDEX_FILENAME = "index.sqlite3"
+_SEGMENTS_DIRNAME = "segments"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    input_text TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    model_id TEXT,
+    voice_name TEXT,
+    sample_rate_hz INTEGER NOT NULL,
+    channels INTEGER NOT NULL,
+    sample_width_bytes INTEGER NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS turns_by_session ON turns (session_id, created_at);
+CREATE INDEX IF NOT EXISTS turns_by_time ON turns (created_at);
+CREATE INDEX IF NOT EXISTS turns_by_text ON turns (text_hash);
+"""
+
+
+def text_hash(text: str) -> str:
+    """Hash of the whitespace-normalized text, as stored in the index."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def new_session_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+@dataclass(frozen=True)
+class ArchivedTurn:
+    id: int
+    session_id: str
+    created_at: float  # Unix timestamp
+    input_text: str
+    text_hash: str
+    model_id: str | None
+    voice_name: str | None
+    fmt: PcmFormat
+    segment: int
+    offset: int
+    length: int
+    metadata: dict[str, Any]
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.length / self.fmt.bytes_per_second
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> ArchivedTurn:
+        return cls(
+            id=row["id"],
+            session_id=row["session_id"],
+            created_at=row["created_at"],
+            input_text=row["input_text"],
+            text_hash=row["text_hash"],
+            model_id=row["model_id"],
+            voice_name=row["voice_name"],
+            fmt=PcmFormat(row["sample_rate_hz"], row["channels"], row["sample_width_bytes"]),
+            segment=row["segment"],
+            offset=row["offset"],
+            length=row["length"],
+            metadata=json.loads(row["metadata"]) if row["metadata"] else {},
+        )
+
+
+class SessionArchive:
+    def __init__(self, directory: str = DEFAULT_ARCHIVE_DIR, segment_bytes: int = DEFAULT_SEGMENT_BYTES) -> None:
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.segments_dir = self.directory / _SEGMENTS_DIRNAME
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        # Turns are committed from writer threads; one connection behind a lock is plenty.
+        self._db = sqlite3.connect(self.directory / _INDEX_FILENAME, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._maps: dict[int, mmap.mmap] = {}
+
+    def segment_path(self, segment: int) -> Path:
+        return self.segments_dir / f"{segment:06d}.pcm"
+
+    def _segment_numbers(self) -> list[int]:
+        return sorted(int(p.stem) for p in self.segments_dir.glob("*.pcm") if p.stem.isdigit())
+
+    def begin_turn(self, session_id: str, input_text: str, fmt: PcmFormat, *, model_id: str | None = None, voice_name: str | None = None) -> ArchiveTurnWriter:
+        return ArchiveTurnWriter(self, session_id=session_id, input_text=input_text, fmt=fmt, model_id=model_id, voice_name=voice_name)
+
+    def _insert(self, values: dict[str, Any]) -> int:
+        columns = ", ".join(values)
+        placeholders = ", ".join(f":{name}" for name in values)
+        with self._lock:
+            cursor = self._db.execute(f"INSERT INTO turns ({columns}) VALUES ({placeholders})", values)
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    def get(self, turn_id: int) -> ArchivedTurn | None:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM turns WHERE id = ?", (turn_id,)).fetchone()
+        return ArchivedTurn.from_row(row) if row else None
+
+    def find(self, *, session_id: str | None = None, since: float | None = None, until: float | None = None, text: str | None = None, limit: int = 100) -> list[ArchivedTurn]:
+        """Turns matching all given filters, newest first."""
+        clauses: list[str] = []
+        params: list[Any] = []
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if text is not None:
+            clauses.append("text_hash = ?")
+            params.append(text_hash(text))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(f"SELECT * FROM turns {where} ORDER BY created_at DESC, id DESC LIMIT ?", (*params, limit)).fetchall()
+        return [ArchivedTurn.from_row(row) for row in rows]
+
+    def sessions(self, limit: int = 100) -> list[tuple[str, int, float, float, float]]:
+        """(session id, turns, first turn, last turn, seconds of audio), most recent first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT session_id, COUNT(*), MIN(created_at), MAX(created_at), "
+                "SUM(CAST(length AS REAL) / (sample_rate_hz * channels * sample_width_bytes)) "
+                "FROM turns GROUP BY session_id ORDER BY MAX(created_at) DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def audio(self, turn: ArchivedTurn, start_seconds: float = 0.0, end_seconds: float | None = None) -> memoryview:
+        """The turn's PCM between the two offsets, as a zero-copy view of the memory-mapped segment."""
+        frame = turn.fmt.channels * turn.fmt.sample_width_bytes
+        start = min(turn.length, int(max(0.0, start_seconds) * turn.fmt.bytes_per_second) // frame * frame)
+        end = turn.length if end_seconds is None else min(turn.length, int(end_seconds * turn.fmt.bytes_per_second) // frame * frame)
+        if end <= start:
+            return memoryview(b"")
+        mapped = self._map(turn.segment, turn.offset + end)
+        return memoryview(mapped)[turn.offset + start : turn.offset + end]
+
+    def _map(self, segment: int, needed: int) -> mmap.mmap:
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or len(mapped) < needed:
+                # The newest segment may have grown since it was mapped.
+                with open(self.segment_path(segment), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = mapped  # The old map stays alive while views of it exist
+            return mapped
+
+    def close(self) -> None:
+        self._maps.clear()
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class ArchiveTurnWriter:
+    """Appends one turn's audio to a segment it holds locked; `commit()` adds the index row."""
+
+    def __init__(self, archive: SessionArchive, *, session_id: str, input_text: str, fmt: PcmFormat, model_id: str | None, voice_name: str | None) -> None:
+        self._archive = archive
+        self.session_id = session_id
+        self._row: dict[str, Any] = {
+            "session_id": session_id,
+            "created_at": time.time(),
+            "input_text": input_text,
+            "text_hash": text_hash(input_text),
+            "model_id": model_id,
+            "voice_name": voice_name,
+            "sample_rate_hz": fmt.sample_rate_hz,
+            "channels": fmt.channels,
+            "sample_width_bytes": fmt.sample_width_bytes,
+        }
+        self.segment, self._file = self._claim_segment()
+        self.offset = self._file.seek(0, os.SEEK_END)
+        self.length = 0
+
+    def _claim_segment(self) -> tuple[int, BinaryIO]:
+        """Opens the first segment with room that no other writer holds, or starts a new one."""
+        numbers = self._archive._segment_numbers()
+        candidate = numbers[-1] if numbers else 1
+        while True:
+            f = open(self._archive.segment_path(candidate), "ab")  # noqa: SIM115 - kept by the turn until commit or discard
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                candidate += 1
+                continue
+            if f.seek(0, os.SEEK_END) < self._archive.segment_bytes:
+                return candidate, f
+            f.close()
+            candidate += 1
+
+    def write(self, pcm: bytes) -> None:
+        if self._file.closed:
+            raise ValueError(f"archive turn in segment {self.segment} is closed")
+        self._file.write(pcm)
+        self.length += len(pcm)
+
+    def commit(self, **metadata: Any) -> int:
+        """Makes the audio durable, indexes the turn and returns its id."""
+        if self._file.closed:
+            raise ValueError(f"archive turn in segment {self.segment} is closed")
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            row = {**self._row, "segment": self.segment, "offset": self.offset, "length": self.length}
+            row["metadata"] = json.dumps(metadata, ensure_ascii=False) if metadata else None
+            return self._archive._insert(row)
+        finally:
+            self._file.close()  # Also releases the segment lock
+
+    def discard(self) -> None:
+        if self._file.closed:
+            return
+        try:
+            self._file.truncate(self.offset)
+        finally:
+            self._file.close()
+
+
+def _timestamp(value: str) -> float:
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _turn_line(turn: ArchivedTurn) -> str:
+    when = datetime.fromtimestamp(turn.created_at).strftime("%Y-%m-%d %H:%M:%S")
+    text = normalize_text(turn.input_text)
+    text = text if len(text) <= 60 else text[:59] + "…"
+    return f"{turn.id:>6}  {when}  {turn.session_id}  {turn.audio_seconds:6.1f}s  {turn.voice_name or '-'}  {text}"
+
+
+def _play(archive: SessionArchive, turn: ArchivedTurn, start_seconds: float, started: float) -> None:
+    import asyncio
+
+    from experiments.gemini_live_audio import open_player
+    from experiments.replay import play_view
+
+    async def run() -> None:
+        player = open_player(turn.fmt)
+        if player is None:
+            raise SystemExit("Error: no audio output available.")
+        view = archive.audio(turn, start_seconds)
+        print(f"Playing turn {turn.id} from {start_seconds:.1f}s ({len(view) / turn.fmt.bytes_per_second:.1f}s), ready in {(time.perf_counter() - started) * 1000:.0f} ms")
+        await play_view(view, player)
+        print(player.stats_line())
+
+    asyncio.run(run())
+
+
+def main() -> None:
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Browse, replay and export the spoken-exchange archive.")
+    parser.add_argument("--dir", default=DEFAULT_ARCHIVE_DIR, help=f"Archive directory (default: {DEFAULT_ARCHIVE_DIR})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    find = sub.add_parser("list", help="List turns, newest first")
+    find.add_argument("--session", help="Only turns of this session")
+    find.add_argument("--since", type=_timestamp, help="Only turns at or after this ISO date/time")
+    find.add_argument("--until", type=_timestamp, help="Only turns before this ISO date/time")
+    find.add_argument("--text", help="Only turns whose input text matches this exactly (whitespace-normalized)")
+    find.add_argument("--limit", type=int, default=50, help="Max turns to list (default: %(default)s)")
+
+    sessions = sub.add_parser("sessions", help="List sessions, most recent first")
+    sessions.add_argument("--limit", type=int, default=50, help="Max sessions to list (default: %(default)s)")
+
+    show = sub.add_parser("show", help="Print one turn's index entry as JSON")
+    show.add_argument("turn", type=int)
+
+    play = sub.add_parser("play", help="Play one turn")
+    play.add_argument("turn", type=int)
+    play.add_argument("--start", type=float, default=0.0, help="Start this many seconds into the turn")
+
+    export = sub.add_parser("export", help="Write one turn (or part of it) to an audio file")
+    export.add_argument("turn", type=int)
+    export.add_argument("-o", "--output", required=True, help="Output file")
+    export.add_argument("--format", choices=list(CODECS), default=DEFAULT_FORMAT, help="Output codec (default: %(default)s)")
+    export.add_argument("--start", type=float, default=0.0, help="Start offset in seconds")
+    export.add_argument("--end", type=float, help="End offset in seconds (default: end of the turn)")
+    args = parser.parse_args()
+
+    with SessionArchive(args.dir) as archive:
+        if args.command == "list":
+            for found in archive.find(session_id=args.session, since=args.since, until=args.until, text=args.text, limit=args.limit):
+                print(_turn_line(found))
+            return
+        if args.command == "sessions":
+            for session_id, turns, first, last, seconds in archive.sessions(args.limit):
+                span = f"{datetime.fromtimestamp(first):%Y-%m-%d %H:%M} .. {datetime.fromtimestamp(last):%H:%M}"
+                print(f"{session_id}  {turns:>4} turn(s)  {seconds:7.1f}s  {span}")
+            return
+
+        turn = archive.get(args.turn)
+        if turn is None:
+            raise SystemExit(f"Error: no turn {args.turn} in {args.dir}")
+        if args.command == "show":
+            print(json.dumps({**turn.__dict__, "fmt": turn.fmt.__dict__, "audio_seconds": round(turn.audio_seconds, 3)}, indent=2, ensure_ascii=False))
+        elif args.command == "play":
+            _play(archive, turn, args.start, started)
+        elif args.command == "export":
+            from experiments.audio_codecs import write_audio
+
+            try:
+                encoded = write_audio(args.output, bytes(archive.audio(turn, args.start, args.end)), turn.fmt, args.format)
+            except (OSError, ValueError) as e:
+                raise SystemExit(f"Error: {e}")
+            print(encoded.summary_line())
+            print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
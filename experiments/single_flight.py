@@ -0,0 +1,181 @@
+"""Single-flight coalescing of identical in-flight synthesis requests.
+
+When several callers ask for the same audio at the same moment (a broadcast
+announcement fanned out to many clients), only the first one reaches the
+model. The others subscribe to its result:
+
+- `SingleFlight.stream(key, start)` runs `start()` (an async iterator of audio
+  chunks, or of any other items) once per key. Every subscriber gets the full chunk stream. A late
+  joiner first gets the chunks already received, replayed from memory, and
+  then follows the live stream. Joining is only possible while the flight
+  is in its first `replay` chunks; a request arriving later starts a new
+  flight.
+- `SingleFlight.call(key, start)` does the same for a coroutine: concurrent
+  callers await one shared result.
+
+The upstream runs in its own task, so one subscriber going away does not stop
+it for the others. It is cancelled once the last subscriber has left. A flight
+is forgotten as soon as it finishes, so the next request for the same key
+starts a new generation (or hits the audio cache). An upstream error reaches
+every subscriber.
+
+Backpressure: the upstream stops reading once it is `max_lead` chunks ahead
+of the slowest subscriber, and resumes when that subscriber catches up (or
+leaves). A slow consumer therefore slows the model stream down, just as it
+would without coalescing.
+
+Memory: the first `replay` chunks are kept so that late joiners can replay
+them. Past that, the flight takes no new subscribers and drops every chunk
+that all of its subscribers have consumed, so it holds at most `max_lead`
+chunks however long the stream runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MAX_LEAD_CHUNKS = 32
+DEFAULT_REPLAY_CHUNKS = 64
+
+
+@dataclass
+class _Flight:
+    chunks: deque[Any] = field(default_factory=deque)  # Not yet consumed by everyone (or still replayable)
+    base: int = 0  # Stream position of chunks[0]
+    joinable: bool = True
+    done: bool = False
+    error: BaseException | None = None
+    subscribers: int = 0
+    task: asyncio.Task[None] | None = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+    positions: dict[int, int] = field(default_factory=dict)  # Chunks consumed, per subscriber
+    advanced: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def consumed(self, subscriber: int, position: int | None) -> None:
+        """Records a subscriber's progress (None: it left) and wakes a paused upstream."""
+        if position is None:
+            self.positions.pop(subscriber, None)
+        else:
+            self.positions[subscriber] = position
+        if not self.joinable:
+            slowest = min(self.positions.values(), default=self.end())
+            while self.base < slowest:
+                self.chunks.popleft()
+                self.base += 1
+        advanced, self.advanced = self.advanced, asyncio.Event()
+        advanced.set()
+
+    def end(self) -> int:
+        return self.base + len(self.chunks)
+
+    def lead(self) -> int:
+        return self.end() - min(self.positions.values(), default=self.end())
+
+
+class SingleFlight:
+    """Coalesces concurrent requests with equal keys into one upstream call."""
+
+    def __init__(self, max_lead: int = DEFAULT_MAX_LEAD_CHUNKS, replay: int = DEFAULT_REPLAY_CHUNKS) -> None:
+        self.max_lead = max(1, max_lead)
+        self.replay = max(0, replay)
+        self._streams: dict[Hashable, _Flight] = {}
+        self._calls: dict[Hashable, tuple[asyncio.Task[Any], list[int]]] = {}
+        self.started = 0  # Upstream calls made
+        self.joined = 0  # Requests served by someone else's call
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._streams or key in self._calls
+
+    def stats_line(self) -> str:
+        total = self.started + self.joined
+        return f"Single-flight: {total} request(s), {self.started} upstream call(s), {self.joined} coalesced"
+
+    async def stream(self, key: Hashable, start: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Yields the chunks of the flight for `key`, starting it with `start()` if none is running."""
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = self._streams[key] = _Flight()
+            flight.task = asyncio.create_task(self._run_stream(key, flight, start))
+            self.started += 1
+        else:
+            self.joined += 1
+        flight.subscribers += 1
+        subscriber = object()
+        position = 0
+        try:
+            while True:
+                while position < flight.end():
+                    flight.consumed(id(subscriber), position)
+                    chunk = flight.chunks[position - flight.base]
+                    position += 1
+                    yield chunk
+                flight.consumed(id(subscriber), position)
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.changed.wait()
+        finally:
+            flight.subscribers -= 1
+            flight.consumed(id(subscriber), None)
+            if flight.subscribers == 0 and not flight.done and flight.task:
+                flight.task.cancel()  # Nobody is listening any more
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+
+    async def _run_stream(self, key: Hashable, flight: _Flight, start: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async with aclosing(start()) as chunks:  # type: ignore[type-var]  # Async generators in practice
+                async for chunk in chunks:
+                    flight.chunks.append(chunk)
+                    if flight.joinable and flight.end() > self.replay:
+                        # Too far in to replay: later requests start their own flight.
+                        flight.joinable = False
+                        if self._streams.get(key) is flight:
+                            del self._streams[key]
+                    flight.notify()
+                    while flight.lead() >= self.max_lead:
+                        await flight.advanced.wait()  # The slowest subscriber is too far behind
+        except asyncio.CancelledError:
+            flight.error = ConnectionError("upstream cancelled")
+            raise
+        except Exception as e:  # noqa: BLE001 - raised in every subscriber
+            flight.error = e
+        finally:
+            flight.done = True
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+            flight.notify()
+
+    async def call(self, key: Hashable, start: Callable[[], Awaitable[T]]) -> T:
+        """Awaits the shared result for `key`, starting it with `start()` if no call is running."""
+        entry = self._calls.get(key)
+        if entry is None:
+            task: asyncio.Task[T] = asyncio.ensure_future(start())
+            entry = self._calls[key] = (task, [0])
+            task.add_done_callback(lambda _: self._calls.pop(key, None) if self._calls.get(key) is entry else None)
+            self.started += 1
+        else:
+            self.joined += 1
+        shared, waiters = entry
+        waiters[0] += 1
+        try:
+            result: T = await asyncio.shield(shared)
+            return result
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not shared.done():
+                shared.cancel()
+                if self._calls.get(key) is entry:
+                    del self._calls[key]
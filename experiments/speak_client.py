@@ -0,0 +1,114 @@
+"""Thin client for the resident speak daemon (`speakd`).
+
+Imports only the stdlib at startup; `sounddevice` is loaded just before playback
+and the WAV writer only when `-w` is given. Text goes to the daemon over its Unix
+socket and PCM is streamed back for playback and/or saving.
+
+Usage:
+  uv run speakc "Hello there."            # speak through the daemon
+  uv run speakc -f notes.txt -l           # long text, parallel segments
+  uv run speakc -q -w out.wav "Hi"        # save only, no playback
+"""
+
+from __future__ import annotations
+
+import argparse
+import socket
+import sys
+from typing import Any
+
+from experiments.pcm_audio import PcmFormat
+from experiments.speak_protocol import (
+    DEFAULT_SOCKET_PATH,
+    decode_message,
+    encode_message,
+    iter_frames,
+)
+from experiments.startup_profile import FLAG as STARTUP_PROFILE_FLAG
+from experiments.startup_profile import HELP as STARTUP_PROFILE_HELP
+from experiments.startup_profile import profile_if_requested
+
+
+def main() -> None:
+    profile_if_requested("experiments.speak_client:main")
+
+    parser = argparse.ArgumentParser(description="Speak text through the resident speak daemon (start it with `speakd`).")
+    parser.add_argument("text", nargs="*", help="Text to speak (ignored if -f is used)")
+    parser.add_argument("-f", "--file", type=str, help="Read text from this file and speak its contents")
+    parser.add_argument("-v", "--voice", type=str, default="Puck", help="Voice: Puck, Charon, Fenrir, Kore, Aoede, Leda, Orus, Zephyr")
+    parser.add_argument("-o", "--old", action="store_true", help="Use older model gemini-2.0-flash-exp instead of default")
+    parser.add_argument("-l", "--long-form", action="store_true", help="Synthesize long text in parallel segments")
+    parser.add_argument("-w", "--write", type=str, help="Also save the audio to this WAV file")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not play the audio")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the daemon's audio cache")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"Daemon socket path (default: {DEFAULT_SOCKET_PATH})")
+    parser.add_argument(STARTUP_PROFILE_FLAG, action="store_true", help=STARTUP_PROFILE_HELP)
+    args = parser.parse_args()
+
+    if args.file:
+        try:
+            with open(args.file, "r", encoding="utf-8") as handle:
+                text = handle.read()
+        except OSError as exc:
+            raise SystemExit(f"Error: failed to read file '{args.file}': {exc}")
+    else:
+        text = " ".join(args.text) or sys.stdin.read()
+
+    request: dict[str, Any] = {
+        "text": text,
+        "voice": args.voice,
+        "model": "gemini-2.0-flash-exp" if args.old else None,
+        "long_form": args.long_form,
+        "use_cache": not args.no_cache,
+    }
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        raise SystemExit(f"Error: no speak daemon listening on {args.socket}. Start it with: uv run speakd")
+
+    with sock, sock.makefile("rb") as stream:
+        sock.sendall(encode_message(request))
+        header = decode_message(stream.readline())
+        if not header.get("ok"):
+            raise SystemExit(f"Error from daemon: {header.get('error')}")
+        fmt = PcmFormat(**header["format"])
+
+        wav = None
+        if args.write:
+            from experiments.wav_stream import StreamingWavWriter
+
+            wav = StreamingWavWriter(args.write, fmt)
+
+        player = None
+        if not args.quiet:
+            try:
+                import sounddevice as sd  # type: ignore
+            except (ImportError, OSError) as exc:
+                raise SystemExit(f"Error: sounddevice is required for playback ({exc}). Use -q to only save.")
+            player = sd.RawOutputStream(samplerate=fmt.sample_rate_hz, channels=fmt.channels, dtype="int16")
+            player.start()
+
+        try:
+            for pcm in iter_frames(stream):
+                if wav:
+                    wav.write(pcm)
+                if player:
+                    player.write(pcm)
+            status = decode_message(stream.readline())
+        finally:
+            if wav:
+                wav.close()
+            if player:
+                player.stop()
+                player.close()
+
+    if not status.get("ok"):
+        raise SystemExit(f"Error from daemon: {status.get('error')}")
+    if wav:
+        print(f"Saved audio to {args.write}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Resident speak daemon: keeps the Gemini client (and optionally a warm Live session) alive.
+
+Every `speak` invocation pays Python startup, the `google.genai` import, client
+construction and a Live API handshake before the first byte of audio. The daemon
+pays those once and serves requests from the thin client `speakc` over a Unix
+socket (see `experiments/speak_protocol.py` for the wire format).
+
+With `--warm`, a connected Live session for the default model/voice is kept
+ready at all times; a matching request uses it and a new one is connected in
+the background right away.
+
+Usage:
+  uv run speakd --warm          # start the daemon (foreground)
+  uv run speakc "Hello there."  # speak through the daemon
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+from collections.abc import AsyncGenerator
+from contextlib import AsyncExitStack, aclosing
+from dataclasses import asdict
+from typing import TYPE_CHECKING
+
+from experiments.audio_cache import AudioCache, cache_key
+from experiments.gemini_live_audio import (
+    API_KEY,
+    MODEL_ID,
+    SYSTEM_INSTRUCTION,
+    _live_config,
+    create_client,
+    stream_live_audio,
+)
+from experiments.pcm_audio import GEMINI_PCM_FORMAT
+from experiments.speak_protocol import DEFAULT_SOCKET_PATH, encode_frame, encode_message
+from experiments.startup_profile import FLAG as STARTUP_PROFILE_FLAG
+from experiments.startup_profile import HELP as STARTUP_PROFILE_HELP
+from experiments.startup_profile import profile_if_requested
+from experiments.wav_stream import OffloopWriter
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai.live import AsyncSession
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def _send(writer: asyncio.StreamWriter, data: bytes) -> None:
+    """Writes to the client and waits for the socket buffer to drain; ClientDisconnected if it has gone away."""
+    try:
+        writer.write(data)
+        # Backpressure: a slow client slows down reading from the model.
+        await writer.drain()
+    except ConnectionError as e:
+        raise ClientDisconnected(str(e)) from e
+
+
+class WarmSession:
+    """Keeps one connected Live session ready for the next request with a matching model/voice."""
+
+    def __init__(self, client: genai.Client, model_id: str, voice_name: str) -> None:
+        self.client = client
+        self.model_id = model_id
+        self.voice_name = voice_name
+        self._pending: asyncio.Task[tuple[AsyncExitStack, AsyncSession]] | None = None
+
+    def start(self) -> None:
+        self._pending = asyncio.create_task(self._connect())
+
+    async def _connect(self) -> tuple[AsyncExitStack, AsyncSession]:
+        stack = AsyncExitStack()
+        session = await stack.enter_async_context(
+            self.client.aio.live.connect(model=self.model_id, config=_live_config(self.voice_name))
+        )
+        return stack, session
+
+    async def take(self) -> tuple[AsyncExitStack, AsyncSession] | None:
+        """Hands out the warm session (the caller must close the stack) and starts warming the next one."""
+        pending, self._pending = self._pending, None
+        self.start()
+        if pending is None:
+            return None
+        try:
+            return await pending
+        except Exception as e:  # noqa: BLE001 - the request falls back to a fresh connection
+            print(f"[speakd] Warm session could not connect: {e}")
+            return None
+
+    async def close(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        pending.cancel()
+        await asyncio.wait([pending])
+        if pending.cancelled() or pending.exception() is not None:
+            return
+        stack, _ = pending.result()
+        await stack.aclose()
+
+
+class SpeakDaemon:
+    def __init__(self, client: genai.Client, warm: WarmSession | None = None) -> None:
+        self.client = client
+        self.warm = warm
+        self.cache = AudioCache()
+
+    async def _live_chunks(self, text: str, model_id: str, voice_name: str, long_form: bool) -> AsyncGenerator[bytes]:
+        if self.warm and not long_form and (model_id, voice_name) == (self.warm.model_id, self.warm.voice_name):
+            taken = await self.warm.take()
+            if taken:
+                stack, session = taken
+                yielded = False
+                try:
+                    async for chunk in stream_live_audio(self.client, text, model_id=model_id, voice_name=voice_name, session=session, verbose=False):
+                        yielded = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    # Idle sessions get closed by the server; retry once on a fresh connection.
+                    if yielded:
+                        raise
+                    print(f"[speakd] Warm session failed ({e}), reconnecting...")
+                finally:
+                    await stack.aclose()
+
+        async for chunk in stream_live_audio(self.client, text, model_id=model_id, voice_name=voice_name, long_form=long_form, verbose=False):
+            yield chunk
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        started = time.monotonic()
+        try:
+            request = json.loads(await reader.readline())
+            text = str(request["text"])
+            voice_name = str(request.get("voice") or "Puck")
+            model_id = str(request.get("model") or MODEL_ID)
+            long_form = bool(request.get("long_form", False))
+            use_cache = bool(request.get("use_cache", True))
+        except (ValueError, KeyError, TypeError) as e:
+            writer.write(encode_message({"ok": False, "error": f"invalid request: {e}"}))
+            await writer.drain()
+            writer.close()
+            return
+
+        key = cache_key(model_id=model_id, voice_name=voice_name, system_instruction=SYSTEM_INSTRUCTION, text=text)
+        cached = self.cache.get(key) if use_cache else None
+        fmt = cached[1] if cached else GEMINI_PCM_FORMAT
+
+        io = OffloopWriter()
+        entry = self.cache.writer(key, fmt, model_id=model_id, voice_name=voice_name) if use_cache and cached is None else None
+        status: dict[str, object] = {"ok": True}
+        total_bytes = 0
+        try:
+            await _send(writer, encode_message({"ok": True, "format": asdict(fmt), "cached": cached is not None}))
+            if cached:
+                await _send(writer, encode_frame(cached[0]))
+                total_bytes = len(cached[0])
+            else:
+                async with aclosing(self._live_chunks(text, model_id, voice_name, long_form)) as chunks:
+                    async for chunk in chunks:
+                        await _send(writer, encode_frame(chunk))
+                        if entry:
+                            await io.submit(entry.write, chunk)
+                        total_bytes += len(chunk)
+                if entry:
+                    await io.submit(entry.commit)
+                    entry = None
+        except ClientDisconnected:
+            # Only failed writes to the client land here; upstream connection errors are synthesis errors.
+            print("[speakd] Client disconnected mid-stream.")
+            status = {"ok": False, "error": "client disconnected"}
+        except Exception as e:  # noqa: BLE001 - reported to the client; the daemon keeps serving
+            print(f"[speakd] Error during synthesis: {e}")
+            status = {"ok": False, "error": str(e)}
+        finally:
+            if entry:
+                await io.submit(entry.discard)
+            await io.close()
+
+        if status["ok"]:
+            elapsed = time.monotonic() - started
+            source = "cache" if cached else "live"
+            print(f"[speakd] {len(text)} chars, {total_bytes / fmt.bytes_per_second:.1f}s audio from {source} in {elapsed:.2f}s")
+        try:
+            writer.write(encode_frame(b""))
+            writer.write(encode_message(status))
+            await writer.drain()
+            writer.close()
+        except (ConnectionError, BrokenPipeError):
+            pass
+
+
+def _remove_stale_socket(path: str) -> None:
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(path)
+    else:
+        raise SystemExit(f"Error: another speak daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+
+async def serve(socket_path: str, warm: bool, model_id: str, voice_name: str) -> None:
+    client = create_client()
+    warm_session = WarmSession(client, model_id, voice_name) if warm else None
+    daemon = SpeakDaemon(client, warm_session)
+
+    _remove_stale_socket(socket_path)
+    server = await asyncio.start_unix_server(daemon.handle, path=socket_path)
+    os.chmod(socket_path, 0o600)
+    if warm_session:
+        warm_session.start()
+        print(f"Keeping a warm Live session for model {model_id}, voice '{voice_name}'.")
+    print(f"speakd listening on {socket_path}")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if warm_session:
+            await warm_session.close()
+        daemon.cache.report()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main() -> None:
+    profile_if_requested("experiments.speak_daemon:main")
+
+    parser = argparse.ArgumentParser(description="Resident speak daemon serving Gemini Live TTS over a Unix socket.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"Unix socket path (default: env SPEAK_SOCKET or {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--warm", action="store_true", help="Keep a connected Live session ready for the default model/voice")
+    parser.add_argument("-o", "--old", action="store_true", help="Use older model gemini-2.0-flash-exp for the warm session")
+    parser.add_argument("-v", "--voice", default="Puck", help="Voice of the warm session (default: Puck)")
+    parser.add_argument(STARTUP_PROFILE_FLAG, action="store_true", help=STARTUP_PROFILE_HELP)
+    args = parser.parse_args()
+
+    if not API_KEY:
+        raise SystemExit("Error: GEMINI_API_KEY not set.")
+
+    model_id = "gemini-2.0-flash-exp" if args.old else MODEL_ID
+    try:
+        asyncio.run(serve(args.socket, args.warm, model_id, args.voice))
+    except KeyboardInterrupt:
+        print("\nspeakd stopped.")
+
+
+if __name__ == "__main__":
+    main()
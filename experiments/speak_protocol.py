@@ -0,0 +1,56 @@
+"""Wire protocol between the speak daemon (`speakd`) and its thin client (`speakc`).
+
+Deliberately stdlib-only so that importing it costs (almost) nothing.
+
+A connection carries exactly one request:
+  client -> daemon: one JSON line {"text", "voice", "model", "long_form", "use_cache"}
+  daemon -> client: one JSON line {"ok": true, "format": {...PcmFormat fields...}}
+                    (or {"ok": false, "error": "..."} and the connection is closed),
+                    then PCM frames, each a 4-byte big-endian length plus payload,
+                    a zero-length frame, and a final JSON status line.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import tempfile
+from collections.abc import Iterator
+from typing import Any, BinaryIO
+
+DEFAULT_SOCKET_PATH = os.environ.get("SPEAK_SOCKET") or os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), f"speak-to-me-{os.getuid()}.sock"
+)
+
+FRAME_HEADER = struct.Struct(">I")
+
+
+def encode_message(message: dict[str, Any]) -> bytes:
+    return json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def decode_message(line: bytes) -> dict[str, Any]:
+    if not line:
+        raise ConnectionError("connection closed by peer")
+    message: dict[str, Any] = json.loads(line)
+    return message
+
+
+def encode_frame(pcm: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(pcm)) + pcm
+
+
+def iter_frames(stream: BinaryIO) -> Iterator[bytes]:
+    """Yields PCM frames from a blocking stream until the zero-length end frame."""
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise ConnectionError("connection closed mid-stream")
+        (length,) = FRAME_HEADER.unpack(header)
+        if length == 0:
+            return
+        payload = stream.read(length)
+        if len(payload) < length:
+            raise ConnectionError("connection closed mid-frame")
+        yield payload
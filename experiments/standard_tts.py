@@ -1,10 +1,14 @@
 import os
-from google.cloud import texttospeech
 
 def generate_audio_standard(text: str, output_file: str = "standard_tts_output.wav") -> None:
     """
     Generates audio from text using Google Cloud Text-to-Speech API.
     """
+    # Imported here so that importing this module stays cheap.
+    from google.cloud import texttospeech
+
+    from experiments.rate_limit import QUOTA
+
     # Instantiates a client
     client = texttospeech.TextToSpeechClient()
 
@@ -29,9 +33,10 @@ def generate_audio_standard(text: str, output_file: str = "standard_tts_output.w
     print(f"Synthesizing audio for: '{text}'...")
 
     try:
-        response = client.synthesize_speech(
+        # Rate limited, and retried on throttling / transient errors
+        response = QUOTA.call_blocking("cloud-tts", lambda: client.synthesize_speech(
             input=synthesis_input, voice=voice, audio_config=audio_config
-        )
+        ))
 
         # The response's audio_content is binary.
         with open(output_file, "wb") as out:
@@ -0,0 +1,66 @@
+"""`--startup-profile` support for the console entry points.
+
+When the flag is present, the entry point re-runs itself (without the flag) in a
+child interpreter started with `-X importtime`, then prints a breakdown of the
+import time per top-level package and the slowest individual modules.
+
+Cheap to import (only `sys` at module level): every entry point imports it first.
+"""
+
+from __future__ import annotations
+
+import sys
+
+FLAG = "--startup-profile"
+HELP = "Report the import-time breakdown per module for this invocation (runs the command in a profiled child process)"
+
+# import time: <self us> | <cumulative us> | <indent><module>
+_IMPORTTIME_PATTERN = r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$"
+
+
+def profile_if_requested(entry_point: str, top: int = 15) -> None:
+    """
+    If FLAG is in sys.argv, run `entry_point` ("package.module:function") under
+    `-X importtime` with the current arguments, print the report and exit with the
+    child's exit code. Otherwise return immediately.
+    """
+    if FLAG not in sys.argv:
+        return
+
+    import re
+    import subprocess
+    import time
+    from collections import defaultdict
+
+    argv = [sys.argv[0], *(arg for arg in sys.argv[1:] if arg != FLAG)]
+    module, func = entry_point.split(":")
+    code = f"import sys; sys.argv = {argv!r}; from {module} import {func}; {func}()"
+
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], stderr=subprocess.PIPE, text=True, check=False)  # Its exit status is passed on below
+    wall = time.perf_counter() - started
+
+    importtime_re = re.compile(_IMPORTTIME_PATTERN)
+    per_package: dict[str, int] = defaultdict(int)
+    modules: list[tuple[int, int, str]] = []
+    for line in proc.stderr.splitlines():
+        m = importtime_re.match(line)
+        if not m:
+            if not line.startswith("import time:"):
+                print(line, file=sys.stderr)
+            continue
+        self_us, cumulative_us, name = int(m.group(1)), int(m.group(2)), m.group(4)
+        per_package[name.split(".")[0]] += self_us
+        modules.append((cumulative_us, self_us, name))
+
+    total_us = sum(per_package.values())
+    out = sys.stderr
+    print(f"\nStartup profile for {entry_point} (wall {wall * 1000:.0f} ms, imports {total_us / 1000:.0f} ms)", file=out)
+    print(f"{'package':<32} {'self ms':>9} {'share':>7}", file=out)
+    for name, self_us in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{name:<32} {self_us / 1000:>9.1f} {self_us / max(total_us, 1):>7.1%}", file=out)
+    print(f"\n{'module':<48} {'cumulative ms':>14} {'self ms':>9}", file=out)
+    for cumulative_us, self_us, name in sorted(modules, reverse=True)[:top]:
+        print(f"{name:<48} {cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}", file=out)
+
+    raise SystemExit(proc.returncode)
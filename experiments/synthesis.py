@@ -0,0 +1,335 @@
+"""One synthesis API over the three working TTS backends, with request hedging.
+
+Backends (all yield 24 kHz mono PCM16 chunks from `stream(text)`):
+
+- `LiveBackend`: Gemini Live API (`stream_live_audio`); audio streams in.
+- `GenerateContentTtsBackend`: Gemini 2.5 TTS via `generate_content_stream`;
+  audio streams in as the model produces it.
+- `CloudTtsBackend`: Google Cloud Text-to-Speech (LINEAR16 at 24 kHz).
+
+`synthesize_hedged` starts the first backend and, if it has not produced audio
+after `hedge_after_seconds`, starts the next one as well (and so on). The first
+backend to deliver audio wins: the others are cancelled and the winner's
+stream is passed through. A backend that fails before producing audio hands
+over to the next one immediately, without waiting for the deadline. Time to
+first audio is thereby capped at about the hedge delay plus the fallback's own
+latency, at the price of a duplicate request for the slow tail.
+
+Usage:
+  uv run python -m experiments.synthesis "Hello there." --backends live,tts,cloud --hedge-after-ms 1500 -o out.wav
+  uv run python -m experiments.synthesis "Hello there." --repeat 20    # p50/p99 time to first audio
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+import wave
+from collections.abc import AsyncIterator, Callable, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Protocol
+
+from experiments.pcm_audio import GEMINI_PCM_FORMAT, PcmFormat
+from experiments.rate_limit import QUOTA
+
+if TYPE_CHECKING:
+    from google import genai
+
+DEFAULT_HEDGE_AFTER_SECONDS = 1.5
+DEFAULT_BACKENDS = "live,tts,cloud"
+
+
+class SynthesisBackend(Protocol):
+    name: str
+    fmt: PcmFormat
+
+    def stream(self, text: str) -> AsyncIterator[bytes]: ...
+
+
+class LiveBackend:
+    def __init__(self, *, voice: str = "Puck", model_id: str | None = None, api_version: str = "v1alpha", client: genai.Client | None = None) -> None:
+        from experiments.gemini_live_audio import MODEL_ID
+
+        self.name = "live"
+        self.fmt = GEMINI_PCM_FORMAT
+        self.voice = voice
+        self.model_id = model_id or MODEL_ID
+        self.api_version = api_version
+        self._client = client
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        from experiments.gemini_live_audio import API_KEY, stream_live_audio
+
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client(api_key=API_KEY, http_options={"api_version": self.api_version})
+        async for chunk in stream_live_audio(self._client, text, model_id=self.model_id, voice_name=self.voice, verbose=False):
+            yield chunk
+
+
+class GenerateContentTtsBackend:
+    def __init__(self, *, voice: str = "Puck", model: str | None = None, api_version: str = "v1beta", client: genai.Client | None = None, coalesce: bool = True) -> None:
+        from experiments.gemini_3_text_then_25_tts import DEFAULT_TTS_MODEL
+
+        self.name = "tts"
+        self.fmt = GEMINI_PCM_FORMAT
+        self.voice = voice
+        self.model = model or DEFAULT_TTS_MODEL
+        self.api_version = api_version
+        self.coalesce = coalesce
+        self._client = client
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        from experiments.gemini_3_text_then_25_tts import _get_api_key, stream_tts_async
+
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client(api_key=_get_api_key(), http_options={"api_version": self.api_version})
+        # One resampler for the whole stream (the format cannot change mid-stream), so that
+        # its filter state carries across chunk boundaries instead of restarting per chunk.
+        resampler = None
+        async for pcm, fmt, _ in stream_tts_async(self._client, model=self.model, voice=self.voice, text=text, cache=None, coalesce=self.coalesce):
+            if fmt != self.fmt and resampler is None:
+                from experiments.resample import StreamingResampler
+
+                resampler = StreamingResampler(fmt, self.fmt)
+            yield resampler.process(pcm) if resampler else pcm
+        if resampler:
+            yield resampler.flush()
+
+
+class CloudTtsBackend:
+    def __init__(self, *, voice: str = "en-US-Neural2-F", language_code: str = "en-US") -> None:
+        self.name = "cloud"
+        self.fmt = GEMINI_PCM_FORMAT
+        self.voice = voice
+        self.language_code = language_code
+        self._client: Any = None
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        from google.cloud import texttospeech
+
+        client = self._client = self._client or texttospeech.TextToSpeechAsyncClient()
+        response = await QUOTA.call(
+            "cloud-tts",
+            lambda: client.synthesize_speech(
+                input=texttospeech.SynthesisInput(text=text),
+                voice=texttospeech.VoiceSelectionParams(language_code=self.language_code, name=self.voice),
+                audio_config=texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.LINEAR16, sample_rate_hertz=self.fmt.sample_rate_hz),
+            ),
+        )
+        # LINEAR16 responses carry a WAV header.
+        with wave.open(io.BytesIO(response.audio_content), "rb") as wav:
+            fmt = PcmFormat(wav.getframerate(), wav.getnchannels())
+            pcm = wav.readframes(wav.getnframes())
+        yield _convert(pcm, fmt, self.fmt)
+
+
+def _convert(pcm: bytes, src: PcmFormat, dst: PcmFormat) -> bytes:
+    if src == dst:
+        return pcm
+    from experiments.resample import StreamingResampler
+
+    resampler = StreamingResampler(src, dst)
+    return resampler.process(pcm) + resampler.flush()
+
+
+BACKENDS: dict[str, Callable[[str], SynthesisBackend]] = {
+    "live": lambda voice: LiveBackend(voice=voice),
+    "tts": lambda voice: GenerateContentTtsBackend(voice=voice),
+    "cloud": lambda voice: CloudTtsBackend(),  # Cloud TTS has its own voice names
+}
+
+
+def make_backends(names: str, *, voice: str = "Puck") -> list[SynthesisBackend]:
+    """Backends from a comma-separated list such as "live,tts,cloud", in hedging order."""
+    backends: list[SynthesisBackend] = []
+    for name in (n.strip() for n in names.split(",") if n.strip()):
+        if name not in BACKENDS:
+            raise ValueError(f"unknown backend {name!r} (choose from {', '.join(BACKENDS)})")
+        backends.append(BACKENDS[name](voice))
+    if not backends:
+        raise ValueError("no backends given")
+    return backends
+
+
+@dataclass
+class HedgeAttempt:
+    backend: str
+    started_seconds: float  # After the request started
+    first_audio_seconds: float | None = None
+    error: str | None = None
+    cancelled: bool = False
+
+
+@dataclass
+class HedgeOutcome:
+    winner: str | None = None
+    first_audio_seconds: float | None = None
+    attempts: list[HedgeAttempt] = field(default_factory=list)
+
+    def summary_line(self) -> str:
+        ttfa = "n/a" if self.first_audio_seconds is None else f"{self.first_audio_seconds * 1000:.0f} ms"
+        tried = ", ".join(
+            f"{a.backend}@{a.started_seconds * 1000:.0f}ms:" + ("won" if a.backend == self.winner and not a.error else "cancelled" if a.cancelled else f"failed ({a.error})")
+            for a in self.attempts
+        )
+        return f"Hedge: winner {self.winner or 'none'}, first audio {ttfa} [{tried}]"
+
+
+async def _close(iterator: AsyncIterator[bytes]) -> None:
+    aclose = getattr(iterator, "aclose", None)
+    if aclose is not None:
+        # A cancelled loser may fail while shutting down; its audio is not wanted anyway.
+        with contextlib.suppress(Exception):
+            await aclose()
+
+
+async def synthesize_hedged(
+    backends: Sequence[SynthesisBackend],
+    text: str,
+    *,
+    hedge_after_seconds: float = DEFAULT_HEDGE_AFTER_SECONDS,
+    fmt: PcmFormat = GEMINI_PCM_FORMAT,
+    outcome: HedgeOutcome | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yields the audio of whichever backend produces audio first, in `fmt`.
+    Backends are started in order, the next one each time `hedge_after_seconds`
+    pass without audio (or as soon as the running ones have all failed).
+    """
+    outcome = outcome if outcome is not None else HedgeOutcome()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    racing: dict[asyncio.Task[bytes], tuple[SynthesisBackend, AsyncIterator[bytes], HedgeAttempt]] = {}
+    launched = 0
+
+    def launch() -> None:
+        nonlocal launched
+        backend = backends[launched]
+        launched += 1
+        iterator = backend.stream(text)
+        attempt = HedgeAttempt(backend.name, loop.time() - started)
+        outcome.attempts.append(attempt)
+        racing[asyncio.ensure_future(anext(iterator))] = (backend, iterator, attempt)
+
+    winner: tuple[SynthesisBackend, AsyncIterator[bytes]] | None = None
+    first = b""
+    try:
+        launch()
+        deadline = started + hedge_after_seconds
+        while racing and winner is None:
+            timeout = max(0.0, deadline - loop.time()) if launched < len(backends) else None
+            done, _ = await asyncio.wait(racing, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()  # Hedge: the running backends are too slow
+                deadline = loop.time() + hedge_after_seconds
+                continue
+            for task in done:
+                backend, iterator, attempt = racing.pop(task)
+                error = task.exception()
+                if error is None:
+                    attempt.first_audio_seconds = loop.time() - started
+                    winner, first = (backend, iterator), task.result()
+                    break
+                attempt.error = "no audio" if isinstance(error, StopAsyncIteration) else f"{type(error).__name__}: {error}"
+                await _close(iterator)
+            if winner is None and not racing and launched < len(backends):
+                launch()  # Everything running has failed: fall back right away
+                deadline = loop.time() + hedge_after_seconds
+    finally:
+        for task, (_, iterator, attempt) in racing.items():
+            task.cancel()
+            attempt.cancelled = True
+        for task, (_, iterator, _) in racing.items():
+            await asyncio.gather(task, return_exceptions=True)
+            await _close(iterator)
+        racing.clear()
+
+    if winner is None:
+        errors = "; ".join(f"{a.backend}: {a.error}" for a in outcome.attempts)
+        raise RuntimeError(f"all synthesis backends failed ({errors})")
+
+    backend, iterator = winner
+    outcome.winner = backend.name
+    outcome.first_audio_seconds = loop.time() - started
+    resampler = None
+    if backend.fmt != fmt:
+        from experiments.resample import StreamingResampler
+
+        resampler = StreamingResampler(backend.fmt, fmt)
+    try:
+        chunk: bytes | None = first
+        while chunk is not None:
+            yield resampler.process(chunk) if resampler else chunk
+            chunk = await anext(iterator, None)
+        if resampler:
+            yield resampler.flush()
+    finally:
+        await _close(iterator)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    from experiments.live_metrics import percentile
+    from experiments.wav_stream import StreamingWavWriter
+
+    backends = make_backends(args.backends, voice=args.voice)
+    first_audio: list[float] = []
+    wins: dict[str, int] = {}
+    for run in range(args.repeat):
+        outcome = HedgeOutcome()
+        wav = StreamingWavWriter(args.output, GEMINI_PCM_FORMAT) if args.output and run == 0 else None
+        started = time.perf_counter()
+        audio_bytes = 0
+        try:
+            async for chunk in synthesize_hedged(backends, args.text, hedge_after_seconds=args.hedge_after_ms / 1000, outcome=outcome):
+                audio_bytes += len(chunk)
+                if wav:
+                    wav.write(chunk)
+        except RuntimeError as e:
+            print(f"[{run + 1}] {e}")
+            continue
+        finally:
+            if wav:
+                wav.close()
+        print(f"[{run + 1}] {outcome.summary_line()}; {audio_bytes / GEMINI_PCM_FORMAT.bytes_per_second:.1f}s of audio in {time.perf_counter() - started:.1f}s")
+        if outcome.first_audio_seconds is not None and outcome.winner:
+            first_audio.append(outcome.first_audio_seconds)
+            wins[outcome.winner] = wins.get(outcome.winner, 0) + 1
+    if args.output:
+        print(f"Wrote WAV: {args.output}")
+    if len(first_audio) > 1:
+        ordered = sorted(first_audio)
+        print(
+            f"Time to first audio over {len(ordered)} run(s): p50 {percentile(ordered, 50) * 1000:.0f} ms, "
+            f"p99 {percentile(ordered, 99) * 1000:.0f} ms; wins: {', '.join(f'{k} {v}' for k, v in sorted(wins.items()))}"
+        )
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Synthesize speech with hedged requests across the Live, GenerateContent TTS and Cloud TTS backends.")
+    parser.add_argument("text", help="Text to speak")
+    parser.add_argument("--backends", default=DEFAULT_BACKENDS, help=f"Comma-separated backends in hedging order (default: {DEFAULT_BACKENDS})")
+    parser.add_argument("--hedge-after-ms", type=int, default=int(DEFAULT_HEDGE_AFTER_SECONDS * 1000), help="Start the next backend when there is no audio after this long (default: %(default)s)")
+    parser.add_argument("-v", "--voice", default="Puck", help="Gemini voice for the live and tts backends (default: Puck)")
+    parser.add_argument("-o", "--output", help="Write the audio of the first run to this WAV file")
+    parser.add_argument("--repeat", type=int, default=1, help="Synthesize the text this many times and report time-to-first-audio percentiles")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_run(args))
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Split long texts into speakable segments.
+
+Segments end on paragraph or sentence boundaries whenever possible so that each
+one can be synthesized by an independent TTS request and the results can be
+concatenated without audible cuts mid-sentence.
+
+`SentenceStream` does the same incrementally for text that arrives in pieces
+(streaming generation), emitting each sentence as soon as it is complete.
+"""
+
+from __future__ import annotations
+
+import re
+
+DEFAULT_SEGMENT_CHARS = 600
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+# Whitespace after terminal punctuation, which may be followed by up to two closing quotes or brackets
+# (lookbehinds must have a fixed width, hence one per count). The closers stay with their sentence.
+_SENTENCE_RE = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"')\]])|(?<=[.!?…][\"')\]]{2}))\s+")
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split text into sentences (terminal punctuation followed by whitespace)."""
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def _split_long(sentence: str, max_chars: int) -> list[str]:
+    # A single sentence longer than the budget: fall back to word boundaries.
+    pieces: list[str] = []
+    current = ""
+    for word in sentence.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text_segments(text: str, max_chars: int = DEFAULT_SEGMENT_CHARS) -> list[str]:
+    """
+    Split text into segments of at most ~max_chars characters.
+
+    Paragraphs are never merged with each other, sentences are packed greedily
+    into a segment until the budget is reached.
+    """
+    segments: list[str] = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        current = ""
+        for sentence in split_sentences(" ".join(paragraph.split())):
+            if len(sentence) > max_chars:
+                if current:
+                    segments.append(current)
+                    current = ""
+                segments.extend(_split_long(sentence, max_chars))
+                continue
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                segments.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            segments.append(current)
+    return segments
+
+
+class SentenceStream:
+    """
+    Incremental sentence splitter for streamed text.
+
+    feed() returns the sentences completed by the new text; a sentence counts as
+    complete once the whitespace after its terminal punctuation has arrived.
+    Sentences shorter than `min_chars` are joined with the following ones so
+    tiny fragments ("Sure.") do not each cost a TTS request.
+    """
+
+    def __init__(self, min_chars: int = 0) -> None:
+        self.min_chars = min_chars
+        self._buffer = ""
+        self._pending = ""
+
+    def feed(self, text: str) -> list[str]:
+        self._buffer += text
+        boundary = 0
+        for m in _SENTENCE_RE.finditer(self._buffer):
+            boundary = m.end()
+        for m in _PARAGRAPH_RE.finditer(self._buffer):
+            boundary = max(boundary, m.end())
+        if not boundary:
+            return []
+        complete, self._buffer = self._buffer[:boundary], self._buffer[boundary:]
+        paragraphs = _PARAGRAPH_RE.split(complete)
+        return self._pack([s for paragraph in paragraphs for s in split_sentences(" ".join(paragraph.split()))])
+
+    def flush(self) -> list[str]:
+        """Returns whatever is left once the stream has ended."""
+        rest = " ".join(f"{self._pending} {self._buffer}".split())
+        self._buffer = self._pending = ""
+        return [rest] if rest else []
+
+    def _pack(self, sentences: list[str]) -> list[str]:
+        ready: list[str] = []
+        for sentence in sentences:
+            self._pending = f"{self._pending} {sentence}" if self._pending else sentence
+            if len(self._pending) >= self.min_chars:
+                ready.append(self._pending)
+                self._pending = ""
+        return ready
@@ -0,0 +1,232 @@
+"""Batch mode for the Gemini 3 text -> Gemini 2.5 TTS pipeline.
+
+Reads prompts from a JSONL or CSV file and runs each row through the same stages
+as `gemini_3_text_then_25_tts.py` (text, TTS, optional verification), using the
+async client with a fixed pool of workers:
+
+- Rows are streamed from the file through a small bounded queue, so memory does
+  not grow with the number of prompts.
+- Every model call goes through a `QuotaLimiter` (experiments/rate_limit.py).
+  It keeps the process under a requests-per-minute ceiling, which text, TTS and
+  verification calls count towards together. It retries throttled (429/503) and
+  transient failures with jittered backoff, and reduces the calls in flight
+  per model while the API is throttling.
+- Each row produces `<out-dir>/<id>.wav` (or another `--format`, encoded on a
+  worker thread) plus one line in the results manifest (JSONL). The line is written as soon as the row finishes, so a partial run
+  still leaves a usable manifest.
+- With verification, a sample of the rows (--verify-sample) is transcribed in
+  the background and scored by word error rate; the results go to
+  `<out-dir>/verification.jsonl` and outliers are listed at the end.
+
+Input rows need a `prompt`. `id` (default: row number) and `voice` (default:
+--voice) are optional. CSV files need a header row. A row without a prompt (or
+an invalid JSON line) gets an error entry in the manifest; the batch goes on.
+So does a row whose id names the same output file as an earlier row's.
+
+Usage:
+  uv run experiments/gemini_3_text_then_25_tts.py --batch prompts.jsonl --out-dir out/ --workers 8 --rpm 120
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, TextIO
+
+from experiments.audio_cache import AudioCache
+from experiments.audio_codecs import CODECS, DEFAULT_FORMAT, write_audio
+from experiments.gemini_3_text_then_25_tts import (
+    _clip_text,
+    _synthesize_async,
+    _text_config,
+)
+from experiments.genai_response import extract_text
+from experiments.rate_limit import QuotaLimiter
+from experiments.verification import DEFAULT_WER_THRESHOLD, Verifier
+from experiments.wav_stream import OffloopWriter
+
+if TYPE_CHECKING:
+    from google import genai
+
+DEFAULT_WORKERS = 4
+DEFAULT_RPM = 60
+MANIFEST_FILENAME = "manifest.jsonl"
+VERIFICATION_FILENAME = "verification.jsonl"
+
+
+@dataclass(frozen=True)
+class BatchRow:
+    id: str
+    prompt: str
+    voice: str | None = None
+    error: str | None = None  # Set for rows that cannot be processed
+
+
+@dataclass(frozen=True)
+class BatchSettings:
+    text_model: str
+    tts_model: str
+    voice: str
+    out_dir: str
+    max_chars: int = 800
+    verify_model: str | None = None
+    verify_sample: float = 1.0
+    wer_threshold: float = DEFAULT_WER_THRESHOLD
+    workers: int = DEFAULT_WORKERS
+    rpm: int = DEFAULT_RPM
+    output_format: str = DEFAULT_FORMAT
+    postprocess: bool = False  # Trim silence and normalize loudness before encoding
+
+
+def _parse_json_line(line: str) -> dict[str, Any] | str:
+    """The record of one JSONL line, or why there is none."""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return f"invalid JSON: {e}"
+    return record if isinstance(record, dict) else f"expected a JSON object, got {type(record).__name__}"
+
+
+def read_rows(path: str) -> Iterator[BatchRow]:
+    """
+    Yields the rows of a .csv (with header) or JSONL file, lazily. Rows that
+    cannot be processed are yielded with `error` set rather than raised; this
+    includes rows whose output file an earlier row already claimed.
+    """
+    claimed: dict[str, int] = {}  # Output file name (casefolded) -> row number
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            records: Iterator[dict[str, Any] | str] = csv.DictReader(f)
+        else:
+            records = (_parse_json_line(line) for line in f if line.strip())
+        for number, record in enumerate(records, start=1):
+            if isinstance(record, str):
+                yield BatchRow(id=f"{number:06d}", prompt="", error=f"row {number}: {record}")
+                continue
+            row_id = str(record.get("id") or "").strip() or f"{number:06d}"
+            prompt = str(record.get("prompt") or "").strip()
+            if not prompt:
+                yield BatchRow(id=row_id, prompt="", error=f"row {number} has no 'prompt'")
+                continue
+            first = claimed.setdefault(_safe_filename(row_id).casefold(), number)
+            if first != number:
+                yield BatchRow(id=row_id, prompt=prompt, error=f"row {number}: id {row_id!r} has the same output file as row {first}")
+                continue
+            yield BatchRow(id=row_id, prompt=prompt, voice=record.get("voice") or None)
+
+
+def _safe_filename(row_id: str) -> str:
+    return re.sub(r"[^\w.-]", "_", row_id)
+
+
+async def _process_row(client: genai.Client, row: BatchRow, settings: BatchSettings, limiter: QuotaLimiter, cache: AudioCache | None, verifier: Verifier | None) -> dict[str, Any]:
+    if row.error:
+        return {"id": row.id, "prompt": row.prompt, "status": "error", "error": row.error, "seconds": 0.0}
+    started = time.perf_counter()
+    voice = row.voice or settings.voice
+    output = os.path.join(settings.out_dir, _safe_filename(row.id) + CODECS[settings.output_format].extension)
+    result: dict[str, Any] = {"id": row.id, "prompt": row.prompt, "voice": voice, "output": output, "status": "ok"}
+    try:
+        text_resp = await limiter.call(settings.text_model, lambda: client.aio.models.generate_content(model=settings.text_model, contents=row.prompt, config=_text_config()))
+        text = _clip_text(extract_text(text_resp), settings.max_chars)
+        result["text"] = text
+
+        audio_bytes, fmt, cached = await _synthesize_async(client, model=settings.tts_model, voice=voice, text=text, cache=cache, limiter=limiter)
+        result["cached"] = cached
+
+        processed = audio_bytes
+        if settings.postprocess:
+            from experiments.postprocess import postprocess_clip
+
+            processed = await asyncio.to_thread(postprocess_clip, audio_bytes, fmt)
+        encoded = await asyncio.to_thread(write_audio, output, processed, fmt, settings.output_format)
+        result["audio_seconds"] = round(encoded.audio_seconds, 3)
+        result["file_bytes"] = encoded.file_bytes
+        result["encode_seconds"] = round(encoded.encode_seconds, 4)
+
+        if verifier:
+            result["verify_sampled"] = await verifier.submit(row.id, text, audio_bytes, fmt)
+    except Exception as e:  # noqa: BLE001 - a failed row becomes an error entry in the manifest
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _append_line(f: TextIO, line: str) -> None:
+    f.write(line + "\n")
+    f.flush()
+
+
+async def run_batch(client: genai.Client, rows: Iterator[BatchRow], settings: BatchSettings, *, manifest_path: str | None = None, use_cache: bool = True) -> tuple[int, int]:
+    """Processes all rows and returns (succeeded, failed)."""
+    os.makedirs(settings.out_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(settings.out_dir, MANIFEST_FILENAME)
+    limiter = QuotaLimiter(project_rpm=settings.rpm)
+    cache = AudioCache() if use_cache else None
+    verifier = None
+    if settings.verify_model:
+        verifier = Verifier(client, model=settings.verify_model, sample_rate=settings.verify_sample, threshold=settings.wer_threshold, limiter=limiter)
+    queue: asyncio.Queue[BatchRow | None] = asyncio.Queue(maxsize=settings.workers * 2)
+    counts = {"ok": 0, "error": 0}
+    output_bytes = 0
+    output_seconds = 0.0
+    started = time.perf_counter()
+
+    # The manifest is opened and written on a worker thread, one line per finished row.
+    manifest = await asyncio.to_thread(open, manifest_path, "w", encoding="utf-8")
+    writer = OffloopWriter()
+    try:
+
+        async def worker() -> None:
+            nonlocal output_bytes, output_seconds
+            while (row := await queue.get()) is not None:
+                result = await _process_row(client, row, settings, limiter, cache, verifier)
+                await writer.submit(_append_line, manifest, json.dumps(result, ensure_ascii=False))
+                counts[result["status"]] += 1
+                if "file_bytes" in result:
+                    output_bytes += result["file_bytes"]
+                    output_seconds += result["audio_seconds"]
+                detail = f"{result['seconds']:.1f}s" if result["status"] == "ok" else result["error"]
+                print(f"[{counts['ok'] + counts['error']}] {row.id}: {result['status']} ({detail})")
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, settings.workers))]
+        try:
+            for row in rows:
+                await queue.put(row)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+    finally:
+        try:
+            await writer.close()
+        finally:
+            manifest.close()
+
+    if verifier:
+        await verifier.drain()
+        report_path = os.path.join(settings.out_dir, VERIFICATION_FILENAME)
+        verifier.write_report(report_path)
+        print(verifier.summary())
+        print(f"Verification report: {report_path}")
+
+    elapsed = time.perf_counter() - started
+    total = counts["ok"] + counts["error"]
+    print(f"\nBatch done: {counts['ok']} ok, {counts['error']} failed in {elapsed:.1f}s ({total / elapsed * 60 if elapsed else 0:.1f} rows/min).")
+    print(f"Manifest: {manifest_path}")
+    if output_seconds:
+        print(f"Output: {output_bytes / 1e6:.1f} MB of {settings.output_format} for {output_seconds / 60:.1f} min of audio ({output_bytes / 1e6 / (output_seconds / 60):.2f} MB/min).")
+    print(limiter.stats_line())
+    if cache:
+        cache.report()
+    return counts["ok"], counts["error"]
@@ -0,0 +1,520 @@
+"""Asyncio HTTP/WebSocket server that streams synthesized speech to many clients.
+
+One process, one shared `genai.Client`, and audio streamed to each client as
+it comes out of the Live session (or the GenerateContent TTS model):
+
+- `POST /tts` with a JSON body `{"text", "voice", "model", "backend", "format"}`
+  (or `GET /tts?text=...`) answers with a chunked `audio/L16` (format "pcm")
+  or `audio/wav` (format "wav", with an open-ended header) stream.
+- `GET /ws` upgrades to a WebSocket. Each text message is a request in the
+  same JSON shape. The server answers with a JSON start message, binary audio
+  messages and a JSON end message, and then waits for the next request.
+- `GET /healthz` returns the server's counters as JSON.
+
+Identical requests arriving together share one upstream generation (see
+`experiments.single_flight`); each still gets its own queue and flow control.
+
+Flow control, per request: the upstream generation feeds a bounded queue of
+`buffer_chunks` chunks that the connection drains into a socket with a small
+write buffer. When a client reads slowly, the queue fills up and the upstream
+receive loop stops reading from the model until there is room again. A shared
+generation runs at the pace of its slowest subscriber, give or take the
+flight's `max_lead` chunks; only its first chunks are kept for late joiners to
+replay (see `experiments.single_flight`). A client that blocks the stream
+for more than `stall_seconds` is disconnected so that its upstream session is
+freed (or, on a shared generation, so that the others are no longer held back).
+
+Limits: at most `max_sessions` upstream generations run at once. A slot is
+taken per generation, not per request: requests joining a generation in flight
+need none, so a broadcast to many clients costs one slot. Requests wait up to
+`slot_timeout` seconds for one and then get 503; the response status is only
+sent with the first audio chunk, so that this is still possible. Connections
+beyond `max_connections` are refused with 503 straight away.
+
+The HTTP and WebSocket handling is deliberately minimal and stdlib-only: one
+request per HTTP connection, no TLS, no compression. Run it behind a proxy if it
+has to face anything but internal clients.
+
+Usage:
+  uv run speak-server --port 8765 --max-sessions 8
+  curl -sN localhost:8765/tts -d '{"text": "Hello there."}' | play -t raw -r 24000 -e signed -b 16 -c 1 -
+  curl -s "localhost:8765/tts?text=Hello+there.&format=wav" -o hello.wav
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import hashlib
+import json
+import struct
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qsl, urlsplit
+
+from experiments.gemini_live_audio import (
+    API_KEY,
+    MODEL_ID,
+    create_client,
+    stream_live_audio,
+)
+from experiments.pcm_audio import GEMINI_PCM_FORMAT
+from experiments.single_flight import SingleFlight
+from experiments.synthesis import GenerateContentTtsBackend
+from experiments.wav_stream import wav_header
+
+if TYPE_CHECKING:
+    from google import genai
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_SESSIONS = 8  # Concurrent upstream generations
+DEFAULT_MAX_CONNECTIONS = 256
+DEFAULT_BUFFER_CHUNKS = 16  # Per request, between the upstream and the client socket
+DEFAULT_WRITE_BUFFER_BYTES = 64 * 1024
+DEFAULT_STALL_SECONDS = 20.0
+DEFAULT_SLOT_TIMEOUT = 10.0
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 256 * 1024
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_STREAMING_WAV_DATA_BYTES = 0xFFFFFFFF - 36  # Unknown length, as streaming WAV encoders write it
+
+BACKENDS = ("live", "tts")
+FORMATS = ("pcm", "wav")
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class SynthesisRequest:
+    text: str
+    voice: str = "Puck"
+    model: str | None = None
+    backend: str = "live"
+    format: str = "pcm"
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> SynthesisRequest:
+        text = str(data.get("text") or "").strip()
+        if not text:
+            raise RequestError(400, "missing 'text'")
+        request = cls(text, str(data.get("voice") or "Puck"), data.get("model") or None, str(data.get("backend") or "live"), str(data.get("format") or "pcm"))
+        if request.backend not in BACKENDS:
+            raise RequestError(400, f"unknown backend {request.backend!r} (choose from {', '.join(BACKENDS)})")
+        if request.format not in FORMATS:
+            raise RequestError(400, f"unknown format {request.format!r} (choose from {', '.join(FORMATS)})")
+        return request
+
+    @property
+    def flight_key(self) -> tuple[str, str | None, str, str]:
+        """Requests with equal keys get the same audio; the container format is added per connection."""
+        return (self.backend, self.model, self.voice, self.text)
+
+
+@dataclass
+class ServerStats:
+    started_at: float = field(default_factory=time.time)
+    connections: int = 0
+    active_connections: int = 0
+    active_sessions: int = 0
+    waiting_for_slot: int = 0
+    requests: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    slow_clients: int = 0
+    audio_bytes_sent: int = 0
+
+
+class SlowClientError(Exception):
+    pass
+
+
+class TtsServer:
+    """Serves synthesis requests over HTTP and WebSocket with one shared client."""
+
+    def __init__(
+        self,
+        client: genai.Client,
+        *,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        buffer_chunks: int = DEFAULT_BUFFER_CHUNKS,
+        write_buffer_bytes: int = DEFAULT_WRITE_BUFFER_BYTES,
+        stall_seconds: float = DEFAULT_STALL_SECONDS,
+        slot_timeout: float = DEFAULT_SLOT_TIMEOUT,
+        verbose: bool = True,
+    ) -> None:
+        self.client = client
+        self.max_sessions = max_sessions
+        self.max_connections = max_connections
+        self.buffer_chunks = buffer_chunks
+        self.write_buffer_bytes = write_buffer_bytes
+        self.stall_seconds = stall_seconds
+        self.slot_timeout = slot_timeout
+        self.verbose = verbose
+        self.stats = ServerStats()
+        self._slots = asyncio.Semaphore(max_sessions)
+        self._flights = SingleFlight()
+        self._tts_backends: dict[tuple[str, str | None], GenerateContentTtsBackend] = {}
+
+    def _log(self, message: str) -> None:
+        if self.verbose:
+            print(f"[speak-server] {message}")
+
+    def upstream(self, request: SynthesisRequest) -> AsyncIterator[bytes]:
+        """24 kHz mono PCM16 chunks for the request, from the shared client (coalesced by `stream`, not below it)."""
+        if request.backend == "tts":
+            key = (request.voice, request.model)
+            backend = self._tts_backends.get(key)
+            if backend is None:
+                backend = self._tts_backends[key] = GenerateContentTtsBackend(voice=request.voice, model=request.model, client=self.client, coalesce=False)
+            return backend.stream(request.text)
+        return stream_live_audio(self.client, request.text, model_id=request.model or MODEL_ID, voice_name=request.voice, verbose=False, coalesce=False)
+
+    async def acquire_slot(self) -> None:
+        """Waits for an upstream slot; RequestError(503) after `slot_timeout`."""
+        self.stats.waiting_for_slot += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.slot_timeout)
+        except TimeoutError:
+            raise RequestError(503, f"all {self.stats.active_sessions} synthesis slots busy") from None
+        finally:
+            self.stats.waiting_for_slot -= 1
+        self.stats.active_sessions += 1
+
+    def release_slot(self) -> None:
+        self.stats.active_sessions -= 1
+        self._slots.release()
+
+    async def _generate(self, request: SynthesisRequest) -> AsyncIterator[bytes]:
+        """One upstream generation, holding a slot while it runs."""
+        await self.acquire_slot()
+        try:
+            async for chunk in self.upstream(request):
+                yield chunk
+        finally:
+            self.release_slot()
+
+    async def stream(self, request: SynthesisRequest, send: Callable[[bytes], Awaitable[None]]) -> int:
+        """
+        Joins (or starts, taking a slot) the upstream generation for the
+        request, feeds it into a bounded queue and hands each chunk to `send`;
+        returns the audio bytes sent. Raises RequestError(503) if no slot
+        frees up in time, and SlowClientError if a `send` is blocked for
+        `stall_seconds`.
+        """
+        queue: asyncio.Queue[bytes | BaseException | None] = asyncio.Queue(self.buffer_chunks)
+
+        async def produce() -> None:
+            try:
+                async for chunk in self._flights.stream(request.flight_key, lambda: self._generate(request)):
+                    await queue.put(chunk)  # Blocks while the client is behind: backpressure upstream
+                await queue.put(None)
+            except Exception as e:  # noqa: BLE001 - raised by the consumer below
+                await queue.put(e)
+
+        producer = asyncio.create_task(produce())
+        sent = 0
+        try:
+            while (item := await queue.get()) is not None:
+                if isinstance(item, BaseException):
+                    raise item
+                try:
+                    await asyncio.wait_for(send(item), self.stall_seconds)
+                except TimeoutError:
+                    self.stats.slow_clients += 1
+                    raise SlowClientError(f"client did not read for {self.stall_seconds:g}s") from None
+                sent += len(item)
+                self.stats.audio_bytes_sent += len(item)
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+        return sent
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats.connections += 1
+        self.stats.active_connections += 1
+        writer.transport.set_write_buffer_limits(high=self.write_buffer_bytes)
+        try:
+            if self.stats.active_connections > self.max_connections:
+                self.stats.rejected += 1
+                await _send_json(writer, 503, {"ok": False, "error": "too many connections"})
+                return
+            method, target, headers = await _read_request_head(reader)
+            url = urlsplit(target)
+            if url.path == "/healthz" and method == "GET":
+                await _send_json(writer, 200, {"ok": True, **asdict(self.stats), "coalesced_requests": self._flights.joined, "uptime_seconds": time.time() - self.stats.started_at})
+            elif url.path == "/ws" and method == "GET" and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_websocket(reader, writer, headers)
+            elif url.path == "/tts" and method in ("GET", "POST"):
+                if method == "POST":
+                    body = await _read_body(reader, headers)
+                    try:
+                        data = json.loads(body or b"{}")
+                    except ValueError as e:
+                        raise RequestError(400, f"invalid JSON body: {e}") from None
+                else:
+                    data = dict(parse_qsl(url.query))
+                await self._serve_http(writer, SynthesisRequest.from_dict(data))
+            else:
+                raise RequestError(404, f"no route for {method} {url.path}")
+        except RequestError as e:
+            with contextlib.suppress(ConnectionError):
+                await _send_json(writer, e.status, {"ok": False, "error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # The client went away
+        finally:
+            self.stats.active_connections -= 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _serve_http(self, writer: asyncio.StreamWriter, request: SynthesisRequest) -> None:
+        self.stats.requests += 1
+        started = time.perf_counter()
+        responded = False
+
+        async def send_chunk(chunk: bytes) -> None:
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            await writer.drain()
+
+        async def respond() -> None:
+            # Deferred to the first chunk, so that a request that gets no slot can still be answered with 503.
+            nonlocal responded
+            responded = True
+            content_type = "audio/wav" if request.format == "wav" else f"audio/L16;rate={GEMINI_PCM_FORMAT.sample_rate_hz};channels={GEMINI_PCM_FORMAT.channels}"
+            writer.write(
+                "HTTP/1.1 200 OK\r\n"
+                f"Content-Type: {content_type}\r\n"
+                "Transfer-Encoding: chunked\r\n"
+                "Cache-Control: no-store\r\n"
+                "Connection: close\r\n\r\n".encode("ascii")
+            )
+            if request.format == "wav":
+                await send_chunk(wav_header(GEMINI_PCM_FORMAT, _STREAMING_WAV_DATA_BYTES))
+
+        async def send(chunk: bytes) -> None:
+            if not responded:
+                await respond()
+            await send_chunk(chunk)
+
+        try:
+            sent = await self.stream(request, send)
+        except RequestError:
+            self.stats.rejected += 1  # No slot for the generation; nothing was sent yet
+            raise
+        except Exception as e:
+            self.stats.failed += 1
+            self._log(f"HTTP stream failed after {time.perf_counter() - started:.1f}s: {e}")
+            if not responded:
+                raise RequestError(502, str(e)) from e
+            # The status line is gone; closing without the final chunk marks the body as incomplete.
+            if isinstance(e, SlowClientError):
+                writer.transport.abort()  # Do not wait for it to read what is still buffered
+            return
+        if not responded:
+            await respond()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        self.stats.completed += 1
+        self._log(f"{request.backend}: {len(request.text)} chars, {sent / GEMINI_PCM_FORMAT.bytes_per_second:.1f}s of audio in {time.perf_counter() - started:.2f}s")
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: dict[str, str]) -> None:
+        key = headers.get("sec-websocket-key")
+        if not key:
+            raise RequestError(400, "missing Sec-WebSocket-Key")
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n".encode("ascii"))
+        await writer.drain()
+
+        async def send_json(message: dict[str, Any]) -> None:
+            writer.write(_ws_frame(0x1, json.dumps(message).encode("utf-8")))
+            await writer.drain()
+
+        async def send_audio(chunk: bytes) -> None:
+            writer.write(_ws_frame(0x2, chunk))
+            await writer.drain()
+
+        async def respond(request: SynthesisRequest) -> None:
+            await send_json({"ok": True, "format": asdict(GEMINI_PCM_FORMAT)})
+            if request.format == "wav":
+                await send_audio(wav_header(GEMINI_PCM_FORMAT, _STREAMING_WAV_DATA_BYTES))
+
+        while True:
+            opcode, payload = await _read_ws_message(reader)
+            if opcode == 0x8:  # Close
+                writer.write(_ws_frame(0x8, payload[:2]))
+                await writer.drain()
+                return
+            if opcode == 0x9:  # Ping
+                writer.write(_ws_frame(0xA, payload))
+                await writer.drain()
+                continue
+            if opcode != 0x1:
+                continue
+            try:
+                request = SynthesisRequest.from_dict(json.loads(payload))
+            except (RequestError, ValueError, AttributeError) as e:
+                await send_json({"ok": False, "error": str(e)})
+                continue
+            self.stats.requests += 1
+            started = time.perf_counter()
+            responded = False
+
+            async def send(chunk: bytes, request: SynthesisRequest = request) -> None:
+                # The start message waits for the first chunk, like the HTTP status line.
+                nonlocal responded
+                if not responded:
+                    responded = True
+                    await respond(request)
+                await send_audio(chunk)
+
+            try:
+                sent = await self.stream(request, send)
+                if not responded:
+                    await respond(request)
+            except RequestError as e:
+                self.stats.rejected += 1
+                await send_json({"ok": False, "error": str(e), "status": e.status})
+                continue
+            except SlowClientError as e:
+                self.stats.failed += 1
+                self._log(f"WebSocket client dropped: {e}")
+                writer.transport.abort()
+                return
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.stats.failed += 1
+                raise
+            except Exception as e:  # noqa: BLE001 - reported to the client; the socket stays open for the next request
+                self.stats.failed += 1
+                await send_json({"ok": False, "error": str(e)})
+                continue
+            self.stats.completed += 1
+            await send_json({"ok": True, "done": True, "audio_bytes": sent, "seconds": round(time.perf_counter() - started, 3)})
+
+
+async def _read_request_head(reader: asyncio.StreamReader) -> tuple[str, str, dict[str, str]]:
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise RequestError(431, "request head too large") from None
+    if len(head) > MAX_HEADER_BYTES:
+        raise RequestError(431, "request head too large")
+    request_line, *lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise RequestError(400, "malformed request line") from None
+    headers = {}
+    for line in lines:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bytes:
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise RequestError(400, "invalid Content-Length") from None
+    if length > MAX_BODY_BYTES:
+        raise RequestError(413, f"body larger than {MAX_BODY_BYTES} bytes")
+    return await reader.readexactly(length) if length else b""
+
+
+async def _send_json(writer: asyncio.StreamWriter, status: int, message: dict[str, Any]) -> None:
+    reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 431: "Request Header Fields Too Large", 503: "Service Unavailable"}
+    body = json.dumps(message).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {reasons.get(status, 'Error')}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body
+    )
+    await writer.drain()
+
+
+def _ws_frame(opcode: int, payload: bytes) -> bytes:
+    """An unmasked, unfragmented server-to-client WebSocket frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _read_ws_message(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """(opcode, payload) of the next client message, reassembling fragments."""
+    opcode: int | None = None
+    payload = bytearray()
+    while True:
+        first, second = await reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await reader.readexactly(8))
+        if len(payload) + length > MAX_BODY_BYTES:
+            raise ConnectionError("WebSocket message too large")
+        mask = await reader.readexactly(4) if second & 0x80 else b""
+        data = await reader.readexactly(length)
+        if mask:
+            data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+        frame_opcode = first & 0x0F
+        if frame_opcode >= 0x8:
+            return frame_opcode, data  # Control frames are never fragmented
+        if opcode is None:
+            opcode = frame_opcode
+        payload += data
+        if first & 0x80:  # FIN
+            return opcode, bytes(payload)
+
+
+async def serve(host: str, port: int, server: TtsServer) -> None:
+    listener = await asyncio.start_server(server.handle, host, port, limit=MAX_HEADER_BYTES)
+    addresses = ", ".join(f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in listener.sockets)
+    print(f"speak-server listening on {addresses} (up to {server.max_sessions} concurrent sessions)")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream Gemini speech to many clients over HTTP and WebSocket.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on (default: %(default)s)")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS, help="Concurrent upstream generations (default: %(default)s)")
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS, help="Open client connections before new ones get 503 (default: %(default)s)")
+    parser.add_argument("--buffer-chunks", type=int, default=DEFAULT_BUFFER_CHUNKS, help="Audio chunks buffered per request before the upstream is paused (default: %(default)s)")
+    parser.add_argument("--stall-seconds", type=float, default=DEFAULT_STALL_SECONDS, help="Drop clients that do not read for this long (default: %(default)s)")
+    parser.add_argument("--slot-timeout", type=float, default=DEFAULT_SLOT_TIMEOUT, help="Seconds a request waits for a free session before 503 (default: %(default)s)")
+    args = parser.parse_args()
+
+    if not API_KEY:
+        raise SystemExit("Error: GEMINI_API_KEY not set.")
+    server = TtsServer(
+        create_client(),
+        max_sessions=args.max_sessions,
+        max_connections=args.max_connections,
+        buffer_chunks=args.buffer_chunks,
+        stall_seconds=args.stall_seconds,
+        slot_timeout=args.slot_timeout,
+    )
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
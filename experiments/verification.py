@@ -0,0 +1,182 @@
+"""Background, sampled self-verification of synthesized speech.
+
+A Gemini model with audio input transcribes the synthesized audio, and the
+transcript is scored locally against the text that was meant to be spoken, as
+word error rate (WER). Outputs above `threshold` are flagged in the report.
+
+- The audio is wrapped into a WAV in memory (no re-reading from disk).
+- `Verifier.submit()` starts the check as a background task and returns right
+  away, so the WAV is delivered without waiting for the transcription.
+- `sample_rate` picks a fraction of outputs by a hash of their id, so the same
+  items are sampled on every run.
+- At most `concurrency` checks run at once; `submit()` waits for a free slot,
+  which also bounds the audio held in memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+from experiments.pcm_audio import PcmFormat
+from experiments.rate_limit import QUOTA, QuotaLimiter
+from experiments.wav_stream import wav_header
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+
+DEFAULT_WER_THRESHOLD = 0.2
+DEFAULT_VERIFY_CONCURRENCY = 2
+
+_WORD_RE = re.compile(r"[\w']+")
+
+
+def normalize_words(text: str) -> list[str]:
+    """Lowercased words without punctuation, as used for WER scoring."""
+    return [w.strip("'") for w in _WORD_RE.findall(text.lower()) if w.strip("'")]
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """(substitutions + deletions + insertions) / reference words, via word-level edit distance."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    # Two-row Levenshtein distance: O(len(ref) * len(hyp)) time, O(len(hyp)) memory.
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(
+                previous[j] + 1,  # deletion
+                current[j - 1] + 1,  # insertion
+                previous[j - 1] + (ref_word != hyp_word),  # substitution / match
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def is_sampled(item_id: str, sample_rate: float) -> bool:
+    if sample_rate >= 1.0:
+        return True
+    digest = hashlib.sha256(item_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2**32 < sample_rate
+
+
+@dataclass
+class VerificationResult:
+    id: str
+    text: str
+    transcript: str | None = None
+    wer: float | None = None
+    flagged: bool = False
+    error: str | None = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+
+def transcription_request(wav_bytes: bytes) -> tuple[list[types.Content], types.GenerateContentConfig]:
+    """The GenerateContent contents and config asking a model to transcribe `wav_bytes`."""
+    from google.genai import types
+
+    # Provide the audio as inline data + a transcription instruction.
+    # (This is purely for verification and doesn't need to be perfect.)
+    contents = [
+        types.Content(
+            role="user",
+            parts=[
+                types.Part(inline_data=types.Blob(mime_type="audio/wav", data=wav_bytes)),
+                types.Part(text="Transcribe this audio exactly. Output plain text only."),
+            ],
+        )
+    ]
+    return contents, types.GenerateContentConfig(temperature=0)
+
+
+async def verify_audio(client: genai.Client, *, model: str, item_id: str, text: str, pcm: bytes, fmt: PcmFormat, threshold: float = DEFAULT_WER_THRESHOLD, limiter: QuotaLimiter | None = None) -> VerificationResult:
+    """Transcribes `pcm` with `model` and scores it against `text`. Errors are recorded, not raised."""
+    from experiments.genai_response import extract_text
+
+    result = VerificationResult(id=item_id, text=text)
+    try:
+        contents, config = transcription_request(wav_header(fmt, len(pcm)) + pcm)
+        resp = await (limiter or QUOTA).call(model, lambda: client.aio.models.generate_content(model=model, contents=contents, config=config))
+        result.transcript = extract_text(resp).strip()
+        result.wer = round(word_error_rate(text, result.transcript), 4)
+        result.flagged = result.wer > threshold
+    except Exception as e:  # noqa: BLE001 - verification failures are recorded, never raised
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+class Verifier:
+    def __init__(
+        self,
+        client: genai.Client,
+        *,
+        model: str,
+        sample_rate: float = 1.0,
+        threshold: float = DEFAULT_WER_THRESHOLD,
+        concurrency: int = DEFAULT_VERIFY_CONCURRENCY,
+        limiter: QuotaLimiter | None = None,
+    ) -> None:
+        self.client = client
+        self.model = model
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self._limiter = limiter
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._tasks: set[asyncio.Task[VerificationResult]] = set()
+        self.results: list[VerificationResult] = []
+        self.skipped = 0
+
+    async def submit(self, item_id: str, text: str, pcm: bytes, fmt: PcmFormat) -> bool:
+        """Starts verifying one output in the background; returns False if it was not sampled."""
+        if not is_sampled(item_id, self.sample_rate):
+            self.skipped += 1
+            return False
+        await self._slots.acquire()
+        task = asyncio.create_task(self._run(item_id, text, pcm, fmt))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, item_id: str, text: str, pcm: bytes, fmt: PcmFormat) -> VerificationResult:
+        try:
+            result = await verify_audio(self.client, model=self.model, item_id=item_id, text=text, pcm=pcm, fmt=fmt, threshold=self.threshold, limiter=self._limiter)
+        finally:
+            self._slots.release()
+        self.results.append(result)
+        return result
+
+    async def drain(self) -> list[VerificationResult]:
+        """Waits for all submitted checks and returns every result so far."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        return self.results
+
+    @property
+    def flagged(self) -> list[VerificationResult]:
+        return [r for r in self.results if r.flagged]
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(result.to_json() + "\n" for result in sorted(self.results, key=lambda r: r.id))
+
+    def summary(self) -> str:
+        scored = [r.wer for r in self.results if r.wer is not None]
+        errors = sum(1 for r in self.results if r.error)
+        mean = f"{sum(scored) / len(scored):.1%}" if scored else "n/a"
+        lines = [
+            (
+                f"Verification: {len(self.results)} checked ({self.skipped} not sampled), mean WER {mean}, "
+                f"{len(self.flagged)} above {self.threshold:.0%}, {errors} error(s)."
+            )
+        ]
+        lines += [f"  FLAGGED {r.id}: WER {r.wer:.1%} - heard: {r.transcript!r}" for r in sorted(self.flagged, key=lambda r: r.id)]
+        return "\n".join(lines)
@@ -0,0 +1,156 @@
+"""Incremental WAV writing with bounded memory.
+
+`StreamingWavWriter` writes the RIFF header up front and appends PCM as it
+arrives. The header sizes are patched periodically (about once per second of
+audio) and on close, so a process that dies mid-turn still leaves a playable
+file. `repair_wav_header` fixes the sizes of such a partial file from its
+actual length.
+
+`OffloopWriter` runs blocking sink calls (file writes) on a dedicated thread, in
+submission order, with a bounded backlog so that a slow disk applies
+backpressure instead of growing memory.
+
+Usage:
+  uv run python -m experiments.wav_stream repair partial.wav
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import struct
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Self
+
+from experiments.pcm_audio import PcmFormat
+
+WAV_HEADER_BYTES = 44
+
+
+def wav_header(fmt: PcmFormat, data_bytes: int) -> bytes:
+    """Canonical 44-byte PCM WAV header for `data_bytes` of audio."""
+    block_align = fmt.channels * fmt.sample_width_bytes
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_bytes,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        fmt.channels,
+        fmt.sample_rate_hz,
+        fmt.sample_rate_hz * block_align,
+        block_align,
+        fmt.sample_width_bytes * 8,
+        b"data",
+        data_bytes,
+    )
+
+
+class StreamingWavWriter:
+    def __init__(self, path: str, fmt: PcmFormat, header_interval_bytes: int | None = None) -> None:
+        self.path = path
+        self.fmt = fmt
+        self.data_bytes = 0
+        self._header_interval = header_interval_bytes or fmt.bytes_per_second
+        self._last_header_patch = 0
+        self._file: BinaryIO | None = open(path, "wb")  # noqa: SIM115 - closed by close()
+        self._file.write(wav_header(fmt, 0))
+
+    def write(self, pcm: bytes) -> None:
+        if self._file is None:
+            raise ValueError(f"WAV writer for {self.path} is closed")
+        self._file.write(pcm)
+        self.data_bytes += len(pcm)
+        if self.data_bytes - self._last_header_patch >= self._header_interval:
+            self._patch_header()
+
+    def _patch_header(self) -> None:
+        assert self._file is not None
+        # Only whole frames count, a torn write at the end is dropped by readers.
+        frame = self.fmt.channels * self.fmt.sample_width_bytes
+        self._file.seek(0)
+        self._file.write(wav_header(self.fmt, self.data_bytes - self.data_bytes % frame))
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+        self._last_header_patch = self.data_bytes
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self._patch_header()
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def repair_wav_header(path: str) -> int:
+    """
+    Rewrite the size fields of a 44-byte-header PCM WAV from the file length.
+    Returns the number of audio data bytes.
+    """
+    with open(path, "r+b") as f:
+        header = f.read(WAV_HEADER_BYTES)
+        if len(header) < WAV_HEADER_BYTES or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file written by StreamingWavWriter")
+        channels, rate = struct.unpack_from("<HI", header, 22)
+        bits = struct.unpack_from("<H", header, 34)[0]
+        fmt = PcmFormat(sample_rate_hz=rate, channels=channels, sample_width_bytes=bits // 8)
+
+        f.seek(0, os.SEEK_END)
+        data_bytes = f.tell() - WAV_HEADER_BYTES
+        data_bytes -= data_bytes % (fmt.channels * fmt.sample_width_bytes)
+        f.seek(0)
+        f.write(wav_header(fmt, data_bytes))
+    return data_bytes
+
+
+class OffloopWriter:
+    """Runs blocking calls on one worker thread, in order, with at most `max_pending` queued."""
+
+    def __init__(self, max_pending: int = 64) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pcm-writer")
+        self._pending: deque[asyncio.Future[None]] = deque()
+        self._max_pending = max_pending
+
+    async def submit(self, fn: Callable[..., None], *args: object) -> None:
+        loop = asyncio.get_running_loop()
+        self._pending.append(loop.run_in_executor(self._executor, fn, *args))
+        # Backpressure: wait for the oldest call once the backlog is full (re-raises its error).
+        while len(self._pending) >= self._max_pending or (self._pending and self._pending[0].done()):
+            await self._pending.popleft()
+
+    async def drain(self) -> None:
+        while self._pending:
+            await self._pending.popleft()
+
+    async def close(self) -> None:
+        try:
+            await self.drain()
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming WAV utilities.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    repair = sub.add_parser("repair", help="Fix the header sizes of a partially written WAV file")
+    repair.add_argument("path", help="WAV file to repair in place")
+    args = parser.parse_args()
+
+    if args.command == "repair":
+        data_bytes = repair_wav_header(args.path)
+        print(f"Repaired {args.path}: {data_bytes} bytes of audio.")
+
+
+if __name__ == "__main__":
+    main()
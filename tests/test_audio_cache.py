@@ -0,0 +1,38 @@
+"""AudioCache: the byte budget comes from the environment when the cache is built, and hits survive eviction races."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from experiments.audio_cache import DEFAULT_MAX_BYTES, AudioCache
+from experiments.pcm_audio import PcmFormat
+
+FMT = PcmFormat(sample_rate_hz=24000, channels=1)
+
+
+def test_budget_is_read_from_the_environment_per_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("SPEAK_CACHE_MAX_MB", raising=False)
+    assert AudioCache(str(tmp_path)).max_bytes == DEFAULT_MAX_BYTES
+    monkeypatch.setenv("SPEAK_CACHE_MAX_MB", "3")
+    assert AudioCache(str(tmp_path)).max_bytes == 3 * 1024 * 1024
+    assert AudioCache(str(tmp_path), max_bytes=10).max_bytes == 10
+
+
+def test_invalid_budget_is_reported_by_name(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SPEAK_CACHE_MAX_MB", "lots")
+    with pytest.raises(ValueError, match="SPEAK_CACHE_MAX_MB must be a whole number of MiB, got 'lots'"):
+        AudioCache(str(tmp_path))
+
+
+def test_hit_whose_file_was_evicted_meanwhile_is_still_served(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = AudioCache(str(tmp_path), max_bytes=DEFAULT_MAX_BYTES)
+    cache.put("k", b"\x01\x02", FMT)
+
+    def utime_after_eviction(path: str | os.PathLike[str], *args: object) -> None:
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", utime_after_eviction)
+    assert cache.get("k") == (b"\x01\x02", FMT)
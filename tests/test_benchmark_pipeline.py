@@ -0,0 +1,53 @@
+"""Smoke test: the pipeline benchmarks and a paced Live session against the fake Live client."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+from experiments import gemini_live_audio as live
+from experiments.benchmark_pipeline import build_benchmarks, run_benchmark
+from experiments.fake_live import ChunkTiming, FakeLiveClient
+
+if TYPE_CHECKING:
+    from google import genai
+
+CHUNK_BYTES = 4800  # 100 ms of 24kHz mono PCM16
+
+
+def test_every_benchmark_runs_and_processes_all_audio(tmp_path: Path) -> None:
+    arrivals = ChunkTiming(chunks=20, chunk_bytes=CHUNK_BYTES).arrivals()
+    benchmarks = build_benchmarks(arrivals, str(tmp_path))
+
+    async def run_all() -> None:
+        for name, (chunks, bench) in benchmarks.items():
+            result = await run_benchmark(name, chunks, bench, repeat=1)
+            assert result.total_bytes >= 20 * CHUNK_BYTES, name
+            assert result.wall_seconds < 5.0, name
+
+    asyncio.run(run_all())
+
+
+def test_live_session_latency_with_paced_chunks(tmp_path: Path) -> None:
+    timing = ChunkTiming(chunks=10, chunk_bytes=CHUNK_BYTES, interval_s=0.02, first_chunk_delay_s=0.05, connect_delay_s=0.03)
+    client = FakeLiveClient.from_timing(timing)
+    output = os.path.join(tmp_path, "session.wav")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        metrics = asyncio.run(live.live_audio_session(save_audio=True, text_to_speak_as_is="Latency.", use_cache=False, output_path=output, client=cast("genai.Client", client)))
+
+    assert metrics is not None
+    assert metrics.chunks == 10
+    assert metrics.total_bytes == 10 * CHUNK_BYTES
+    # First audio: the fake's own delay plus a small pipeline overhead.
+    assert metrics.first_audio_seconds is not None
+    assert 0.05 <= metrics.first_audio_seconds < 0.25
+    assert metrics.time_to_first_audio_seconds is not None
+    assert 0.08 <= metrics.time_to_first_audio_seconds < 0.35
+    # The whole turn arrives over ~0.26 s; the pipeline must keep up with it.
+    assert metrics.wall_seconds < 1.0
+    assert os.path.getsize(output) > 10 * CHUNK_BYTES
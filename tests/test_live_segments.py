@@ -0,0 +1,62 @@
+"""Long-form Live synthesis: segments come out in order, and only `concurrency` of them are buffered."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+from experiments import gemini_live_audio as live
+
+
+def fake_segments(monkeypatch: pytest.MonkeyPatch, started: list[str]) -> None:
+    async def stream_segment(client: Any, model_id: str, config: Any, segment: str, verbose: bool = True, metrics: Any = None) -> AsyncIterator[bytes]:
+        started.append(segment)
+        for part in range(3):
+            await asyncio.sleep(0)
+            yield f"{segment}{part}".encode()
+        if segment == "bad":
+            raise ConnectionError("socket closed")
+
+    monkeypatch.setattr(live, "_stream_segment", stream_segment)
+
+
+def test_segments_are_yielded_in_order_without_progress_output(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
+    started: list[str] = []
+    fake_segments(monkeypatch, started)
+
+    async def collect() -> list[bytes]:
+        return [chunk async for chunk in live._stream_segments_parallel(None, "m", None, ["a", "b", "c"], 2, verbose=False)]  # type: ignore[arg-type]
+
+    assert asyncio.run(collect()) == [b"a0", b"a1", b"a2", b"b0", b"b1", b"b2", b"c0", b"c1", b"c2"]
+    assert capsys.readouterr().out == ""
+
+
+def test_a_slow_consumer_holds_back_later_segments(monkeypatch: pytest.MonkeyPatch) -> None:
+    started: list[str] = []
+    fake_segments(monkeypatch, started)
+
+    async def scenario() -> None:
+        chunks = live._stream_segments_parallel(None, "m", None, ["a", "b", "c", "d"], 2, verbose=False)  # type: ignore[arg-type]
+        assert await anext(chunks) == b"a0"
+        await asyncio.sleep(0.05)  # Plenty of time for every segment, were they not held back
+        assert started == ["a", "b"]
+        rest = [chunk async for chunk in chunks]
+        assert len(rest) == 11 and started == ["a", "b", "c", "d"]
+
+    asyncio.run(scenario())
+
+
+def test_a_failed_segment_raises_after_the_audio_before_it(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_segments(monkeypatch, [])
+    received: list[bytes] = []
+
+    async def collect() -> None:
+        async for chunk in live._stream_segments_parallel(None, "m", None, ["a", "bad", "c"], 2, verbose=False):  # type: ignore[arg-type]
+            received.append(chunk)
+
+    with pytest.raises(RuntimeError, match="segment 2/3 failed: socket closed"):
+        asyncio.run(collect())
+    assert received == [b"a0", b"a1", b"a2", b"bad0", b"bad1", b"bad2"]
@@ -0,0 +1,142 @@
+"""JitterBufferPlayer against a fake output stream that the test pulls by hand."""
+
+from __future__ import annotations
+
+import asyncio
+
+from experiments.pcm_audio import PcmFormat
+from experiments.playback import JitterBufferPlayer, StreamCallback
+
+FMT = PcmFormat(sample_rate_hz=24000, channels=1)
+MS = FMT.bytes_per_second // 1000  # Bytes per millisecond of audio
+
+
+class ManualStream:
+    """Fake output device: every `pull()` is one device callback, on the calling thread."""
+
+    def __init__(self, fmt: PcmFormat, callback: StreamCallback) -> None:
+        self.fmt = fmt
+        self.callback = callback
+        self.started = False
+        self.closed = False
+
+    def pull(self, ms: int) -> bytes:
+        frames = self.fmt.sample_rate_hz * ms // 1000
+        out = bytearray(frames * self.fmt.channels * self.fmt.sample_width_bytes)
+        self.callback(out, frames, None, None)
+        return bytes(out)
+
+    def start(self) -> None:
+        self.started = True
+
+    def stop(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def make_player(*, capacity_ms: int = 1000, prebuffer_ms: int = 100) -> tuple[JitterBufferPlayer, list[ManualStream]]:
+    streams: list[ManualStream] = []
+
+    def factory(fmt: PcmFormat, callback: StreamCallback) -> ManualStream:
+        streams.append(ManualStream(fmt, callback))
+        return streams[-1]
+
+    player = JitterBufferPlayer(FMT, capacity_seconds=capacity_ms / 1000, prebuffer_seconds=prebuffer_ms / 1000, stream_factory=factory)
+    return player, streams
+
+
+def test_playback_waits_for_the_prebuffer_watermark() -> None:
+    async def scenario() -> None:
+        player, streams = make_player(prebuffer_ms=100)
+        player.start()
+        stream = streams[0]
+        assert stream.started
+
+        await player.write(b"\x01" * (60 * MS))
+        assert stream.pull(20) == bytes(20 * MS)  # Below the watermark: silence
+        assert player.bytes_played == 0
+
+        await player.write(b"\x01" * (40 * MS))
+        assert stream.pull(20) == b"\x01" * (20 * MS)
+        assert player.bytes_played == 20 * MS
+        assert player.underruns == 0
+
+    asyncio.run(scenario())
+
+
+def test_underrun_is_counted_and_playback_rebuffers() -> None:
+    async def scenario() -> None:
+        player, streams = make_player(prebuffer_ms=50)
+        player.start()
+        stream = streams[0]
+
+        await player.write(b"\x01" * (50 * MS))
+        played = stream.pull(80)  # Wants more than is buffered
+        assert played == b"\x01" * (50 * MS) + bytes(30 * MS)
+        assert player.underruns == 1
+
+        # After the underrun, playback waits for the watermark again.
+        await player.write(b"\x02" * (20 * MS))
+        assert stream.pull(10) == bytes(10 * MS)
+        await player.write(b"\x02" * (30 * MS))
+        assert stream.pull(10) == b"\x02" * (10 * MS)
+        assert player.underruns == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_buffer_blocks_the_writer_until_the_device_reads() -> None:
+    async def scenario() -> None:
+        player, streams = make_player(capacity_ms=100, prebuffer_ms=50)
+        player.start()
+        stream = streams[0]
+
+        write = asyncio.create_task(player.write(b"\x01" * (150 * MS)))
+        await asyncio.sleep(0.01)
+        assert not write.done()
+        assert player.overruns == 1
+
+        stream.pull(60)
+        await asyncio.wait_for(write, 1.0)
+        assert player.overruns == 1
+
+    asyncio.run(scenario())
+
+
+def test_finish_plays_out_a_short_tail_and_closes_the_stream() -> None:
+    async def scenario() -> None:
+        player, streams = make_player(prebuffer_ms=200)
+        player.start()
+        stream = streams[0]
+
+        await player.write(b"\x01" * (30 * MS))  # Never reaches the watermark
+        finish = asyncio.create_task(player.finish())
+        pulled = b""
+        while not finish.done():
+            pulled += stream.pull(20)
+            await asyncio.sleep(0.001)
+        await finish
+
+        assert pulled.strip(b"\x00") == b"\x01" * (30 * MS)
+        assert player.bytes_played == 30 * MS
+        assert player.underruns == 0  # Running dry at the end is not an underrun
+        assert stream.closed
+
+    asyncio.run(scenario())
+
+
+def test_finish_without_audio_returns() -> None:
+    async def scenario() -> None:
+        player, streams = make_player()
+        player.start()
+        finish = asyncio.create_task(player.finish())
+        while not finish.done():
+            streams[0].pull(20)
+            await asyncio.sleep(0.001)
+        await finish
+        assert player.bytes_played == 0
+        assert streams[0].closed
+
+    asyncio.run(scenario())
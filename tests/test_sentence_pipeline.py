@@ -0,0 +1,41 @@
+"""stream_sentences stops at the --max-chars budget, including right at its edge."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator
+from typing import TYPE_CHECKING, Any, cast
+
+import pytest
+
+from experiments import sentence_pipeline
+
+if TYPE_CHECKING:
+    from google import genai
+
+SENTENCES = ["Aaaa.", "Bbbb.", "Cccc."]  # Spoken as "Aaaa. Bbbb. Cccc."
+
+
+@pytest.mark.parametrize(
+    ("max_chars", "expected"),
+    [
+        (0, SENTENCES),
+        (5, ["Aaaa."]),  # First sentence fills the budget; the separator would overflow it
+        (6, ["Aaaa."]),  # Budget ends on the separator: nothing left for the next sentence
+        (8, ["Aaaa.", "Bb…"]),
+        (11, ["Aaaa.", "Bbbb."]),
+        (17, SENTENCES),
+    ],
+)
+def test_max_chars_budget(monkeypatch: pytest.MonkeyPatch, max_chars: int, expected: list[str]) -> None:
+    async def raw_sentences(client: Any, **kwargs: Any) -> AsyncGenerator[str]:
+        for sentence in SENTENCES:
+            yield sentence
+
+    monkeypatch.setattr(sentence_pipeline, "_raw_sentences", raw_sentences)
+
+    async def collect() -> list[str]:
+        client = cast("genai.Client", None)
+        return [s async for s in sentence_pipeline.stream_sentences(client, model="m", prompt="p", max_chars=max_chars)]
+
+    assert asyncio.run(collect()) == expected
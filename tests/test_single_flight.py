@@ -0,0 +1,83 @@
+"""SingleFlight: late joiners replay the first chunks, and a long flight only keeps what is unread."""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import weakref
+from collections.abc import AsyncIterator, Callable
+
+from experiments.single_flight import SingleFlight
+
+
+class Chunk:
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+
+def upstream(total: int, gate: asyncio.Event | None = None, pause_at: int = -1) -> Callable[[], AsyncIterator[Chunk]]:
+    def start() -> AsyncIterator[Chunk]:
+        async def chunks() -> AsyncIterator[Chunk]:
+            for i in range(total):
+                if i == pause_at and gate is not None:
+                    await gate.wait()
+                yield Chunk(i)
+
+        return chunks()
+
+    return start
+
+
+async def indices(chunks: AsyncIterator[Chunk]) -> list[int]:
+    return [chunk.index async for chunk in chunks]
+
+
+def test_late_joiner_within_the_replay_window_gets_every_chunk() -> None:
+    async def scenario() -> None:
+        flights = SingleFlight(max_lead=4, replay=8)
+        gate = asyncio.Event()
+        start = upstream(20, gate, pause_at=3)
+
+        first = flights.stream("k", start)
+        assert [(await anext(first)).index for _ in range(3)] == [0, 1, 2]
+        late = asyncio.create_task(indices(flights.stream("k", start)))
+        await asyncio.sleep(0)
+        gate.set()
+
+        assert await indices(first) == list(range(3, 20))
+        assert await late == list(range(20))
+        assert (flights.started, flights.joined) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_a_request_past_the_replay_window_starts_its_own_flight() -> None:
+    async def scenario() -> None:
+        flights = SingleFlight(max_lead=4, replay=8)
+        start = upstream(100)
+
+        first = flights.stream("k", start)
+        assert [(await anext(first)).index for _ in range(20)] == list(range(20))
+        assert await indices(flights.stream("k", start)) == list(range(100))
+        assert await indices(first) == list(range(20, 100))
+        assert (flights.started, flights.joined) == (2, 0)
+
+    asyncio.run(scenario())
+
+
+def test_a_long_flight_keeps_only_the_unread_chunks() -> None:
+    async def scenario() -> None:
+        flights = SingleFlight(max_lead=4, replay=8)
+        alive: list[weakref.ref[Chunk]] = []
+
+        first = flights.stream("k", upstream(1000))
+        for expected in range(500):
+            chunk = await anext(first)
+            assert chunk.index == expected
+            alive.append(weakref.ref(chunk))
+        del chunk
+        gc.collect()
+        assert sum(ref() is not None for ref in alive) <= flights.max_lead
+        assert await indices(first) == list(range(500, 1000))
+
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+"""GenerateContentTtsBackend resamples a chunked stream exactly as it would resample the whole clip."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING, Any, cast
+
+import numpy as np
+import pytest
+
+from experiments import gemini_3_text_then_25_tts
+from experiments.pcm_audio import PcmFormat
+from experiments.resample import StreamingResampler
+from experiments.synthesis import GenerateContentTtsBackend
+
+if TYPE_CHECKING:
+    from google import genai
+
+SOURCE = PcmFormat(sample_rate_hz=16000, channels=1)
+
+
+def test_chunked_stream_matches_resampling_the_whole_clip(monkeypatch: pytest.MonkeyPatch) -> None:
+    tone = (np.sin(np.arange(16000) * 2 * np.pi * 440 / 16000) * 10000).astype("<i2").tobytes()
+
+    async def stream_tts_async(client: Any, **kwargs: Any) -> AsyncIterator[tuple[bytes, PcmFormat, bool]]:
+        for start in range(0, len(tone), 640):  # 20 ms chunks
+            yield tone[start : start + 640], SOURCE, False
+
+    monkeypatch.setattr(gemini_3_text_then_25_tts, "stream_tts_async", stream_tts_async)
+    backend = GenerateContentTtsBackend(client=cast("genai.Client", object()))
+
+    async def collect() -> bytes:
+        return b"".join([chunk async for chunk in backend.stream("text")])
+
+    whole = StreamingResampler(SOURCE, backend.fmt)
+    assert asyncio.run(collect()) == whole.process(tone) + whole.flush()
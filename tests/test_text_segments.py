@@ -0,0 +1,41 @@
+"""Sentence splitting keeps closing quotes and brackets with their sentence."""
+
+from __future__ import annotations
+
+from experiments.text_segments import (
+    SentenceStream,
+    split_sentences,
+    split_text_segments,
+)
+
+TEXT = 'He said "Hi." Then (he left.) She asked: "Why?!") Bye.'
+SENTENCES = ['He said "Hi."', "Then (he left.)", 'She asked: "Why?!")', "Bye."]
+
+
+def test_split_sentences_keeps_closers() -> None:
+    assert split_sentences(TEXT) == SENTENCES
+
+
+def test_split_sentences_only_splits_on_whitespace_after_terminal_punctuation() -> None:
+    assert split_sentences('A (bracketed) and "quoted" word. Next') == ['A (bracketed) and "quoted" word.', "Next"]
+    assert split_sentences("Version 1.5 is out.") == ["Version 1.5 is out."]
+
+
+def test_sentence_stream_keeps_closers_across_pieces() -> None:
+    stream = SentenceStream()
+    emitted: list[str] = []
+    for i in range(0, len(TEXT), 3):
+        emitted += stream.feed(TEXT[i : i + 3])
+    emitted += stream.flush()
+    assert emitted == SENTENCES
+
+
+def test_sentence_stream_waits_for_the_whitespace_after_a_closer() -> None:
+    stream = SentenceStream()
+    assert stream.feed('He said "Hi."') == []
+    assert stream.feed(" Then") == ['He said "Hi."']
+    assert stream.flush() == ["Then"]
+
+
+def test_segments_keep_closers() -> None:
+    assert split_text_segments(TEXT, max_chars=30) == ['He said "Hi." Then (he left.)', 'She asked: "Why?!") Bye.']
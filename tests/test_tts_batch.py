@@ -0,0 +1,36 @@
+"""Batch input parsing: unusable rows become error rows instead of aborting or overwriting."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from experiments.tts_batch import read_rows
+
+
+def test_rows_that_would_share_an_output_file_are_rejected(tmp_path: Path) -> None:
+    path = tmp_path / "rows.jsonl"
+    records = [
+        {"id": "a", "prompt": "one"},
+        {"id": "a", "prompt": "two"},
+        {"id": "b/c", "prompt": "three"},
+        {"id": "B_c", "prompt": "four"},  # Same file name as "b/c" on a case-insensitive filesystem
+        {"prompt": "five"},
+        {"id": "000005", "prompt": "six"},  # Collides with row 5's default id
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+
+    rows = list(read_rows(str(path)))
+
+    assert [(row.id, row.error is None) for row in rows] == [("a", True), ("a", False), ("b/c", True), ("B_c", False), ("000005", True), ("000005", False)]
+    assert rows[1].error == "row 2: id 'a' has the same output file as row 1"
+
+
+def test_csv_rows_without_a_prompt_are_error_rows(tmp_path: Path) -> None:
+    path = tmp_path / "rows.csv"
+    path.write_text("id,prompt\nx,hello\ny,\n", encoding="utf-8")
+
+    rows = list(read_rows(str(path)))
+
+    assert rows[0].error is None
+    assert rows[1].error == "row 2 has no 'prompt'"